@@ -4,9 +4,12 @@ In some cases, ``typing.Optional[str]`` is used for the ``sodar_uuid`` attribute
 the UUID as an attribute.
 """
 
+import datetime
+import sys
 import typing
 
 import attr
+import cattr
 
 
 @attr.s(frozen=True, auto_attribs=True)
@@ -68,7 +71,7 @@ class User:
     email: str
 
 
-@attr.s(frozen=True, auto_attribs=True)
+@attr.s(frozen=True, auto_attribs=True, slots=True)
 class IrodsDataObject:
     """Represents an iRODS data object in the SODAR API."""
 
@@ -81,14 +84,40 @@ class IrodsDataObject:
     path: str
     # Size in bytes
     size: int
-    # Datetime of last modification (YYYY-MM-DDThh:mm:ssZ)
-    # TODO use a datetime object here?
-    modify_time: str
+    # Datetime of last modification (parsed from YYYY-MM-DDThh:mm:ssZ)
+    modify_time: datetime.datetime
     # Checksum of data object (from API version 1.1)
     checksum: str
 
 
-@attr.s(frozen=True, auto_attribs=True, kw_only=True)
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse an ISO 8601 timestamp from the API."""
+    return datetime.datetime.fromisoformat(value)
+
+
+def structure_irods_data_object(obj: dict, _type: type = IrodsDataObject) -> IrodsDataObject:
+    """Specialized structuring of one SODAR file list entry.
+
+    Called once per data object of a project, so it avoids the generic converter. Also registered as
+    ``cattr`` structure hook so ``cattr.structure(obj, IrodsDataObject)`` gives the same result.
+    """
+    return IrodsDataObject(
+        name=obj["name"],
+        # only a handful of distinct values, share the string objects
+        type=sys.intern(obj["type"]),
+        # the collection part of the path is not interned: it would have to be stored separately to
+        # be shared, and each full path is unique anyway
+        path=obj["path"],
+        size=int(obj["size"]),
+        modify_time=parse_datetime(obj["modify_time"]),
+        checksum=obj["checksum"],
+    )
+
+
+cattr.register_structure_hook(IrodsDataObject, structure_irods_data_object)
+
+
+@attr.s(frozen=True, auto_attribs=True, kw_only=True, slots=True)
 class LandingZone:
     """Represent a landing zone in the SODAR API."""
 
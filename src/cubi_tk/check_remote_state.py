@@ -0,0 +1,108 @@
+"""Persisted state of ``sodar check-remote`` runs.
+
+With ``--incremental``, ``sodar check-remote`` stores the listing and the recorded checksums of every
+local directory, the identity (modification time and checksum) of every remote data object and the
+comparison result of every file in a JSON file below the cache directory (see ``sodar_cache``). The
+next run only lists local directories whose modification time changed and reports which files changed
+their comparison result since the previous run.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+import typing
+
+import attr
+from loguru import logger
+
+#: Version of the state file format, states with other versions are ignored.
+CHECK_REMOTE_STATE_VERSION = 1
+
+#: Name of the directory with state files inside the cache directory.
+CHECK_REMOTE_STATE_DIR = "check-remote"
+
+
+def get_state_path(cache_dir: typing.Union[str, Path], *key: typing.Any) -> Path:
+    """Path of the state file for a server, project, local base path and comparison options."""
+    digest = hashlib.sha256(json.dumps([str(k) for k in key]).encode("utf-8")).hexdigest()[:32]
+    return Path(cache_dir) / CHECK_REMOTE_STATE_DIR / f"{digest}.json"
+
+
+def remote_identities(remote_files_dict: dict) -> dict[str, list[typing.Optional[str]]]:
+    """Identities of remote data objects: path → [modification time, checksum]."""
+    identities = {}
+    for files in remote_files_dict.values():
+        for f in files:
+            modify_time = getattr(f, "modify_time", None)
+            identities[f.path] = [None if modify_time is None else str(modify_time), f.checksum]
+    return identities
+
+
+@attr.s(auto_attribs=True)
+class CheckRemoteState:
+    """State of a ``sodar check-remote`` run."""
+
+    #: Unix timestamp of the run, 0 if there was no previous run.
+    saved_at: float = 0.0
+    #: Local directories: path → dict with ``mtime_ns``, ``subdirs`` and ``files`` (names) and
+    #: ``checksums`` (checksum file name → [mtime_ns, checksum]).
+    directories: dict[str, dict[str, typing.Any]] = attr.Factory(dict)
+    #: Remote data objects: path → [modification time, checksum].
+    remote: dict[str, list[typing.Optional[str]]] = attr.Factory(dict)
+    #: Comparison results: ``local:<path>`` or ``remote:<path>`` → category.
+    results: dict[str, str] = attr.Factory(dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "CheckRemoteState":
+        """Load state, returns an empty state if it does not exist or cannot be read."""
+        try:
+            with path.open("rt") as inputf:
+                data = json.load(inputf)
+            if data.pop("version", None) != CHECK_REMOTE_STATE_VERSION:
+                raise ValueError("unsupported version")
+            return cls(**data)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable check-remote state {}: {}", path, e)
+            return cls()
+
+    def save(self, path: Path) -> None:
+        """Store state, errors are logged and otherwise ignored."""
+        data = attr.asdict(self)
+        data["saved_at"] = time.time()
+        data["version"] = CHECK_REMOTE_STATE_VERSION
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # write to temporary file and rename, an interrupted run keeps the previous state
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wt") as outputf:
+                json.dump(data, outputf)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write check-remote state {}: {}", path, e)
+
+    def diff_remote(self, remote: dict[str, list[typing.Optional[str]]]) -> tuple[int, int, int]:
+        """Number of new, modified and removed remote data objects compared to this state."""
+        new = modified = 0
+        for path, identity in remote.items():
+            previous = self.remote.get(path)
+            if previous is None:
+                new += 1
+            elif list(previous) != list(identity):
+                modified += 1
+        removed = sum(1 for path in self.remote if path not in remote)
+        return new, modified, removed
+
+    def diff_results(
+        self, results: dict[str, str]
+    ) -> typing.Iterator[tuple[str, typing.Optional[str], typing.Optional[str]]]:
+        """Files whose comparison result changed: tuples of key, previous and current category
+        (``None`` for files that were not seen), sorted by key."""
+        for key in sorted(results.keys() | self.results.keys()):
+            previous, current = self.results.get(key), results.get(key)
+            if previous != current:
+                yield key, previous, current
@@ -0,0 +1,187 @@
+"""Streaming reports of the ``check-remote`` commands.
+
+The comparison of local and remote files produces one ``ReportRecord`` per file. With the ``tsv`` and
+``jsonl`` formats each record is written (and flushed) as soon as it is produced, followed by a
+summary with the number of records per category. The ``text`` format groups files by directory, for
+that the records are sorted with ``ExternalSorter`` which keeps a bounded number of records in memory.
+"""
+
+import contextlib
+import heapq
+import itertools
+import json
+import sys
+import tempfile
+import typing
+
+import attr
+
+#: Supported report formats.
+REPORT_FORMATS = ("text", "tsv", "jsonl")
+
+#: Maximal number of records kept in memory when sorting, larger inputs are sorted in temporary files.
+DEFAULT_SORT_BUFFER_SIZE = 100_000
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class ReportRecord:
+    """One file in a ``check-remote`` report."""
+
+    #: Category of the file, e.g. ``both``, ``local-only`` or ``remote-only``.
+    category: str
+    #: Directory of the file.
+    directory: str
+    #: Name of the file.
+    name: str
+    #: Checksum of the file, if known.
+    checksum: typing.Optional[str] = None
+    #: Pipeline step of the file, if any.
+    step: typing.Optional[str] = None
+    #: Additional information, e.g. the remote path of a file with a different checksum.
+    detail: typing.Optional[str] = None
+
+    def sort_key(self) -> tuple[str, str]:
+        return self.directory, self.name
+
+
+class ExternalSorter:
+    """Sort ``ReportRecord``s by directory and name.
+
+    At most ``buffer_size`` records are kept in memory, full buffers are written as sorted runs to
+    temporary files which are merged when iterating.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_SORT_BUFFER_SIZE):
+        #: Maximal number of records in memory.
+        self.buffer_size = buffer_size
+        self._buffer: list[ReportRecord] = []
+        self._runs: list[typing.IO[str]] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, record: ReportRecord) -> None:
+        self._buffer.append(record)
+        self._len += 1
+        if len(self._buffer) >= self.buffer_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        run = tempfile.TemporaryFile("w+t", encoding="utf-8")
+        for record in sorted(self._buffer, key=ReportRecord.sort_key):
+            run.write(json.dumps(attr.astuple(record)) + "\n")
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(run: typing.IO[str]) -> typing.Iterator[ReportRecord]:
+        for line in run:
+            yield ReportRecord(*json.loads(line))
+
+    def __iter__(self) -> typing.Iterator[ReportRecord]:
+        """Yield all records in sorted order, can only be done once if records were spilled."""
+        if not self._runs:
+            yield from sorted(self._buffer, key=ReportRecord.sort_key)
+            return
+        if self._buffer:
+            self._spill()
+        try:
+            yield from heapq.merge(
+                *(self._read_run(run) for run in self._runs), key=ReportRecord.sort_key
+            )
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Remove the temporary files."""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+
+
+def group_by_directory(
+    records: typing.Iterable[ReportRecord],
+) -> typing.Iterator[tuple[str, list[ReportRecord]]]:
+    """Group sorted records into tuples of directory and the records in it."""
+    for directory, group in itertools.groupby(records, key=lambda record: record.directory):
+        yield directory, list(group)
+
+
+def write_text_section(
+    records: typing.Sized,
+    header: str,
+    empty_message: typing.Optional[str] = None,
+    include_checksum: bool = False,
+    stream: typing.Optional[typing.TextIO] = None,
+) -> None:
+    """Write sorted records (e.g. an ``ExternalSorter``) as text, grouped by directory.
+
+    Directory blocks are written one at a time instead of building the whole section in memory.
+    Without records, only ``empty_message`` is written (if given).
+    """
+    stream = stream or sys.stdout
+    if not len(records):
+        if empty_message:
+            print(empty_message, file=stream)
+        return
+    print(header, file=stream)
+    for folder, group in group_by_directory(records):
+        print(folder + ":", file=stream)
+        for record in group:
+            print(
+                "    "
+                + record.name
+                + ("" if not include_checksum else "  (" + (record.checksum or "-")[:8] + ")")
+                + (f"  [{record.detail}]" if record.detail else ""),
+                file=stream,
+            )
+
+
+class ReportWriter:
+    """Write ``ReportRecord``s as TSV or JSON lines to ``stream`` as soon as they are produced."""
+
+    #: Columns of the TSV format.
+    columns = ("category", "directory", "name", "checksum", "step", "detail")
+
+    def __init__(self, report_format: str, stream: typing.Optional[typing.TextIO] = None):
+        if report_format not in ("tsv", "jsonl"):
+            raise ValueError(f"Unsupported streaming report format: {report_format}")
+        #: Either ``tsv`` or ``jsonl``.
+        self.report_format = report_format
+        #: Output stream, defaults to stdout.
+        self.stream = stream or sys.stdout
+        #: Number of written records per category.
+        self.counts: dict[str, int] = {}
+        if self.report_format == "tsv":
+            self._write_line("\t".join(self.columns))
+
+    def _write_line(self, line: str) -> None:
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def write(self, record: ReportRecord) -> None:
+        self.counts[record.category] = self.counts.get(record.category, 0) + 1
+        if self.report_format == "tsv":
+            self._write_line("\t".join(value or "" for value in attr.astuple(record)))
+        else:
+            self._write_line(json.dumps(attr.asdict(record)))
+
+    def write_summary(self) -> None:
+        """Write the number of records per category."""
+        if self.report_format == "tsv":
+            counts = " ".join(f"{category}={count}" for category, count in self.counts.items())
+            self._write_line(f"# summary: {counts}")
+        else:
+            self._write_line(json.dumps({"summary": self.counts}))
+
+
+@contextlib.contextmanager
+def open_report_output(path: typing.Optional[str]) -> typing.Iterator[typing.TextIO]:
+    """Open the report output file, ``None`` or ``-`` is stdout."""
+    if not path or path == "-":
+        yield sys.stdout
+    else:
+        with open(path, "wt") as outputf:
+            yield outputf
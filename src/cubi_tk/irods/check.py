@@ -1,24 +1,35 @@
 """``cubi-tk irods check``: Check target iRODS collection (all md5 files? metadata md5 consistent? enough replicas?)."""
 
 import argparse
+import functools
+import itertools
 import json
 from multiprocessing.pool import ThreadPool
 import os
-import re
 import typing
 
-from irods.data_object import iRODSDataObject
+from irods.session import iRODSSession
 from loguru import logger
 import tqdm
 
 from cubi_tk.parsers import print_args
 
-from ..irods_common import DEFAULT_HASH_SCHEME, HASH_SCHEMES, iRODSRetrieveCollection
+from ..irods_common import (
+    DEFAULT_HASH_SCHEME,
+    DEFAULT_QUERY_PAGE_SIZE,
+    HASH_SCHEMES,
+    iRODSQueryRow,
+    iRODSRetrieveCollection,
+    iRODSSessionPool,
+)
 
 MIN_NUM_REPLICAS = 2
 NUM_PARALLEL_TESTS = 4
 NUM_DISPLAY_FILES = 20
 
+#: Number of files whose checksum files are read in one batch by the worker threads.
+CHECK_BATCH_SIZE = 1000
+
 
 class IrodsCheckCommand(iRODSRetrieveCollection):
     """Implementation of iRDOS check command."""
@@ -40,7 +51,12 @@ class IrodsCheckCommand(iRODSRetrieveCollection):
         :param irods_env_path: Path to irods_environment.json
         :type irods_env_path: pathlib.Path, optional
         """
-        super.__init__(hash_scheme, ask, irods_env_path)
+        super().__init__(
+            ask=ask,
+            irods_env_path=irods_env_path,
+            query_page_size=getattr(args, "query_page_size", DEFAULT_QUERY_PAGE_SIZE),
+        )
+        self.hash_scheme = hash_scheme
         #: Command line arguments.
         self.args = args
 
@@ -78,6 +94,13 @@ class IrodsCheckCommand(iRODSRetrieveCollection):
             default=DEFAULT_HASH_SCHEME,
             help="Hash scheme used to verify checksums, defaults to %s" % DEFAULT_HASH_SCHEME,
         )
+        parser.add_argument(
+            "--query-page-size",
+            type=int,
+            default=DEFAULT_QUERY_PAGE_SIZE,
+            help="Number of rows fetched per page of the catalog query, defaults to %s"
+            % DEFAULT_QUERY_PAGE_SIZE,
+        )
         parser.add_argument("irods_path", help="Path to an iRODS collection.")
 
     def check_args(self, _args):
@@ -117,87 +140,115 @@ class IrodsCheckCommand(iRODSRetrieveCollection):
 
         # Connect to iRODS
         with self.session as irods_session:
-            root_coll = irods_session.collections.get(self.args.irods_path)
-            logger.info("1 iRODS connection initialized")
-            # Get files and run checks
+            irods_path = self.args.irods_path.rstrip("/")
+            # fails early if the collection does not exist
+            irods_session.collections.get(irods_path)
             logger.info("Querying for data objects")
-            data_objs = self.get_data_objs(root_coll)
-            self.run_checks(data_objs)
+            # Stream files and run checks
+            self.run_checks(self.iter_data_objs(irods_session, irods_path))
             logger.info("All done")
 
-    def run_checks(self, data_objs: dict):
-        """Run checks on files, in parallel if enabled."""
-        num_files = len(data_objs["files"])
-        dsp_files = data_objs["files"]
-        if self.args.num_display_files > 0:
-            dsp_files = dsp_files[: self.args.num_display_files]
-        lst_files = "\n".join([f.path for f in dsp_files])
+    def iter_data_objs(
+        self, irods_session: iRODSSession, irods_path: str
+    ) -> typing.Iterator[tuple[str, list[iRODSQueryRow], typing.Optional[str]]]:
+        """Yield path, replicas and checksum file path (``None`` if missing) of all data objects.
+
+        The query is streamed, only the rows of one collection are held in memory at a time.
+        """
+        hash_ending = "." + self.args.hash_scheme.lower()
+        ignore_endings = tuple(
+            "." + k.lower() for k in HASH_SCHEMES if k != self.args.hash_scheme.upper()
+        )
+        rows = self._irods_query(irods_session, irods_path)
+        for _, coll_rows in itertools.groupby(rows, key=lambda row: row.collection):
+            files: dict[str, list[iRODSQueryRow]] = {}
+            checksums = set()
+            for row in coll_rows:
+                if row.path.endswith(hash_ending):
+                    checksums.add(row.path)
+                elif not row.path.endswith(ignore_endings):
+                    files.setdefault(row.path, []).append(row)
+            for path, replicas in files.items():
+                chk_path = path + hash_ending
+                yield path, replicas, chk_path if chk_path in checksums else None
+
+    def run_checks(
+        self, data_objs: typing.Iterable[tuple[str, list[iRODSQueryRow], typing.Optional[str]]]
+    ):
+        """Run checks on files, checksum files are read in parallel if enabled.
+
+        Each worker thread uses its own iRODS session.
+        """
+        data_objs = iter(data_objs)
+        num_display = max(self.args.num_display_files, 0)
+        first = list(itertools.islice(data_objs, num_display + 1))
+        lst_files = "\n".join(path for path, _, _ in first[:num_display])
         logger.info(
-            "Checking {} file{}{}:\n{}",
-            num_files,
-            "s" if num_files != 1 else "",
-            " (first {} shown)".format(self.args.num_display_files)
-            if self.args.num_display_files > 0 and num_files > self.args.num_display_files
-            else "",
+            "Checking files{}:\n{}",
+            " (first {} shown)".format(num_display) if len(first) > num_display else "",
             lst_files,
         )
 
-        # counter = Value(c_ulonglong, 0)
-        with tqdm.tqdm(total=num_files, unit="files", unit_scale=False) as t:
-            if self.args.num_parallel_tests < 2:
-                for obj in data_objs["files"]:
+        hash_scheme = self.args.hash_scheme.upper()
+        with (
+            iRODSSessionPool(self) as session_pool,
+            ThreadPool(processes=max(1, self.args.num_parallel_tests)) as pool,
+            tqdm.tqdm(unit="files", unit_scale=False) as t,
+        ):
+            read_checksum = functools.partial(read_checksum_file, session_pool, hash_scheme)
+            # batches bound the number of pending files, map keeps their order for the log output
+            for batch in itertools.batched(itertools.chain(first, data_objs), CHECK_BATCH_SIZE):
+                file_sums = pool.map(read_checksum, [chk_path for _, _, chk_path in batch])
+                for (path, replicas, chk_path), file_sum in zip(batch, file_sums, strict=True):
                     check_file(
-                        obj,
-                        data_objs["checksums"],
-                        self.args.req_num_reps,
-                        self.args.hash_scheme.upper(),
-                        t,
+                        path, replicas, chk_path, file_sum, self.args.req_num_reps, hash_scheme
                     )
-                return
-
-            pool = ThreadPool(processes=self.args.num_parallel_tests)
-            s_idx = 0
-            for obj in data_objs["files"]:
-                pool.apply_async(
-                    check_file,
-                    args=(
-                        obj,
-                        data_objs["checksums"],
-                        self.args.req_num_reps,
-                        self.args.hash_scheme.upper(),
-                        t,
-                    ),
-                )
-                if s_idx == self.args.num_parallel_tests - 1:
-                    s_idx = 0
-                else:
-                    s_idx += 1
-            pool.close()
-            pool.join()
+                    t.update()
 
 
-def check_file(data_obj: iRODSDataObject, checksums: dict, req_num_reps: int, hash_scheme: str, t):
-    """Perform checks for a single file."""
-    chk_obj = checksums.get(data_obj.path + "." + hash_scheme.lower())
+def read_checksum_file(
+    session_pool: iRODSSessionPool, hash_scheme: str, chk_path: typing.Optional[str]
+) -> typing.Optional[str]:
+    """Read the checksum from a checksum file with the session of the current thread."""
+    if chk_path is None:
+        return None
+    try:
+        with session_pool.get().data_objects.open(chk_path, "r") as f:
+            match = HASH_SCHEMES[hash_scheme]["regex"].search(f.read().decode("utf-8"))
+    except Exception as e:
+        logger.error(
+            "Could not read checksum file {}: {}", chk_path, session_pool.irods.get_irods_error(e)
+        )
+        return None
+    if not match:
+        logger.error("No {} checksum found in checksum file: {}", hash_scheme, chk_path)
+        return None
+    return match.group(0)
+
 
+def check_file(
+    path: str,
+    replicas: list[iRODSQueryRow],
+    chk_path: typing.Optional[str],
+    file_sum: typing.Optional[str],
+    req_num_reps: int,
+    hash_scheme: str,
+):
+    """Perform checks for a single file."""
     # 1) Checksum file exists?
-    if not chk_obj:
-        e_msg = f"No checksum file for: {data_obj.path}"
+    if not chk_path:
+        e_msg = f"No checksum file for: {path}"
         logger.error(e_msg)
 
     # 2) Checksums of all replicas consistent with checksum file?
-    else:
-        with chk_obj.open("r") as f:
-            file_sum = re.search(
-                HASH_SCHEMES[hash_scheme]["regex"], f.read().decode("utf-8")
-            ).group(0)
-        for replica in data_obj.replicas:
+    elif file_sum:
+        for replica in replicas:
             if replica.checksum != file_sum:
                 logger.error(
                     "iRODS metadata checksum not consistent with checksum file...\n"
                     "File: {}\n{} file checksum: {}\n"
                     "Metadata checksum: {}\nResource: {}",
-                    data_obj.path,
+                    path,
                     hash_scheme,
                     file_sum,
                     replica.checksum,
@@ -205,15 +256,10 @@ def check_file(data_obj: iRODSDataObject, checksums: dict, req_num_reps: int, ha
                 )
 
     # 3) Enough replicas?
-    if len(data_obj.replicas) < req_num_reps:
-        e_msg = (
-            f"Not enough replicas ({len(data_obj.replicas)} < "
-            f"{req_num_reps}) for file: {data_obj.path}"
-        )
+    if len(replicas) < req_num_reps:
+        e_msg = f"Not enough replicas ({len(replicas)} < {req_num_reps}) for file: {path}"
         logger.error(e_msg)
 
-    t.update()
-
 
 def setup_argparse(parser: argparse.ArgumentParser) -> None:
     """Setup argument parser for ``cubi-tk irods check``."""
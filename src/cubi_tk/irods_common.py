@@ -5,14 +5,13 @@ import os.path
 from pathlib import Path
 import re
 import shutil
+import threading
 from time import time
-from typing import Iterable, Literal, Union
+from typing import Iterable, Iterator, Literal
 import warnings
 
 import attrs
-from irods.collection import iRODSCollection
 from irods.column import Like
-from irods.data_object import iRODSDataObject
 from irods.keywords import FORCE_FLAG_KW
 from irods.models import Collection as CollectionModel
 from irods.models import DataObject as DataObjectModel
@@ -31,6 +30,9 @@ HASH_SCHEMES = {
 }
 DEFAULT_HASH_SCHEME = "MD5"
 
+#: Default number of rows fetched per page of a catalog query.
+DEFAULT_QUERY_PAGE_SIZE = 500
+
 
 @attrs.frozen(auto_attribs=True)
 class TransferJob:
@@ -56,6 +58,68 @@ class TransferJob:
             return -1
 
 
+@attrs.frozen(auto_attribs=True)
+class iRODSQueryRow:
+    """One replica of a data object as returned by a catalog query."""
+
+    #: Full path of the data object.
+    path: str
+    #: Size in bytes.
+    size: int
+    #: Checksum recorded in the catalog, if any.
+    checksum: str | None
+    #: Replica number.
+    replica_number: int
+    #: Name of the resource holding the replica.
+    resource_name: str
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def collection(self) -> str:
+        return self.path.rsplit("/", 1)[0]
+
+
+def iter_irods_query_rows(
+    session: iRODSSession, root_path: str, page_size: int = DEFAULT_QUERY_PAGE_SIZE
+) -> Iterator[iRODSQueryRow]:
+    """Yield all replicas of data objects recursively under the given iRODS path.
+
+    The rows are fetched in pages of ``page_size`` and ordered by collection and data object name,
+    so all replicas of a data object and all data objects of a collection are adjacent.
+    """
+    root_path = root_path.rstrip("/")
+    query = (
+        session.query(
+            CollectionModel.name,
+            DataObjectModel.name,
+            DataObjectModel.size,
+            DataObjectModel.checksum,
+            DataObjectModel.replica_number,
+            DataObjectModel.resource_name,
+        )
+        .filter(Like(CollectionModel.name, f"{root_path}%"))
+        .order_by(CollectionModel.name)
+        .order_by(DataObjectModel.name)
+        .limit(page_size)
+    )
+    for page in query.get_batches():
+        for res in page:
+            coll_name = res[CollectionModel.name]
+            # the LIKE filter also matches sibling collections sharing the prefix
+            if coll_name != root_path and not coll_name.startswith(root_path + "/"):
+                continue
+            yield iRODSQueryRow(
+                f"{coll_name}/{res[DataObjectModel.name]}",
+                int(res[DataObjectModel.size]),
+                res[DataObjectModel.checksum] or None,
+                int(res[DataObjectModel.replica_number]),
+                res[DataObjectModel.resource_name],
+            )
+
+
 class iRODSCommon:
     """
     Implementation of common iRODS utility functions.
@@ -139,15 +203,8 @@ class iRODSCommon:
         if self.irodsA_file_found is True and not overwrite:
             return
         try:
-            # read hashscheme and irodsA path from irods env file
-            irods_env_json = {}
-            with open(self.irods_env_path) as irods_env_data:
-                irods_env_json = json.load(irods_env_data)
-                self.hash_scheme = irods_env_json["irods_default_hash_scheme"]
-                if self.hash_scheme not in HASH_SCHEMES:
-                    logger.error(f"Hashscheme '{self.hash_scheme}' currently not supported")
-                    raise ValueError(f"Hashscheme '{self.hash_scheme}' currently not supported")
-                logger.debug(f"Hashscheme to use: {self.hash_scheme}")
+            # read hashscheme from irods env file
+            self._read_hash_scheme()
             # check date of last authorized irods_environment.json
             last_profile_path = self.irods_env_path.parent.joinpath("last_profile.json")
             last_profile_json = {}
@@ -195,15 +252,74 @@ class iRODSCommon:
             logger.error("Please check the irods_env_path")
             logger.error(e)
 
-    def irods_hash_scheme(self):
-        self._init_irods()
+    def _read_hash_scheme(self) -> str:
+        """Read the hash scheme from the iRODS environment file."""
+        with open(self.irods_env_path) as irods_env_data:
+            irods_env_json = json.load(irods_env_data)
+        self.hash_scheme = irods_env_json["irods_default_hash_scheme"]
+        if self.hash_scheme not in HASH_SCHEMES:
+            logger.error(f"Hashscheme '{self.hash_scheme}' currently not supported")
+            raise ValueError(f"Hashscheme '{self.hash_scheme}' currently not supported")
+        logger.debug(f"Hashscheme to use: {self.hash_scheme}")
         return self.hash_scheme
 
+    def irods_hash_scheme(self):
+        """Return the hash scheme of the iRODS environment.
+
+        Only reads the environment file, no connection is made and no login files are touched.
+        """
+        try:
+            return self._read_hash_scheme()
+        except FileNotFoundError as e:
+            logger.warning(f"Could not read hash scheme ({e}), using default {DEFAULT_HASH_SCHEME}")
+            return self.hash_scheme
+
     @property
     def session(self):
         return self._init_irods()
 
 
+class iRODSSessionPool:
+    """
+    One iRODS session per thread.
+
+    Sessions of python-irodsclient must not be shared between threads, worker threads get their
+    own session (and thus connection) on first use. All sessions are cleaned up on ``close()``.
+
+    :param irods: iRODSCommon instance used to create the sessions
+    :type irods: iRODSCommon
+    """
+
+    def __init__(self, irods: iRODSCommon):
+        self.irods = irods
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions: list[iRODSSession] = []
+
+    def get(self) -> iRODSSession:
+        """Return the session of the calling thread, create it if needed."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            # session creation may write login files, do not do it concurrently
+            with self._lock:
+                session = self.irods.session
+                self._sessions.append(session)
+            self._local.session = session
+        return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions:
+                session.cleanup()
+            self._sessions = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class iRODSTransfer(iRODSCommon):
     """
     Transfer files to iRODS.
@@ -246,22 +362,71 @@ class iRODSTransfer(iRODSCommon):
         with self.session as session:
             session.collections.create(collection)
 
-    def put(  # noqa: C901
-        self,
-        recursive: bool = False,
-        no_list: bool = False,
-        overwrite: Literal["sync", "never", "always", "ask"] = "sync",
-    ):
+    def confirm(self, no_list: bool = False) -> bool:
+        """Log the planned uploads and ask the user for confirmation.
+
+        Returns ``False`` for dry runs, raises ``UserCanceledException`` if the user declines.
+        """
         # Log all actions before doing them
         if self.dry_run or not no_list:
             logger.info("The following actions would be performed:")
             for _, job in enumerate(self.__jobs):
                 logger.info(f" - Upload file {job.path_local} to {job.path_remote}")
         if self.dry_run:
-            return None
+            return False
         if self.ask and not input("Is this OK? [y/N] ").lower().startswith("y"):  # pragma: no cover
             logger.info("Aborting at your request.")
             raise UserCanceledException
+        return True
+
+    def upload_options(
+        self,
+        session: iRODSSession,
+        job: TransferJob,
+        overwrite: Literal["sync", "never", "always", "ask"] = "sync",
+    ) -> dict | None:
+        """Keyword options for uploading ``job`` with ``session``, ``None`` if the remote file is kept."""
+        remote_exists = session.data_objects.exists(job.path_remote)
+        logger.debug(f"Remote file {job.path_remote} exists: {remote_exists}")
+        # never / file not present yet
+        if overwrite == "never" or not remote_exists:
+            kw_options = {}
+        elif overwrite == "always":
+            kw_options = {FORCE_FLAG_KW: None}
+        # ask: user decides for every file, with --yes default back to sync
+        elif self.ask and overwrite == "ask":
+            print("\n")
+            if (
+                input("This file is already present, should it be overwritten? [y/N] ")
+                .lower()
+                .startswith("y")
+            ):  # pragma: no cover
+                kw_options = {FORCE_FLAG_KW: None}
+                logger.info(f"Overwriting: {job.path_local}")
+            else:
+                kw_options = {}
+                logger.info(f"NOT overwriting: {job.path_local}")
+        # sync (or --yes and 'ask'): Check if file size is identical, if yes skip upload
+        else:
+            obj = session.data_objects.get(job.path_remote)
+            if obj.size != job.bytes:
+                kw_options = {FORCE_FLAG_KW: None}
+            else:
+                kw_options = {}
+
+        # kw_options will be {} if no overwrite should be done
+        if remote_exists and not kw_options:
+            return None
+        return kw_options
+
+    def put(
+        self,
+        recursive: bool = False,
+        no_list: bool = False,
+        overwrite: Literal["sync", "never", "always", "ask"] = "sync",
+    ):
+        if not self.confirm(no_list):
+            return None
 
         if not self.ask and overwrite == "ask":
             logger.warning(
@@ -279,8 +444,6 @@ class iRODSTransfer(iRODSCommon):
             ) as t,
             tqdm(total=0, position=0, bar_format="{desc}", leave=False) as file_log,
         ):
-            kw_incl_overwrite = {FORCE_FLAG_KW: None}
-            kw_excl_overwrite = {}
             for n, job in enumerate(self.__jobs):
                 file_log.set_description_str(
                     f"File [{n + 1}/{len(self.__jobs)}]: {Path(job.path_local).name}"
@@ -290,38 +453,8 @@ class iRODSTransfer(iRODSCommon):
                         if recursive:
                             self._create_collections(job)
 
-                        remote_exists = session.data_objects.exists(job.path_remote)
-                        logger.debug(f"Remote file {job.path_remote} exists: {remote_exists}")
-                        # never / file not present yet
-                        if overwrite == "never" or not remote_exists:
-                            kw_options = kw_excl_overwrite
-                        elif overwrite == "always":
-                            kw_options = kw_incl_overwrite
-                        # ask: user decides for every file, with --yes default back to sync
-                        elif self.ask and overwrite == "ask":
-                            print("\n")
-                            if (
-                                input(
-                                    "This file is already present, should it be overwritten? [y/N] "
-                                )
-                                .lower()
-                                .startswith("y")
-                            ):  # pragma: no cover
-                                kw_options = kw_incl_overwrite
-                                logger.info(f"Overwriting: {job.path_local}")
-                            else:
-                                kw_options = kw_excl_overwrite
-                                logger.info(f"NOT overwriting: {job.path_local}")
-                        # sync (or --yes and 'ask'): Check if file size is identical, if yes skip upload
-                        else:
-                            obj = session.data_objects.get(job.path_remote)
-                            if obj.size != job.bytes:
-                                kw_options = kw_incl_overwrite
-                            else:
-                                kw_options = kw_excl_overwrite
-
-                        # kw_options will be {} if no overwrite should be done
-                        if remote_exists and not kw_options:
+                        kw_options = self.upload_options(session, job, overwrite)
+                        if kw_options is None:
                             t.update(job.bytes)
                             continue
                         session.data_objects.put(job.path_local, job.path_remote, **kw_options)
@@ -332,6 +465,11 @@ class iRODSTransfer(iRODSCommon):
             t.clear()
             logger.info("File transfer complete.")
 
+    def remote_sizes(self, root_path: str) -> dict[str, int]:
+        """Sizes of all data objects below ``root_path``, fetched with one paged catalog query."""
+        with self.session as session:
+            return {row.path: row.size for row in iter_irods_query_rows(session, root_path)}
+
     def chksum(self):
         """Compute remote checksums for all jobs."""
         common_prefix = os.path.commonpath(self.__destinations)
@@ -403,9 +541,12 @@ class iRODSTransfer(iRODSCommon):
 class iRODSRetrieveCollection(iRODSCommon):
     """Class retrieves iRODS Collection associated with Assay"""
 
-    def __init__(self, **kwargs):
+    def __init__(self, query_page_size: int = DEFAULT_QUERY_PAGE_SIZE, **kwargs):
         """Constructor.
 
+        :param query_page_size: Number of rows fetched per page of catalog queries.
+        :type query_page_size: int, optional
+
         :param ask: Confirm with user before certain actions.
         :type ask: bool, optional
 
@@ -413,19 +554,20 @@ class iRODSRetrieveCollection(iRODSCommon):
         :type irods_env_path: pathlib.Path, optional
         """
         super().__init__(**kwargs)
+        self.query_page_size = query_page_size
         warnings.warn(
             "iRODSRetrieveCollection will be deprecated. Please use SodarAPI.get_samplesheet_file_list instead.",
             DeprecationWarning,
             stacklevel=2,
         )
 
-    def retrieve_irods_data_objects(self, irods_path: str) -> dict[str, list[iRODSDataObject]]:
+    def retrieve_irods_data_objects(self, irods_path: str) -> dict[str, list[iRODSQueryRow]]:
         """Retrieve data objects from iRODS.
 
         :param irods_path: iRODS path.
 
         :return: Returns dictionary representation of iRODS collection information. Key: File name in iRODS (str);
-        Value: list of IrodsDataObject (native python-irodsclient object).
+        Value: list of iRODSQueryRow, one per replica. Checksum files are not included.
         """
 
         # Connect to iRODS
@@ -437,8 +579,13 @@ class iRODSRetrieveCollection(iRODSCommon):
                 logger.info("Querying for data objects")
 
                 if root_coll is not None:
-                    irods_data_objs = self._irods_query(session, root_coll)
-                    irods_obj_dict = self.parse_irods_collection(irods_data_objs)
+                    checksum_endings = tuple("." + k.lower() for k in HASH_SCHEMES)
+                    rows = (
+                        row
+                        for row in self._irods_query(session, root_coll.path)
+                        if not row.path.endswith(checksum_endings)
+                    )
+                    irods_obj_dict = self.parse_irods_collection({"files": rows})
                     return irods_obj_dict
 
             except Exception as e:  # pragma: no cover
@@ -447,45 +594,20 @@ class iRODSRetrieveCollection(iRODSCommon):
 
         return {}
 
-    def _irods_query(
-        self,
-        session: iRODSSession,
-        root_coll: iRODSCollection,
-    ) -> dict[str, Union[dict[str, iRODSDataObject], list[iRODSDataObject]]]:
-        """Get data objects recursively under the given iRODS path."""
-
-        ignore_schemes = [k.lower() for k in HASH_SCHEMES if k != self.hash_scheme.upper()]
-
-        query = session.query(DataObjectModel, CollectionModel).filter(
-            Like(CollectionModel.name, f"{root_coll.path}%")
-        )
-
-        data_objs = {"files": [], "checksums": {}}
-        for res in query:
-            # If the 'res' dict is not split into Colllection&Object the resulting IrodsDataObject is not fully functional,
-            # likely because a name/path/... attribute is overwritten somewhere
-            magic_icat_id_separator = 500
-            coll_res = {k: v for k, v in res.items() if k.icat_id >= magic_icat_id_separator}
-            obj_res = {k: v for k, v in res.items() if k.icat_id < magic_icat_id_separator}
-            coll = iRODSCollection(root_coll.manager, coll_res)
-            obj = iRODSDataObject(session.data_objects, parent=coll, results=[obj_res])
-
-            if obj.path.endswith("." + self.hash_scheme.lower()):
-                data_objs["checksums"][obj.path] = obj
-            elif obj.path.split(".")[-1] not in ignore_schemes:
-                data_objs["files"].append(obj)
-
-        return data_objs
+    def _irods_query(self, session: iRODSSession, root_path: str) -> Iterator[iRODSQueryRow]:
+        """Yield all replicas of data objects recursively under the given iRODS path, see
+        ``iter_irods_query_rows()``."""
+        return iter_irods_query_rows(session, root_path, self.query_page_size)
 
     @staticmethod
-    def parse_irods_collection(irods_data_objs) -> dict[str, list[iRODSDataObject]]:
+    def parse_irods_collection(irods_data_objs) -> dict[str, list[iRODSQueryRow]]:
         """Parse iRODS collection
 
-        :param irods_data_objs: iRODS collection.
+        :param irods_data_objs: iRODS collection, iterable of rows in ``files``.
         :type irods_data_objs: dict
 
         :return: Returns dictionary representation of iRODS collection information. Key: File name in iRODS (str);
-        Value: list of IrodsDataObject (native python-irodsclient object).
+        Value: list of iRODSQueryRow.
         """
         # Initialise variables
         output_dict = defaultdict(list)
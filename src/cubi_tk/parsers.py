@@ -4,7 +4,9 @@ import os
 
 from loguru import logger
 
-from cubi_tk.sodar_api import GLOBAL_CONFIG_PATH
+from cubi_tk.sodar_api import DEFAULT_PARALLEL_PROJECTS, GLOBAL_CONFIG_PATH
+from cubi_tk.sodar_cache import DEFAULT_CACHE_TTL
+from cubi_tk.sodar_inventory import DEFAULT_INVENTORY_MAX_AGE
 
 
 def print_args(args: argparse.Namespace):
@@ -54,6 +56,48 @@ def get_sodar_parser(
         "--sodar-api-token",
         help="SODAR API token to use.",
     )
+    sodar_group.add_argument(
+        "--trace-http",
+        default=None,
+        metavar="FILE",
+        help="Append timing, size, status and retries of each SODAR API request as JSON lines to "
+        "FILE. A per-endpoint summary is logged with --verbose.",
+    )
+    cache_group = sodar_config_parser.add_argument_group("Sodar Response Cache")
+    cache_group.add_argument(
+        "--no-cache",
+        default=False,
+        action="store_true",
+        help="Do not use the on-disk cache for sample sheet exports and investigation information.",
+    )
+    cache_group.add_argument(
+        "--refresh",
+        dest="refresh_cache",
+        default=False,
+        action="store_true",
+        help="Ignore existing entries of the on-disk cache and download fresh copies.",
+    )
+    cache_group.add_argument(
+        "--cache-ttl",
+        default=DEFAULT_CACHE_TTL,
+        type=int,
+        help="Seconds for which cached responses without ETag/Last-Modified header are re-used "
+        "without asking SODAR (default: %(default)s).",
+    )
+    cache_group.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory of the on-disk cache (default: $XDG_CACHE_HOME/cubi-tk or ~/.cache/cubi-tk).",
+    )
+    cache_group.add_argument(
+        "--inventory-max-age",
+        default=DEFAULT_INVENTORY_MAX_AGE,
+        type=float,
+        help="Answer from the local inventory of iRODS files if the project was listed at most this "
+        "many seconds ago, instead of listing it again (default: %(default)s, use 'inf' to never "
+        "list a project again unless --refresh is given). The inventory is only kept if this is "
+        "greater than 0.",
+    )
     if with_dest:
         sodar_config_parser.add_argument(
             dest_string,
@@ -69,6 +113,28 @@ def get_sodar_parser(
     return sodar_config_parser
 
 
+sodar_multi_project_parser = argparse.ArgumentParser(
+    description="The parser for commands that can run on multiple SODAR projects", add_help=False
+)
+sodar_multi_project_group = sodar_multi_project_parser.add_argument_group("Multi-project Options")
+sodar_multi_project_group.add_argument(
+    "--projects-file",
+    default=None,
+    help="File with additional SODAR project UUIDs (one per line) to process together with the "
+    "given project.",
+)
+sodar_multi_project_group.add_argument(
+    "--parallel-projects",
+    default=DEFAULT_PARALLEL_PROJECTS,
+    type=int,
+    help="Number of projects to query concurrently (default: %(default)s).",
+)
+
+
+def get_sodar_multi_project_parser():
+    return sodar_multi_project_parser
+
+
 # Defining destionation via parent-parses locks it as the first positional arguemtn, which is not backwards compatible
 # with all previous commands
 def get_sodar_ingest_parser(include_dest=True):
@@ -121,11 +187,31 @@ def get_sodar_ingest_parser(include_dest=True):
         type=int,
         help="Number of threas to use for checksum calculation.",
     )
+    ingest_group.add_argument(
+        "--parallel-upload-jobs",
+        default=1,
+        type=int,
+        help="Number of threads (each with its own iRODS connection) uploading files while "
+        "checksums are computed. Default: %(default)s",
+    )
     ingest_group.add_argument(
         "--recompute-checksums",
         action="store_true",
         help="Recalculate local checksums, even if already present",
     )
+    ingest_group.add_argument(
+        "--plan-only",
+        action="store_true",
+        help="Only show which files are new, changed (different size) or identical compared to the "
+        "landing zone, no checksums are computed and nothing is uploaded. Requires an existing "
+        "landing zone, none is created.",
+    )
+    ingest_group.add_argument(
+        "--plan-against-project",
+        action="store_true",
+        help="Also compare against files already moved to the assay in the project, such files are "
+        "not uploaded again if their size is identical.",
+    )
 
     irods_group = sodar_ingest_parser.add_argument_group("iRODS Connection Options")
     irods_group.add_argument(
@@ -11,7 +11,8 @@ import yaml
 
 from cubi_tk.parsers import print_args
 
-from ..irods.check import IrodsCheckCommand
+from ..irods.check import NUM_DISPLAY_FILES, IrodsCheckCommand
+from ..irods_common import DEFAULT_HASH_SCHEME, DEFAULT_QUERY_PAGE_SIZE, HASH_SCHEMES
 
 MIN_NUM_REPLICAS = 2
 NUM_PARALLEL_TESTS = 8
@@ -30,6 +31,7 @@ class SeasnapCheckIrodsCommand(IrodsCheckCommand):
 
         parser.add_argument(
             "--num-replicas",
+            dest="req_num_reps",
             type=int,
             default=MIN_NUM_REPLICAS,
             help="Minimum number of replicas, defaults to %s" % MIN_NUM_REPLICAS,
@@ -42,6 +44,28 @@ class SeasnapCheckIrodsCommand(IrodsCheckCommand):
             help="Number of parallel tests, defaults to %s" % NUM_PARALLEL_TESTS,
         )
 
+        parser.add_argument(
+            "--num-display-files",
+            type=int,
+            default=NUM_DISPLAY_FILES,
+            help="Number of files listed when checking, defaults to %s" % NUM_DISPLAY_FILES,
+        )
+
+        parser.add_argument(
+            "--hash-scheme",
+            type=str,
+            default=DEFAULT_HASH_SCHEME,
+            help="Hash scheme used to verify checksums, defaults to %s" % DEFAULT_HASH_SCHEME,
+        )
+
+        parser.add_argument(
+            "--query-page-size",
+            type=int,
+            default=DEFAULT_QUERY_PAGE_SIZE,
+            help="Number of rows fetched per page of the catalog query, defaults to %s"
+            % DEFAULT_QUERY_PAGE_SIZE,
+        )
+
         parser.add_argument(
             "--yes",
             default=False,
@@ -82,9 +106,17 @@ class SeasnapCheckIrodsCommand(IrodsCheckCommand):
         print_args(self.args)
 
         # --- get lists
-        # files on SODAR
-        files = self.get_data_objs()
-        files_rel = [f.replace(self.args.irods_path + "/", "") for f in files["files"]]
+        # files on SODAR, only their relative paths are kept
+        irods_path = self.args.irods_path.rstrip("/")
+        checksum_endings = tuple("." + k.lower() for k in HASH_SCHEMES)
+        with self.session as irods_session:
+            files_rel = sorted(
+                {
+                    row.path[len(irods_path) + 1 :]
+                    for row in self._irods_query(irods_session, irods_path)
+                    if not row.path.endswith(checksum_endings)
+                }
+            )
         logger.info("Files on SODAR (first 20): {}", ", ".join(files_rel[:19]))
 
         # samples in project
@@ -123,7 +155,8 @@ class SeasnapCheckIrodsCommand(IrodsCheckCommand):
                 return None
 
         # generic tests (md5 sums, metadata, #replicas)
-        self.run_checks(files)
+        with self.session as irods_session:
+            self.run_checks(self.iter_data_objs(irods_session, irods_path))
 
         logger.info("All done")
         return res
@@ -7,8 +7,10 @@ of the checksum.  Otherwise, just checks for presence of files (for now), the ra
 
 import argparse
 from collections import defaultdict
+from multiprocessing.pool import ThreadPool
 import os
 from pathlib import Path
+import sys
 import typing
 
 from biomedsheets import shortcuts
@@ -16,6 +18,15 @@ from loguru import logger
 
 from cubi_tk.parsers import print_args
 
+from ..check_report import (
+    REPORT_FORMATS,
+    ExternalSorter,
+    ReportRecord,
+    ReportWriter,
+    open_report_output,
+    write_text_section,
+)
+from ..common import DEFAULT_SCAN_THREADS, scandir_walk
 from ..sodar_common import RetrieveSodarCollection
 from .common import get_biomedsheet_path, load_sheet_tsv
 
@@ -73,14 +84,61 @@ class FindFilesCommon:
         return library_names
 
     @staticmethod
-    def iter_dirs(path):
-        """Directory iterator.
-
-        From Stack Overflow: https://stackoverflow.com/questions/57910227
+    def iter_library_dirs(paths, library_names, threads=DEFAULT_SCAN_THREADS):  # noqa: C901
+        """Find directories associated with a library in a single walk over all ``paths``.
+
+        A directory belongs to the first library (in order of ``library_names``) whose name is
+        contained in the directory's resolved path. Like with ``Path.rglob()``, symlinks to
+        directories are reported but not entered. Each directory is resolved at most once
+        (resolved paths are derived from the parent directory unless the directory is a symlink).
+        Library names are looked up per path component and the result for each distinct component
+        is memoized, so the cost does not grow with directories times libraries.
+
+        :return: Yields tuples of root path (one of ``paths``), library name, directory path and
+        list of names of the files in the directory.
         """
-        for file_or_directory in path.rglob("*"):
-            if file_or_directory.is_dir():
-                yield file_or_directory
+        library_rank = {}
+        for rank, library_name in enumerate(library_names):
+            library_rank.setdefault(library_name, rank)
+        component_libraries = {}
+
+        def find_library(resolved_path):
+            best = None
+            for component in resolved_path.split(os.sep):
+                if component not in component_libraries:
+                    component_libraries[component] = [
+                        lib for lib in library_rank if lib in component
+                    ]
+                for lib in component_libraries[component]:
+                    if best is None or library_rank[lib] < library_rank[best]:
+                        best = lib
+            return best
+
+        root_paths = {os.fspath(path) for path in paths}
+        roots = {root: root for root in root_paths}
+        resolved = {root: os.path.realpath(root) for root in roots}
+        for directory, entries in scandir_walk(list(roots), threads=threads):
+            # walked directories are never symlinks, parents are always walked before children
+            if directory not in resolved:
+                parent, name = os.path.split(directory)
+                resolved[directory] = os.path.join(resolved[parent], name)
+                roots[directory] = roots[parent]
+            candidates = []
+            if directory not in root_paths:
+                candidates.append(
+                    (directory, resolved[directory], [e.name for e in entries if e.is_file()])
+                )
+            # like `Path.rglob()`, symlinked directories are reported but not entered
+            for entry in entries:
+                if entry.is_symlink() and entry.is_dir():
+                    candidates.append((entry.path, os.path.realpath(entry.path), None))
+            for path, resolved_path, file_names in candidates:
+                library_name = find_library(resolved_path)
+                if library_name is None:
+                    continue
+                if file_names is None:
+                    file_names = [scanned.name for scanned in os.scandir(path) if scanned.is_file()]
+                yield roots[directory], library_name, path, file_names
 
 
 class FindLocalRawdataFiles(FindFilesCommon):
@@ -117,24 +175,14 @@ class FindLocalRawdataFiles(FindFilesCommon):
         library_names = self.parse_sample_sheet()
 
         # Get directory structure
-        for i_directory in self.iter_dirs(self.inlink_dir_path):
-            # Find library name if any
-            library_name = None
-            for lib in library_names:
-                if lib in str(i_directory.resolve()):
-                    library_name = lib
-                    break
-            if not library_name:
-                continue
-            # Update dictionary
-            i_file_list = [
-                scanned.name for scanned in os.scandir(i_directory) if scanned.is_file()
-            ]  # filter files
+        for _, library_name, i_directory, i_file_list in self.iter_library_dirs(
+            [self.inlink_dir_path], library_names
+        ):
             i_file_list = [
                 file for file in i_file_list if not file.startswith(".")
             ]  # filter for example '.done'
             if len(i_file_list) > 0:
-                library_local_files_dict = {str(i_directory): i_file_list}
+                library_local_files_dict = {i_directory: i_file_list}
                 rawdata_structure_dict[library_name].update(library_local_files_dict)
 
         logger.info("... done with raw data files search.")
@@ -170,7 +218,6 @@ class FindLocalFiles(FindFilesCommon):
         with file structure per library/sample.
         """
         logger.info("Starting local files search ...")
-        logger.info("...this may take several minutes...")
 
         # Initialise variables
         canonical_paths = {}
@@ -192,27 +239,16 @@ class FindLocalFiles(FindFilesCommon):
                     f"Canonical path for step '{step}' does not exist. Expected: {str(tmp_path)}"
                 )
 
-        # Iterate over all directories
-        for step_check in canonical_paths:
-            c_path = canonical_paths.get(step_check)
-            for i_directory in self.iter_dirs(c_path):
-                # Find library name if any
-                library_name = None
-                for lib in library_names:
-                    if lib in str(i_directory.resolve()):
-                        library_name = lib
-                        break
-                if not library_name:
-                    continue
-                # Update dictionary
-                i_file_list = [
-                    scanned.name for scanned in os.scandir(i_directory) if scanned.is_file()
-                ]
-                if len(i_file_list) > 0:
-                    library_local_files_dict = {str(i_directory): i_file_list}
-                    step_to_file_structure_dict[step_check][library_name].update(
-                        library_local_files_dict
-                    )
+        # Iterate over all directories of all steps at once
+        root_to_step = {str(c_path): step for step, c_path in canonical_paths.items()}
+        for root, library_name, i_directory, i_file_list in self.iter_library_dirs(
+            root_to_step, library_names
+        ):
+            if len(i_file_list) > 0:
+                library_local_files_dict = {i_directory: i_file_list}
+                step_to_file_structure_dict[root_to_step[root]][library_name].update(
+                    library_local_files_dict
+                )
 
         logger.info("... done with local files search.")
 
@@ -223,7 +259,15 @@ class FindLocalFiles(FindFilesCommon):
 class Checker:
     """Class with common checker methods."""
 
-    def __init__(self, local_files_dict, remote_files_dict, check_checksum=False):
+    def __init__(
+        self,
+        local_files_dict,
+        remote_files_dict,
+        check_checksum=False,
+        report_writer=None,
+        irods_basepath=None,
+        report_stream=None,
+    ):
         """Constructor.
 
         :param local_files_dict: Dictionary with local files and directories structure for all libraries in sample
@@ -235,10 +279,21 @@ class Checker:
         :type remote_files_dict: dict
 
         :param check_checksum: Flag to indicate if local checksum files should be compared with
+
+        :param report_writer: ReportWriter for tsv/jsonl reports, findings are logged if not given.
+        :type report_writer: cubi_tk.check_report.ReportWriter
+
+        :param irods_basepath: Assay path in iRODS, used to match checksums by path.
+        :type irods_basepath: str
+
+        :param report_stream: Output stream of text reports, defaults to stdout.
         """
         self.local_files_dict = local_files_dict
         self.remote_files_dict = remote_files_dict
         self.check_checksum = check_checksum
+        self.report_writer = report_writer
+        self.irods_basepath = irods_basepath
+        self.report_stream = report_stream
 
     def coordinate_run(self, check_name):
         """Coordinates the execution of methods necessary to check step files.
@@ -279,43 +334,147 @@ class Checker:
         self.report_multiple_file_versions_in_sodar(remote_dict=subset_remote_files_dict)
         if self.check_checksum:  # checksum check report
             okay_list, different_list = self.compare_checksum_files(
-                remote_dict=subset_remote_files_dict, in_both_set=in_both_set
+                remote_dict=subset_remote_files_dict,
+                in_both_set=in_both_set,
+                check_name=check_name,
+                local_libraries={
+                    directory: library_name
+                    for library_name, directories in self.local_files_dict.items()
+                    for directory in directories
+                },
+                irods_basepath=self.irods_basepath,
+            )
+            if self.report_writer:
+                self.write_records_checksum(
+                    self.report_writer, check_name, okay_list, different_list
+                )
+            else:
+                self.report_findings_checksum(okay_list, different_list, self.report_stream)
+        elif self.report_writer:  # structured report
+            self.write_records(
+                self.report_writer,
+                check_name,
+                both_locations=in_both_set,
+                only_local=local_only_set,
+                only_remote=remote_only_set,
             )
-            self.report_findings_checksum(okay_list, different_list)
         else:  # simple report
             self.report_findings(
-                both_locations=in_both_set, only_local=local_only_set, only_remote=remote_only_set
+                both_locations=in_both_set,
+                only_local=local_only_set,
+                only_remote=remote_only_set,
+                stream=self.report_stream,
             )
 
         # Return all okay
         return True
 
     @staticmethod
-    def compare_checksum_files(remote_dict, in_both_set):
+    def read_local_checksum(path):
+        """Read checksum from local checksum file ``path``, ``None`` if the file does not exist."""
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                # Expected format example:
+                # `459db8f7cb0d3a23a38fdc98286a9a9b  out.vcf.gz`
+                return f.readline().split(" ")[0].strip()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def remote_checksum_key(path, step, irods_basepath=None):
+        """Key of a remote file for checksum comparison: library, step and path below the date
+        directory (remote files are stored as ``<library>/<step>/<date>/...`` in the assay).
+
+        :return: Tuple of library name, step and relative path; ``None`` if ``path`` does not follow
+        the layout.
+        """
+        if irods_basepath:
+            path = os.path.relpath(path, irods_basepath)
+        parts = path.split("/")
+        for i in range(1, len(parts) - 2):
+            if parts[i] == step:
+                return parts[i - 1], step, "/".join(parts[i + 2 :])
+        return None
+
+    @staticmethod
+    def local_checksum_key(path, library_name, step):
+        """Key of a local file for checksum comparison: library, step and path below the first
+        directory named after the library (e.g. ``ngs_mapping/output/<mapper>.<library>``).
+
+        :return: Tuple of library name, step and relative path; ``None`` if no directory in ``path``
+        is named after the library.
+        """
+        parts = path.split(os.sep)
+        for i, part in enumerate(parts[:-1]):
+            if library_name in part:
+                return library_name, step, "/".join(parts[i + 1 :])
+        return None
+
+    @classmethod
+    def compare_checksum_files(
+        cls,
+        remote_dict,
+        in_both_set,
+        check_name,
+        local_libraries,
+        irods_basepath=None,
+        threads=DEFAULT_SCAN_THREADS,
+    ):
         """Compares remote and local checksum files.
 
-        :param remote_dict: Dictionary with remote file structure. Key: remote directory path; Value: list of file
-        names.
+        Remote checksums are taken from the file list (``IrodsDataObject.checksum``) and indexed by
+        library, step and path relative to the assay once. Local checksum files are read with up to
+        ``threads`` threads.
+
+        :param remote_dict: Dictionary with remote file structure. Key: file name; Value: list of
+        IrodsDataObject.
         :type remote_dict: dict
 
         :param in_both_set: Set with files found both locally and in remote directory.
         :type in_both_set: set
 
-        :return: Returns tuple with: set of files that are present with same checksum locally and remote (local path);
-        list of tuple of files with different checksum (local , remote path); and dictionary of files with the exact
-        same checksum (excluding empty files) - key: checksum; values: list of remote paths.
+        :param check_name: Step name being checked.
+        :type check_name: str
+
+        :param local_libraries: Dictionary with local directory paths as keys and library names as values.
+        :type local_libraries: dict
+
+        :param irods_basepath: Assay path in iRODS.
+        :type irods_basepath: str
+
+        :return: Returns tuple with: list of files that are present with same checksum locally and
+        remote (local path); and list of tuple of files with different checksum (local, remote path).
         """
         # Initialise variables
         same_checksum_list = []
         different_checksum_list = []
+        local_paths = sorted(in_both_set)
+
+        # Index remote checksums by library, step and path below the date directory
+        remote_index = defaultdict(list)
+        for irods_list in remote_dict.values():
+            for irods_dat in irods_list:
+                key = cls.remote_checksum_key(irods_dat.path, check_name, irods_basepath)
+                if key is not None:
+                    remote_index[key].append(irods_dat)
+
+        # Read all local checksum files at once
+        checksum_paths = [path + ".md5" for path in local_paths]
+        if threads > 1 and len(checksum_paths) > 1:
+            pool = ThreadPool(processes=threads)
+            try:
+                local_checksums = pool.map(cls.read_local_checksum, checksum_paths)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            local_checksums = [cls.read_local_checksum(path) for path in checksum_paths]
 
-        # Define expected MD5 files - report files where missing
-        all_expected_local_checksums = [file_ + ".md5" for file_ in in_both_set]
-        all_local_checksums = [
-            file_ for file_ in all_expected_local_checksums if os.path.isfile(file_)
+        missing_list = [
+            path
+            for path, checksum in zip(checksum_paths, local_checksums, strict=True)
+            if checksum is None
         ]
-        missing_list = set(all_expected_local_checksums) - set(all_local_checksums)
-
         if len(missing_list) > 0:
             missing_str = "\n".join(missing_list)
             logger.warning(
@@ -324,34 +483,16 @@ class Checker:
             )
 
         # Compare
-        for md5_file in all_local_checksums:
-            file_name = os.path.basename(md5_file)
-            original_file_name = file_name.replace(".md5", "")
-            # Read local MD5
-            with open(md5_file, "r", encoding="utf8") as f:
-                local_md5 = f.readline()
-                # Expected format example:
-                # `459db8f7cb0d3a23a38fdc98286a9a9b  out.vcf.gz`
-                local_md5 = local_md5.split(" ")[0]
-            # Compare to remote MD5
-            for irods_dat in remote_dict.get(original_file_name):
-                if local_md5 != irods_dat.FILE_MD5SUM:
-                    different_checksum_list.append((md5_file.replace(".md5", ""), irods_dat.path))
+        for local_path, local_md5 in zip(local_paths, local_checksums, strict=True):
+            if local_md5 is None:
+                continue
+            library_name = local_libraries.get(os.path.dirname(local_path))
+            key = library_name and cls.local_checksum_key(local_path, library_name, check_name)
+            for irods_dat in remote_index.get(key, ()):
+                if local_md5 != irods_dat.checksum:
+                    different_checksum_list.append((local_path, irods_dat.path))
                 else:
-                    same_checksum_list.append(md5_file.replace(".md5", ""))
-                # BONUS - check remote replicas
-                if not all(
-                    (
-                        replica_md5 == irods_dat.FILE_MD5SUM
-                        for replica_md5 in irods_dat.REPLICAS_MD5SUM
-                    )
-                ):
-                    logger.error(
-                        f"iRODS metadata checksum not consistent with checksum file...\n"
-                        f"File: {irods_dat.path}\n"
-                        f"File checksum: {irods_dat.FILE_MD5SUM}\n"
-                        f"Metadata checksum: {', '.join(irods_dat.REPLICAS_MD5SUM)}\n"
-                    )
+                    same_checksum_list.append(local_path)
 
         return same_checksum_list, different_checksum_list
 
@@ -433,7 +574,7 @@ class Checker:
             logger.warning(f"Files with different versions in SODAR:{pairs_str}")
 
     @staticmethod
-    def report_findings_checksum(okay_list, different_list):
+    def report_findings_checksum(okay_list, different_list, stream=None):
         """Report MD5 findings.
 
         :param okay_list: Set with all files with the exact same MD5 value - local path.
@@ -442,21 +583,97 @@ class Checker:
         :param different_list: List of tuples with files that are different locally
         and remotely - (local path, remote path).
         :type different_list: list
+
+        :param stream: Output stream, defaults to stdout.
         """
-        # Report same md5
-        if len(okay_list) > 0:
-            okay_str = "\n".join(sorted(okay_list))
-            logger.info(f"Files with SAME MD5 locally and remotely:\n{okay_str}")
-
-        # Report different md5
-        if len(different_list) > 0:
-            different_str = "\n".join(
-                ["; i:".join(pair) for pair in sorted(different_list, key=lambda tup: tup[0])]
+        same = ExternalSorter()
+        for path in okay_list:
+            same.add(ReportRecord("same-checksum", os.path.dirname(path), os.path.basename(path)))
+        write_text_section(same, "Files with SAME MD5 locally and remotely:", stream=stream)
+
+        different = ExternalSorter()
+        for path, remote_path in different_list:
+            different.add(
+                ReportRecord(
+                    "different-checksum",
+                    os.path.dirname(path),
+                    os.path.basename(path),
+                    detail="i:" + remote_path,
+                )
             )
-            logger.warning(f"Files with DIFFERENT MD5 locally and remotely:\n{different_str}")
+        write_text_section(
+            different, "Files with DIFFERENT MD5 locally and remotely:", stream=stream
+        )
+        if different_list:
+            logger.warning("{} files with DIFFERENT MD5 locally and remotely", len(different_list))
 
     @staticmethod
-    def report_findings(both_locations, only_remote, only_local):
+    def write_records_checksum(report_writer, check_name, okay_list, different_list):
+        """Write MD5 findings as records.
+
+        :param report_writer: Writer for the records.
+        :type report_writer: cubi_tk.check_report.ReportWriter
+
+        :param check_name: Step name being checked.
+        :type check_name: str
+
+        :param okay_list: Set with all files with the exact same MD5 value - local path.
+        :type okay_list: list
+
+        :param different_list: List of tuples with files that are different locally
+        and remotely - (local path, remote path).
+        :type different_list: list
+        """
+        for path in sorted(okay_list):
+            report_writer.write(
+                ReportRecord(
+                    "same-checksum", os.path.dirname(path), os.path.basename(path), step=check_name
+                )
+            )
+        for path, remote_path in sorted(different_list, key=lambda tup: tup[0]):
+            report_writer.write(
+                ReportRecord(
+                    "different-checksum",
+                    os.path.dirname(path),
+                    os.path.basename(path),
+                    step=check_name,
+                    detail=remote_path,
+                )
+            )
+
+    @staticmethod
+    def write_records(report_writer, check_name, both_locations, only_remote, only_local):
+        """Write findings as records.
+
+        :param report_writer: Writer for the records.
+        :type report_writer: cubi_tk.check_report.ReportWriter
+
+        :param check_name: Step name being checked.
+        :type check_name: str
+
+        :param both_locations: Set with files found both locally and in remote directory.
+        :type both_locations: set
+
+        :param only_remote: Set with files found only in the remote directory.
+        :type only_remote: set
+
+        :param only_local: Set with files found only in the local directory.
+        :type only_local: set
+        """
+        for category, paths in (
+            ("both", both_locations),
+            ("remote-only", only_remote),
+            ("local-only", only_local),
+        ):
+            for path in sorted(paths):
+                report_writer.write(
+                    ReportRecord(
+                        category, os.path.dirname(path), os.path.basename(path), step=check_name
+                    )
+                )
+
+    @staticmethod
+    def report_findings(both_locations, only_remote, only_local, stream=None):
         """Report findings
 
         :param both_locations: Set with files found both locally and in remote directory.
@@ -467,26 +684,32 @@ class Checker:
 
         :param only_local: Set with files found only in the local directory.
         :type only_local: set
+
+        :param stream: Output stream, defaults to stdout.
         """
-        # Convert entries to text
-        in_both_str = "\n".join(sorted(both_locations))
-        remote_only_str = "\n".join(sorted(only_remote))
-        local_only_str = "\n".join(sorted(only_local))
-        dashed_line = "-" * 25
-
-        # Log
-        if len(both_locations) > 0:
-            logger.info(f"Files found BOTH locally and remotely:\n{in_both_str}")
-        else:
-            logger.warning("No file was found both locally and remotely.")
-        if len(only_remote) > 0:
-            logger.warning(f"Files found ONLY REMOTELY:\n{remote_only_str}")
-        else:
-            logger.info("No file found only remotely.")
-        if len(only_local) > 0:
-            logger.warning(f"Files found ONLY LOCALLY:\n{local_only_str}\n{dashed_line}")
-        else:
-            logger.info(f"No file found only locally.\n{dashed_line}")
+        stream = stream or sys.stdout
+        for category, paths, header, empty_message in (
+            (
+                "both",
+                both_locations,
+                "Files found BOTH locally and remotely:",
+                "No file was found both locally and remotely.",
+            ),
+            (
+                "remote-only",
+                only_remote,
+                "Files found ONLY REMOTELY:",
+                "No file found only remotely.",
+            ),
+            ("local-only", only_local, "Files found ONLY LOCALLY:", "No file found only locally."),
+        ):
+            # sort through the external sorter instead of joining everything into one string
+            records = ExternalSorter()
+            for path in paths:
+                records.add(ReportRecord(category, os.path.dirname(path), os.path.basename(path)))
+            write_text_section(records, header, empty_message, stream=stream)
+        print("-" * 25, file=stream)
+        stream.flush()
 
 
 class RawDataChecker(Checker):
@@ -495,7 +718,17 @@ class RawDataChecker(Checker):
     #: Step name being checked.
     check_name = "raw_data"
 
-    def __init__(self, sheet, base_path, local_files_dict, remote_files_dict, check_md5):
+    def __init__(
+        self,
+        sheet,
+        base_path,
+        local_files_dict,
+        remote_files_dict,
+        check_md5,
+        report_writer=None,
+        irods_basepath=None,
+        report_stream=None,
+    ):
         """Constructor.
 
         :param sheet: Sample sheet.
@@ -504,7 +737,14 @@ class RawDataChecker(Checker):
         :param base_path: Base project path.
         :type base_path: str
         """
-        super().__init__(local_files_dict, remote_files_dict, check_md5)
+        super().__init__(
+            local_files_dict,
+            remote_files_dict,
+            check_md5,
+            report_writer,
+            irods_basepath,
+            report_stream,
+        )
         self.sheet = sheet
         self.base_path = base_path
 
@@ -616,6 +856,21 @@ class SnappyCheckRemoteCommand:
             action="store_true",
             help="Flag to indicate if local and remote MD5 files should be compared.",
         )
+        parser.add_argument(
+            "--format",
+            dest="report_format",
+            choices=REPORT_FORMATS,
+            default="text",
+            help="Report format, with tsv and jsonl the findings are written as records instead "
+            "of being logged. Default: %(default)s",
+        )
+        parser.add_argument(
+            "--output",
+            dest="report_output",
+            default="-",
+            help="File to write reports to, use it to separate them from log messages. "
+            "Default: stdout",
+        )
 
     @classmethod
     def run(
@@ -653,7 +908,9 @@ class SnappyCheckRemoteCommand:
             variant_caller_class = VariantCallingChecker
 
         # Find all remote files (iRODS)
-        library_remote_files_dict = RetrieveSodarCollection(self.args).perform()
+        irodscollector = RetrieveSodarCollection(self.args)
+        library_remote_files_dict = irodscollector.perform()
+        assay_path = irodscollector.get_assay_irods_path()
 
         # Find all local files (canonical paths)
         library_local_files_dict = FindLocalFiles(
@@ -663,25 +920,40 @@ class SnappyCheckRemoteCommand:
         ).run()
 
         # Run checks
-        results = [
-            RawDataChecker(
-                sheet=self.shortcut_sheet,
-                base_path=self.args.base_path,
-                remote_files_dict=library_remote_files_dict,
-                local_files_dict={},  # special case: dict correctly defined inside class
-                check_md5=self.args.md5,
-            ).run(),
-            NgsMappingChecker(
-                remote_files_dict=library_remote_files_dict,
-                local_files_dict=library_local_files_dict.get("ngs_mapping"),
-                check_md5=self.args.md5,
-            ).run(),
-            variant_caller_class(
-                remote_files_dict=library_remote_files_dict,
-                local_files_dict=library_local_files_dict.get(variant_call_type),
-                check_md5=self.args.md5,
-            ).run(),
-        ]
+        with open_report_output(self.args.report_output) as report_stream:
+            report_writer = None
+            if self.args.report_format != "text":
+                report_writer = ReportWriter(self.args.report_format, report_stream)
+            results = [
+                RawDataChecker(
+                    sheet=self.shortcut_sheet,
+                    base_path=self.args.base_path,
+                    remote_files_dict=library_remote_files_dict,
+                    local_files_dict={},  # special case: dict correctly defined inside class
+                    check_md5=self.args.md5,
+                    report_writer=report_writer,
+                    irods_basepath=assay_path,
+                    report_stream=report_stream,
+                ).run(),
+                NgsMappingChecker(
+                    remote_files_dict=library_remote_files_dict,
+                    local_files_dict=library_local_files_dict.get("ngs_mapping"),
+                    check_checksum=self.args.md5,
+                    report_writer=report_writer,
+                    irods_basepath=assay_path,
+                    report_stream=report_stream,
+                ).run(),
+                variant_caller_class(
+                    remote_files_dict=library_remote_files_dict,
+                    local_files_dict=library_local_files_dict.get(variant_call_type),
+                    check_checksum=self.args.md5,
+                    report_writer=report_writer,
+                    irods_basepath=assay_path,
+                    report_stream=report_stream,
+                ).run(),
+            ]
+            if report_writer:
+                report_writer.write_summary()
         if all(results):
             logger.info("All done.")
         return int(not all(results))
@@ -34,6 +34,9 @@ Sub Commands
 ``landing-zone-move``
     Move a landing zone.
 
+``landing-zone-wait``
+    Wait for landing zones to reach a final state.
+
 ``pull-data``
     Download data from iRODS.
 
@@ -56,7 +59,12 @@ information.
 
 import argparse
 
-from cubi_tk.parsers import get_basic_parser, get_sodar_parser, get_sodar_ingest_parser
+from cubi_tk.parsers import (
+    get_basic_parser,
+    get_sodar_parser,
+    get_sodar_ingest_parser,
+    get_sodar_multi_project_parser,
+)
 
 from ..common import run_nocmd
 from .add_ped import setup_argparse as setup_argparse_add_ped
@@ -69,6 +77,7 @@ from .lz_create_landingzone import setup_argparse as setup_argparse_create_landi
 from .lz_list_landingzones import setup_argparse as setup_argparse_list_landingzones
 from .lz_move import setup_argparse as setup_argparse_lz_move
 from .lz_validate import setup_argparse as setup_argparse_lz_validate
+from .lz_wait import setup_argparse as setup_argparse_lz_wait
 from .pull_data import setup_argparse as setup_argparse_pull_data
 from .pull_raw_data import setup_argparse as setup_argparse_pull_raw_data
 from .update_samplesheet import setup_argparse as setup_argparse_update_samplesheet
@@ -82,6 +91,7 @@ def setup_argparse(parser: argparse.ArgumentParser) -> None:
     sodar_parser_project_uuid_assay_uuid = get_sodar_parser(with_dest=True, with_assay_uuid=True)
     sodar_ingest_parser = get_sodar_ingest_parser()
     sodar_ingest_parser_no_dest = get_sodar_ingest_parser(include_dest=False)
+    sodar_multi_project_parser = get_sodar_multi_project_parser()
     sodar_parser_lz_uuid = get_sodar_parser(
         with_dest=True,
         dest_string="landing_zone_uuid",
@@ -107,7 +117,7 @@ def setup_argparse(parser: argparse.ArgumentParser) -> None:
     setup_argparse_download_sheet(
         subparsers.add_parser(
             "download-sheet",
-            parents=[basic_parser, sodar_parser_project_uuid],
+            parents=[basic_parser, sodar_parser_project_uuid, sodar_multi_project_parser],
             help="Download ISA-tab",
         )
     )
@@ -156,7 +166,7 @@ def setup_argparse(parser: argparse.ArgumentParser) -> None:
     setup_argparse_list_landingzones(
         subparsers.add_parser(
             "list-landingzones",
-            parents=[basic_parser, sodar_parser_project_uuid],
+            parents=[basic_parser, sodar_parser_project_uuid, sodar_multi_project_parser],
             help="List landing zones of project",
         )
     )
@@ -174,6 +184,13 @@ def setup_argparse(parser: argparse.ArgumentParser) -> None:
             help="Submit given landing zone for validation",
         )
     )
+    setup_argparse_lz_wait(
+        subparsers.add_parser(
+            "landing-zone-wait",
+            parents=[basic_parser, get_sodar_parser()],
+            help="Wait for landing zones to be moved, deleted or to fail",
+        )
+    )
     setup_argparse_update_samplesheet(
         subparsers.add_parser(
             "update-samplesheet",
@@ -13,9 +13,12 @@ File are sorted into:
 
 import argparse
 from collections import defaultdict
+import datetime
+from multiprocessing.pool import ThreadPool
 import os
 from pathlib import Path
 import re
+import sys
 import typing
 
 import attr
@@ -24,9 +27,25 @@ from loguru import logger
 from cubi_tk.irods_common import HASH_SCHEMES
 from cubi_tk.parsers import print_args
 
-from ..common import compute_checksum
+from ..check_report import (
+    REPORT_FORMATS,
+    ExternalSorter,
+    ReportRecord,
+    ReportWriter,
+    open_report_output,
+    write_text_section,
+)
+from ..check_remote_state import CheckRemoteState, get_state_path, remote_identities
+from ..common import (
+    DEFAULT_SCAN_THREADS,
+    compute_checksum,
+    regex_literal_prefix,
+    scandir_walk,
+    sizeof_fmt,
+)
 from ..exceptions import FileChecksumMismatchException
 from ..snappy.check_remote import Checker as SnappyChecker
+from ..sodar_cache import get_default_cache_dir
 from ..sodar_common import RetrieveSodarCollection
 
 
@@ -38,69 +57,347 @@ class FileDataObject:
     file_name: str
     file_path: str
     file_checksum: str
+    #: Size in bytes, only used in tiered comparison
+    file_size: typing.Optional[int] = None
+
+
+def match_checksum(candidates, checksum):
+    """FileDataObjects in ``candidates`` with ``checksum``, none if ``checksum`` is unknown."""
+    if not checksum:
+        return []
+    return [c for c in candidates if c.file_checksum == checksum]
+
+
+@attr.s(auto_attribs=True)
+class HashBudget:
+    """Number of bytes that may still be hashed in a tiered comparison."""
+
+    #: Maximal number of bytes to hash.
+    limit: int
+    #: Number of bytes hashed so far.
+    used: int = 0
+
+    def take(self, size):
+        """Whether a file of ``size`` bytes may be hashed, its size is counted if so."""
+        if self.used + size > self.limit:
+            return False
+        self.used += size
+        return True
 
 
 class FindLocalChecksumFiles:
     """Class contains methods to find local files with associated checksums"""
 
-    def __init__(self, base_path, hash_scheme, recheck_checksum=False, regex_pattern=None):
+    def __init__(
+        self,
+        base_path,
+        hash_scheme,
+        recheck_checksum=False,
+        regex_pattern=None,
+        threads=DEFAULT_SCAN_THREADS,
+        previous_directories=None,
+        include_unchecked=False,
+    ):
         """Constructor: init vars"""
 
         self.searchpath = Path(base_path)
         self.recheck_checksum = recheck_checksum
         self.hash_scheme = hash_scheme
         self.regex_pattern = re.compile(regex_pattern) if regex_pattern else None
+        self.threads = threads
+        # Directories not starting with (or being a prefix of) this can't contain matching files
+        self.regex_prefix = regex_literal_prefix(regex_pattern) if regex_pattern else None
+        #: Directory listings and recorded checksums of the previous run (see ``CheckRemoteState``),
+        #: if given only directories with changed modification time are listed again
+        self.previous_directories = previous_directories
+        #: Directory listings and recorded checksums of this run, filled in incremental mode
+        self.directories = {}
+        #: Also find files without checksum file and record file sizes (for tiered comparison)
+        self.include_unchecked = include_unchecked
+
+    def _prune(self, directory):
+        """Whether no file below ``directory`` can match the regex pattern."""
+        if not self.regex_prefix:
+            return False
+        # normalise like the data file paths the pattern is matched against, e.g. "./sub" to "sub"
+        directory = str(Path(directory)) + os.sep
+        return not (
+            directory.startswith(self.regex_prefix) or self.regex_prefix.startswith(directory)
+        )
+
+    def find_checksum_files(self):
+        """Find checksum files with existing data file that match the regex pattern (if any).
+
+        :return: Sorted list of checksum file paths.
+        """
+        hash_ending = "." + self.hash_scheme.lower()
+        checksum_files = []
+        for directory, entries in scandir_walk(self.searchpath, self.threads, prune=self._prune):
+            file_names = {entry.name for entry in entries if entry.is_file()}
+            for name in file_names:
+                if not name.endswith(hash_ending):
+                    continue
+                checksumfile = Path(directory) / name
+                datafile = checksumfile.with_suffix("")
+                # Check that corresponding files exist
+                if datafile.name not in file_names:
+                    logger.warning(
+                        f"Ignoring orphaned local checksum file: {checksumfile}.\nExpected associated file not found: {datafile}"
+                    )
+                    continue
+                elif self.regex_pattern and not re.search(self.regex_pattern, str(datafile)):
+                    logger.debug(
+                        f"Skipping {datafile} as it does not match regex: {self.regex_pattern}"
+                    )
+                    continue
+                checksum_files.append(checksumfile)
+        return sorted(checksum_files)
+
+    def find_data_files(self):
+        """Find all data files that match the regex pattern (if any), with or without checksum file.
+
+        :return: Sorted list of tuples of data file path, size and checksum file path (or ``None``).
+        """
+        hash_ending = "." + self.hash_scheme.lower()
+        data_files = []
+        for directory, entries in scandir_walk(self.searchpath, self.threads, prune=self._prune):
+            file_entries = {entry.name: entry for entry in entries if entry.is_file()}
+            for name, entry in file_entries.items():
+                if name.endswith(hash_ending):
+                    continue
+                datafile = Path(directory) / name
+                if self.regex_pattern and not re.search(self.regex_pattern, str(datafile)):
+                    continue
+                checksumfile = datafile.with_name(name + hash_ending)
+                data_files.append(
+                    (
+                        datafile,
+                        entry.stat().st_size,
+                        checksumfile if checksumfile.name in file_entries else None,
+                    )
+                )
+        return sorted(data_files)
+
+    def read_data_file(self, data_file):
+        """Read the recorded checksum (if any) of a data file found by ``find_data_files()``.
+
+        :return: FileDataObject of the data file, with size.
+        """
+        datafile, size, checksumfile = data_file
+        return FileDataObject(
+            file_name=datafile.name,
+            file_path=str(datafile),
+            file_checksum=self.read_recorded_checksum(checksumfile) if checksumfile else None,
+            file_size=size,
+        )
+
+    def read_recorded_checksum(self, checksumfile):
+        """Read the checksum recorded in ``checksumfile``."""
+        with open(checksumfile, "r", encoding="utf8") as f:
+            checksum = f.readline()
+            # Expected format example:
+            # `459db8f7cb0d3a23a38fdc98286a9a9b  out.vcf.gz`
+            return re.search(HASH_SCHEMES[self.hash_scheme]["regex"], checksum).group(0)
+
+    def read_checksum_file(self, checksumfile):
+        """Read (and optionally recheck) the checksum of the data file belonging to ``checksumfile``.
+
+        :return: FileDataObject of the data file.
+        """
+        datafile = checksumfile.with_suffix("")
+        checksum = self.read_recorded_checksum(checksumfile)
+
+        # Check that checksum in local file is correct, this is slow so don't make it default
+        if self.recheck_checksum:
+            recompute_checksum = compute_checksum(datafile, self.hash_scheme)
+            if checksum != recompute_checksum:
+                logger.error(
+                    f"Wrong checksum recorded for file: {datafile}. "
+                    f"Recorded checksum: {checksum}, excepted checksum: {recompute_checksum}."
+                )
+                raise FileChecksumMismatchException
+
+        return FileDataObject(
+            file_name=datafile.name, file_path=str(datafile), file_checksum=checksum
+        )
+
+    def scan_directory_incremental(self, directory):
+        """List ``directory`` and read its checksum files, unless the directory did not change.
+
+        Checksum files whose modification time did not change are not read again either. They are
+        checked (one stat each) in unchanged directories, too, as rewriting a checksum file in
+        place does not change the modification time of its directory.
+
+        :return: Tuple of directory, its listing (``None`` if it could not be listed) and whether it
+        was listed again.
+        """
+        previous = self.previous_directories.get(directory)
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            if previous is not None and previous["mtime_ns"] == mtime_ns:
+                checksums = self.read_checksums_incremental(
+                    directory, previous["checksums"], previous["checksums"]
+                )
+                return directory, {**previous, "checksums": checksums}, False
+            subdirs = []
+            files = []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+        except OSError as e:
+            logger.warning("Could not list directory {}: {}", directory, e)
+            return directory, None, True
+
+        hash_ending = "." + self.hash_scheme.lower()
+        file_names = set(files)
+        checksum_names = []
+        for name in files:
+            if not name.endswith(hash_ending):
+                continue
+            if name[: -len(hash_ending)] not in file_names:
+                checksumfile = os.path.join(directory, name)
+                logger.warning(f"Ignoring orphaned local checksum file: {checksumfile}.")
+                continue
+            checksum_names.append(name)
+        listing = {
+            "mtime_ns": mtime_ns,
+            "subdirs": sorted(subdirs),
+            "files": sorted(files),
+            "checksums": self.read_checksums_incremental(
+                directory, checksum_names, previous["checksums"] if previous else {}
+            ),
+        }
+        return directory, listing, True
+
+    def read_checksums_incremental(self, directory, names, previous_checksums):
+        """Read the checksum files ``names`` in ``directory``, unless their modification time
+        matches ``previous_checksums``.
+
+        :return: Dict of checksum file name → [modification time in ns, checksum].
+        """
+        checksums = {}
+        for name in names:
+            checksumfile = os.path.join(directory, name)
+            checksum_mtime_ns = os.stat(checksumfile).st_mtime_ns
+            if previous_checksums.get(name, [None])[0] == checksum_mtime_ns:
+                checksums[name] = previous_checksums[name]
+            else:
+                checksums[name] = [checksum_mtime_ns, self.read_recorded_checksum(checksumfile)]
+        return checksums
+
+    def walk_incremental(self):
+        """List all directories below the search path, re-using unchanged listings of the previous
+        run. The listings are stored in ``directories``.
+
+        :return: Number of directories that were listed again.
+        """
+        num_listed = 0
+        pool = ThreadPool(processes=self.threads) if self.threads > 1 else None
+        try:
+            level = [str(self.searchpath)]
+            while level:
+                if pool is not None and len(level) > 1:
+                    results = pool.imap_unordered(self.scan_directory_incremental, level)
+                else:
+                    results = map(self.scan_directory_incremental, level)
+                next_level = []
+                for directory, listing, listed in results:
+                    num_listed += listed
+                    if listing is None:
+                        continue
+                    self.directories[directory] = listing
+                    for name in listing["subdirs"]:
+                        subdir = os.path.join(directory, name)
+                        if not self._prune(subdir):
+                            next_level.append(subdir)
+                level = next_level
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return num_listed
+
+    def run_incremental(self):
+        """Runs class routines, re-using the listings of unchanged directories of the previous run.
+
+        :return: Same as ``run()``.
+        """
+        logger.info("Starting incremental raw data files search ...")
+        hash_ending = "." + self.hash_scheme.lower()
+        rawdata_structure_dict = defaultdict(list)
+
+        num_listed = self.walk_incremental()
+        for directory in sorted(self.directories):
+            for name, (_, checksum) in sorted(self.directories[directory]["checksums"].items()):
+                datafile = os.path.join(directory, name[: -len(hash_ending)])
+                if self.regex_pattern and not re.search(self.regex_pattern, datafile):
+                    continue
+                rawdata_structure_dict[Path(directory)].append(
+                    FileDataObject(
+                        file_name=os.path.basename(datafile),
+                        file_path=datafile,
+                        file_checksum=checksum,
+                    )
+                )
+
+        logger.info(
+            "... done with raw data files search, listed {} of {} directories.",
+            num_listed,
+            len(self.directories),
+        )
+        return rawdata_structure_dict
+
+    @property
+    def incremental(self):
+        """Whether ``run()`` re-uses the previous listings and fills ``directories``.
+
+        Rechecking checksums and finding files without checksum file always need a full scan.
+        """
+        return (
+            self.previous_directories is not None
+            and not self.recheck_checksum
+            and not self.include_unchecked
+        )
 
     # Adapted from snappy check remote
     def run(self):
         """Runs class routines.
 
+        Directories are listed and checksum files are read (and rechecked) with up to ``threads``
+        threads, as metadata latency dominates on network file systems.
+
         :return: Returns dictionary of dictionaries:
         key: directory path ; value: list of FileDataObject (one per file in that path)
         """
+        if self.incremental:
+            return self.run_incremental()
+
         logger.info("Starting raw data files search ...")
 
         # Initialise variables
         rawdata_structure_dict = defaultdict(list)
 
-        # Find all checksum files
-        checksum_files = self.searchpath.rglob("*." + self.hash_scheme.lower())
-
-        # Check that corresponding files exist
-        for checksumfile in checksum_files:
-            datafile = checksumfile.with_suffix("")
-            if not datafile.exists():
-                logger.warning(
-                    f"Ignoring orphaned local checksum file: {checksumfile}.\nExpected associated file not found: {datafile}"
-                )
-                continue
-            elif self.regex_pattern and not re.search(self.regex_pattern, str(datafile)):
-                logger.debug(
-                    f"Skipping {datafile} as it does not match regex: {self.regex_pattern}"
-                )
-                continue
-
-            with open(checksumfile, "r", encoding="utf8") as f:
-                checksum = f.readline()
-                # Expected format example:
-                # `459db8f7cb0d3a23a38fdc98286a9a9b  out.vcf.gz`
-                checksum = re.search(HASH_SCHEMES[self.hash_scheme]["regex"], checksum).group(0)
-
-            # Check that checksum in local file is correct, this is slow so don't make it default
-            if self.recheck_checksum:
-                recompute_checksum = compute_checksum(datafile, self.hash_scheme)
-                if checksum != recompute_checksum:
-                    logger.error(
-                        f"Wrong checksum recorded for file: {datafile}. "
-                        f"Recorded checksum: {checksum}, excepted checksum: {recompute_checksum}."
-                    )
-                    raise FileChecksumMismatchException
-
-            rawdata_structure_dict[datafile.parent].append(
-                FileDataObject(
-                    file_name=datafile.name, file_path=str(datafile), file_checksum=checksum
-                )
-            )
+        # Find all checksum files (or all data files)
+        if self.include_unchecked:
+            read_file, files = self.read_data_file, self.find_data_files()
+        else:
+            read_file, files = self.read_checksum_file, self.find_checksum_files()
+
+        if self.threads > 1 and len(files) > 1:
+            pool = ThreadPool(processes=self.threads)
+            try:
+                file_objects = pool.map(read_file, files)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            file_objects = [read_file(f) for f in files]
+
+        for file_object in file_objects:
+            rawdata_structure_dict[Path(file_object.file_path).parent].append(file_object)
 
         logger.info("... done with raw data files search.")
 
@@ -108,6 +405,28 @@ class FindLocalChecksumFiles:
         return rawdata_structure_dict
 
 
+def make_relative_dir(irods_basepath):
+    """Return function for the directory of an iRODS path relative to ``irods_basepath``.
+
+    Relative paths are computed once per remote directory, not once per data object.
+    """
+    relative_dirs = {}
+
+    def relative_dir(path):
+        directory = os.path.dirname(path)
+        if directory not in relative_dirs:
+            p = Path(directory)
+            if irods_basepath:
+                try:
+                    p = p.relative_to(irods_basepath)
+                except ValueError:
+                    pass  # wrong assay, skip
+            relative_dirs[directory] = str(p)
+        return relative_dirs[directory]
+
+    return relative_dir
+
+
 # Adapted from snappy.check_remote
 class FileComparisonChecker:
     """Class with checker methods."""
@@ -120,6 +439,12 @@ class FileComparisonChecker:
         filenames_only=False,
         irods_basepath=None,
         report_checksums=False,
+        report_format="text",
+        report_stream=None,
+        previous_results=None,
+        tiered=False,
+        hash_scheme="MD5",
+        hash_budget=0,
     ):
         """Constructor.
 
@@ -137,6 +462,20 @@ class FileComparisonChecker:
         :param irods_basepath: assay basepath in irods that should be removed for reporting
 
         :param report_checksums: Flag to indicate if checksums should be included in report
+
+        :param report_format: One of ``text``, ``tsv`` or ``jsonl``
+
+        :param report_stream: Output stream for the report, defaults to stdout
+
+        :param previous_results: Comparison results of the previous run (see ``CheckRemoteState``),
+        if given changed results are reported
+
+        :param tiered: Flag to compare by name and size first, then by checksum (see
+        ``iter_tiered_compare_local_and_remote_files()``)
+
+        :param hash_scheme: Hash scheme for hashing local files in tiered comparison
+
+        :param hash_budget: Maximal number of bytes to hash in tiered comparison
         """
         self.local_files_dict = local_files_dict
         self.remote_files_dict = remote_files_dict
@@ -144,37 +483,112 @@ class FileComparisonChecker:
         self.filenames_only = filenames_only
         self.irods_basepath = irods_basepath
         self.report_checksums = report_checksums
+        self.report_format = report_format
+        self.report_stream = report_stream
+        self.previous_results = previous_results
+        self.tiered = tiered
+        self.hash_scheme = hash_scheme
+        self.hash_budget = hash_budget
+        #: Comparison results of this run, filled by ``run()``
+        self.results = {}
 
     def run(self):
         """Executes comparison of local and remote files"""
-        # Run comparison
-        in_both, local_only, remote_unmatched = self.compare_local_and_remote_files(
-            self.local_files_dict, self.remote_files_dict, self.filenames_only, self.irods_basepath
-        )
-
         # Same name in Sodar is only relevant if we only match by name
         if self.filenames_only:
             self.report_multiple_file_versions_in_sodar(self.remote_files_dict)
 
-        self.report_findings(
-            both_locations=in_both,
-            only_local=local_only,
-            only_remote=remote_unmatched,
-            report_categories=self.report_categories,
-            include_checksum=self.report_checksums,
-        )
+        # Run comparison, records are reported while they are produced
+        records = self.iter_records()
+        if self.report_format == "text":
+            sections = {category: ExternalSorter() for category in self.report_categories}
+            for record in records:
+                sections[record.category].add(record)
+            self.write_text_report(
+                sections, self.report_categories, self.report_checksums, self.report_stream
+            )
+            if self.previous_results is not None:
+                self.write_text_changes(self.iter_changes(), self.report_stream)
+        else:
+            writer = ReportWriter(self.report_format, self.report_stream)
+            for record in records:
+                writer.write(record)
+            if self.previous_results is not None:
+                for record in self.iter_changes():
+                    writer.write(record)
+            writer.write_summary()
 
         # Return all okay
         return True
 
+    def iter_records(self):
+        """Run comparison, yielding ReportRecords of the files in the reported categories.
+
+        The comparison results of all files are collected in ``results``.
+        """
+        if self.tiered:
+            comparison = self.iter_tiered_compare_local_and_remote_files(
+                self.local_files_dict,
+                self.remote_files_dict,
+                self.irods_basepath,
+                self.hash_scheme,
+                self.hash_budget,
+            )
+        else:
+            comparison = (
+                (category, directory, file, None)
+                for category, directory, file in self.iter_compare_local_and_remote_files(
+                    self.local_files_dict,
+                    self.remote_files_dict,
+                    self.filenames_only,
+                    self.irods_basepath,
+                )
+            )
+        for category, directory, file, tier in comparison:
+            side = "remote" if category == "remote-only" else "local"
+            self.results[f"{side}:{os.path.join(str(directory), file.file_name)}"] = category
+            if category in self.report_categories:
+                yield ReportRecord(
+                    category, str(directory), file.file_name, file.file_checksum, detail=tier
+                )
+
+    def iter_changes(self):
+        """ReportRecords (category ``changed``) for files whose comparison result changed since the
+        previous run, the previous and current categories (or ``absent``) are given as detail."""
+        state = CheckRemoteState(results=self.previous_results)
+        for key, previous, current in state.diff_results(self.results):
+            path = key.split(":", 1)[1]
+            yield ReportRecord(
+                "changed",
+                os.path.dirname(path),
+                os.path.basename(path),
+                detail=f"{previous or 'absent'} -> {current or 'absent'}",
+            )
+
+    @staticmethod
+    def write_text_changes(changes, stream=None):
+        """Write changes since the previous run (see ``iter_changes()``) as text."""
+        stream = stream or sys.stdout
+        print("-" * 25, file=stream)
+        num_changes = 0
+        for record in changes:
+            if not num_changes:
+                print("Files CHANGED since previous run:", file=stream)
+            num_changes += 1
+            print(
+                f"    {os.path.join(record.directory, record.name)}: {record.detail}", file=stream
+            )
+        if not num_changes:
+            print("No file changed since previous run.", file=stream)
+        stream.flush()
+
     @staticmethod
     def report_multiple_file_versions_in_sodar(remote_files_dict):
         return SnappyChecker.report_multiple_file_versions_in_sodar(remote_files_dict)
 
-    # FIXME: reduce complexity
-    @staticmethod
-    def compare_local_and_remote_files(  # noqa: C901
-        local_dict, remote_dict, filenames_only=False, irods_basepath=""
+    @classmethod
+    def compare_local_and_remote_files(
+        cls, local_dict, remote_dict, filenames_only=False, irods_basepath=""
     ):
         """Compare locally and remotely available files.
 
@@ -193,76 +607,187 @@ class FileComparisonChecker:
         one for files only remotely; and one for files only locally. All use paths to file locations as keys and
         values are lists of FileDataObjects
         """
-
-        def filedata_from_irodsdata(
-            obj,
-        ):  # Helper Function to convert iRodsDataObject (non-hashable) to FileDataObject, also making path relative
-            p = Path(obj.path).parent
-            if irods_basepath:
-                try:
-                    p = p.relative_to(irods_basepath)
-                except ValueError:
-                    pass  # wrong assay, skip
-            return FileDataObject(obj.name, str(p), obj.checksum)
-
         # The dictionaries will contain double information on the file path (both as keys & in the objects)
         # For collecting info in itself sets would be easier, however grouping by folder makes it easier to
         # sort the files for reporting
-        in_both = defaultdict(list)
-        local_only = defaultdict(list)
-        # Using a set (instead of dict for returning directly) is easier for checking which files get matched
-        remote_unmatched = {
-            filedata_from_irodsdata(f) for filename, files in remote_dict.items() for f in files
+        results = {
+            category: defaultdict(list) for category in ("both", "local-only", "remote-only")
         }
+        for category, directory, file in cls.iter_compare_local_and_remote_files(
+            local_dict, remote_dict, filenames_only, irods_basepath
+        ):
+            results[category][directory].append(file)
+        return results["both"], results["local-only"], results["remote-only"]
+
+    # FIXME: reduce complexity
+    @staticmethod
+    def iter_compare_local_and_remote_files(  # noqa: C901
+        local_dict, remote_dict, filenames_only=False, irods_basepath=""
+    ):
+        """Compare locally and remotely available files, yielding results as they are found.
+
+        :param local_dict: Dictionary with local directories as keys and list of FileDataObject as values.
+        :type local_dict: dict
+
+        :param remote_dict: Dictionary with remote filenames as keys and list of IrodsDataObject as values.
+        :type remote_dict: dict
+
+        :param filenames_only: Flag to indicate if checksums should not be used for comparison
+
+        :param irods_basepath: assay basepath in irods that should be removed for reporting
+        :type irods_basepath: str
+
+        :return: Yields tuples of category (``both``, ``local-only`` or ``remote-only``), directory and
+        FileDataObject. Local files are reported while iterating ``local_dict``, remote only files at the
+        end.
+        """
+
+        relative_dir = make_relative_dir(irods_basepath)
+
+        # Index the remote files once by name and by (name, checksum), iRODSDataObjects are converted
+        # to (hashable) FileDataObjects with paths relative to the assay
+        remote_by_name = {}
+        remote_by_name_checksum = defaultdict(list)
+        for filename, files in remote_dict.items():
+            remote_by_name[filename] = []
+            for f in files:
+                filedata = FileDataObject(f.name, relative_dir(f.path), f.checksum)
+                remote_by_name[filename].append(filedata)
+                remote_by_name_checksum[(filename, f.checksum)].append(filedata)
+
+        # Insertion ordered "set" of remote files, matched files are removed
+        remote_unmatched = dict.fromkeys(
+            filedata for files in remote_by_name.values() for filedata in files
+        )
+        # Index keys whose remote files were already removed from `remote_unmatched`
+        matched_keys = set()
         filenames_warnings = set()
 
         for directory, files in local_dict.items():
             for file in files:
                 filename = file.file_name
-                checksum = file.file_checksum
                 # Check first if there is any matching remote file or if file is local only
-                if filename not in remote_dict:
-                    local_only[directory].append(file)
+                if filename not in remote_by_name:
+                    yield "local-only", directory, file
                     continue
 
-                # Collect all remote files with same name
-                remote_files = remote_dict[filename]
-
                 # For filename based matching *all* files with the same name will be matched
                 # If we match multiple files with the same name, they may not be the same, so warning is issued
                 # TODO: maybe make this an error? optionally an error depending on flags?
                 if filenames_only:
-                    in_both[directory].append(file)
-                    remote_unmatched -= {filedata_from_irodsdata(f) for f in remote_files}
-                    if len(remote_files) > 1 and filename not in filenames_warnings:
+                    key = filename
+                    matches = remote_by_name[filename]
+                    yield "both", directory, file
+                    if len(matches) > 1 and filename not in filenames_warnings:
                         filenames_warnings.add(filename)
                         logger.warning(
-                            f"Local file ({filename}) matches {len(remote_files)} files in irods. "
+                            f"Local file ({filename}) matches {len(matches)} files in irods. "
                             f"Run without --filename-only to check individual files based on MD5 or SHA256 as well as name."
                         )
-                    continue
+                else:
+                    # From the file with matching names subselect those with same hash
+                    key = (filename, file.file_checksum)
+                    matches = remote_by_name_checksum.get(key, ())
+                    yield ("both" if matches else "local-only"), directory, file
+                    # Multiple files with the same checskum aren't a critical issue - an info/warning is enough here
+                    if len(set(matches)) > 1:
+                        logger.info(
+                            f"Local file ({filename}) matches {len(set(matches))} files with the same checksum in irods."
+                        )
+
+                if key not in matched_keys:
+                    matched_keys.add(key)
+                    for filedata in matches:
+                        remote_unmatched.pop(filedata, None)
+
+        for file in remote_unmatched:
+            yield "remote-only", file.file_path, file
+
+    @classmethod
+    def iter_tiered_compare_local_and_remote_files(
+        cls, local_dict, remote_dict, irods_basepath="", hash_scheme="MD5", hash_budget=0
+    ):
+        """Compare locally and remotely available files by name, size and checksum.
+
+        Files with the same name are first compared by size. Of the files with matching size, those
+        with a recorded checksum are compared by checksum. Files without recorded checksum or whose
+        recorded checksum does not match are hashed, as long as the total size of hashed files stays
+        within ``hash_budget`` bytes. Files without recorded checksum that can not be hashed anymore
+        are matched by size alone.
+
+        :param local_dict: Dictionary with local directories as keys and list of FileDataObject
+        (with size, optionally without checksum) as values.
+        :type local_dict: dict
+
+        :param remote_dict: Dictionary with remote filenames as keys and list of IrodsDataObject as values.
+        :type remote_dict: dict
+
+        :param irods_basepath: assay basepath in irods that should be removed for reporting
+        :type irods_basepath: str
+
+        :param hash_scheme: Hash scheme for hashing local files
 
-                # From the file with matching names subselect those with same hash
-                checksum_matches = {
-                    filedata_from_irodsdata(f) for f in remote_files if f.checksum == checksum
-                }
-                if checksum_matches:
-                    remote_unmatched -= checksum_matches
-                    in_both[directory].append(file)
+        :param hash_budget: Maximal number of bytes to hash
+
+        :return: Yields tuples of category, directory, FileDataObject and the tier that decided
+        (``size``, ``checksum`` or ``hashed``, ``None`` for files without remote file of the same
+        name).
+        """
+        relative_dir = make_relative_dir(irods_basepath)
+        remote_by_name = {
+            filename: [
+                FileDataObject(f.name, relative_dir(f.path), f.checksum, getattr(f, "size", None))
+                for f in files
+            ]
+            for filename, files in remote_dict.items()
+        }
+        remote_unmatched = dict.fromkeys(
+            filedata for files in remote_by_name.values() for filedata in files
+        )
+        budget = HashBudget(hash_budget)
+
+        for directory, files in local_dict.items():
+            for file in files:
+                candidates = remote_by_name.get(file.file_name)
+                if not candidates:
+                    yield "local-only", directory, file, None
+                    continue
+                matches, tier = cls.match_tiered(file, candidates, hash_scheme, budget)
+                if matches:
+                    yield "both", directory, file, tier
+                    for filedata in matches:
+                        remote_unmatched.pop(filedata, None)
                 else:
-                    local_only[directory].append(file)
-                # Multiple files with the same checskum aren't a critical issue - an info/warning is enough here
-                if len(checksum_matches) > 1:
-                    logger.info(
-                        f"Local file ({filename}) matches {len(checksum_matches)} files with the same checksum in irods."
-                    )
+                    yield "local-only", directory, file, tier
 
-        # Convert set of unmatched files into the same dict structure as the others
-        remote_only = defaultdict(list)
+        if budget.used:
+            logger.info(f"Hashed {sizeof_fmt(budget.used)} of local files.")
         for file in remote_unmatched:
-            remote_only[file.file_path].append(file)
+            yield "remote-only", file.file_path, file, None
 
-        return in_both, local_only, remote_only
+    @staticmethod
+    def match_tiered(file, candidates, hash_scheme, budget):
+        """Match a local file against the remote files of the same name.
+
+        :return: Tuple of the matching remote FileDataObjects and the tier that decided.
+        """
+        # Tier 1: name and size, remote files of unknown size are kept
+        same_size = [c for c in candidates if c.file_size is None or c.file_size == file.file_size]
+        if not same_size:
+            return [], "size"
+        # Tier 2: recorded checksum
+        matches = match_checksum(same_size, file.file_checksum)
+        if matches:
+            return matches, "checksum"
+        # Tier 3: hash local file within budget
+        if budget.take(file.file_size):
+            checksum = compute_checksum(file.file_path, hash_scheme, verbose=False)
+            if file.file_checksum and checksum != file.file_checksum:
+                logger.warning(f"Recorded checksum of {file.file_path} is outdated.")
+            return match_checksum(same_size, checksum), "hashed"
+        if not file.file_checksum:
+            return same_size, "size"
+        return [], "checksum"
 
     @staticmethod
     def report_findings(
@@ -288,45 +813,64 @@ class FileComparisonChecker:
         :param include_checksum: Flag to indicate if checksums should be included in reports
         """
 
-        # Convert entries to text
-        def make_file_block(folder, files):
-            files_str = "\n".join(
-                "    "
-                + f.file_name
-                + ("" if not include_checksum else "  (" + f.file_checksum[:8] + ")")
-                for f in sorted(files, key=lambda o: o.file_name)
-            )
-            return str(folder) + ":\n" + files_str
+        sections = {}
+        for category, files_dict in (
+            ("both", both_locations),
+            ("local-only", only_local),
+            ("remote-only", only_remote),
+        ):
+            sections[category] = ExternalSorter()
+            for folder, files in files_dict.items():
+                for f in files:
+                    sections[category].add(
+                        ReportRecord(category, str(folder), f.file_name, f.file_checksum)
+                    )
+        FileComparisonChecker.write_text_report(sections, report_categories, include_checksum)
 
-        in_both_str = "\n".join(
-            sorted((make_file_block(folder, files) for folder, files in both_locations.items()))
-        )
-        local_only_str = "\n".join(
-            sorted((make_file_block(folder, files) for folder, files in only_local.items()))
-        )
-        remote_only_str = "\n".join(
-            sorted((make_file_block(folder, files) for folder, files in only_remote.items()))
-        )
+    @staticmethod
+    def write_text_report(sections, report_categories, include_checksum=False, stream=None):
+        """Write text report, files are grouped by directory.
 
+        :param sections: Sorted ReportRecords (e.g. ExternalSorter) for each category.
+        :type sections: dict
+
+        :param report_categories: List of category names to report.
+        :type report_categories: list[typing.Literal["both", "remote-only", "local-only"]]
+
+        :param include_checksum: Flag to indicate if checksums should be included in reports
+
+        :param stream: Output stream, defaults to stdout
+        """
+        stream = stream or sys.stdout
         dashed_line = "-" * 25
 
+        def write_section(category, header, empty_message):
+            write_text_section(
+                sections[category], header, empty_message, include_checksum, stream=stream
+            )
+
         # Write results to stdout
-        if len(both_locations) > 0 and "both" in report_categories:
-            print(f"Files found BOTH locally and remotely:\n{in_both_str}")
-        elif "both" in report_categories:
-            print("No file was found both locally and remotely.")
+        if "both" in report_categories:
+            write_section(
+                "both",
+                "Files found BOTH locally and remotely:",
+                "No file was found both locally and remotely.",
+            )
         if "both" in report_categories and "local-only" in report_categories:
-            print(dashed_line)
-        if len(only_local) > 0 and "local-only" in report_categories:
-            print(f"Files found ONLY LOCALLY:\n{local_only_str}")
-        elif "local-only" in report_categories:
-            print("No file found only locally.")
+            print(dashed_line, file=stream)
+        if "local-only" in report_categories:
+            write_section("local-only", "Files found ONLY LOCALLY:", "No file found only locally.")
         if "remote-only" in report_categories and report_categories != ["remote-only"]:
-            print(dashed_line)
-        if len(only_remote) > 0 and "remote-only" in report_categories:
-            print(f"Files found ONLY REMOTELY:\n{remote_only_str}")
-        elif "remote-only" in report_categories:
-            print("No file found only remotely.")
+            print(dashed_line, file=stream)
+        if "remote-only" in report_categories:
+            write_section(
+                "remote-only", "Files found ONLY REMOTELY:", "No file found only remotely."
+            )
+        stream.flush()
+        counts = ", ".join(
+            f"{len(sections[category])} {category}" for category in report_categories
+        )
+        logger.info("Summary: {}", counts)
 
 
 # Adapted from snappy check_remote
@@ -357,6 +901,13 @@ class SodarCheckRemoteCommand:
             default=None,
             help="(Regex) pattern to select files for comparison. I.e.: 'fastq.gz$'. Default: None (all files used)",
         )
+        parser.add_argument(
+            "--parallel-scan-jobs",
+            default=DEFAULT_SCAN_THREADS,
+            type=int,
+            help="Number of threads for listing local directories and reading checksum files. "
+            "Default: %(default)s",
+        )
         parser.add_argument(
             "--filename-only",
             default=False,
@@ -364,6 +915,20 @@ class SodarCheckRemoteCommand:
             help="Flag to indicate whether file comparison between local and remote files "
             "should only use file names and ignore checksum values.",
         )
+        parser.add_argument(
+            "--tiered",
+            default=False,
+            action="store_true",
+            help="Compare files by name and size first and by checksum only for files of the same "
+            "size. Files without checksum file are included and hashed within --hash-budget-gib, "
+            "otherwise they are matched by size alone.",
+        )
+        parser.add_argument(
+            "--hash-budget-gib",
+            default=0.0,
+            type=float,
+            help="Maximal amount of local data (in GiB) to hash with --tiered. Default: %(default)s",
+        )
         parser.add_argument(
             "--recheck-checksum",
             default=False,
@@ -383,6 +948,28 @@ class SodarCheckRemoteCommand:
             default=["remote-only", "local-only", "both"],
             help="Flag to select categories of checked files to report (any of: remote-only, local-only, both). Default: all reported.",
         )
+        parser.add_argument(
+            "--incremental",
+            default=False,
+            action="store_true",
+            help="Keep the state of the comparison in the cache directory. Later runs only list "
+            "local directories that changed and report which files changed since the previous run.",
+        )
+        parser.add_argument(
+            "--format",
+            dest="report_format",
+            choices=REPORT_FORMATS,
+            default="text",
+            help="Report format, tsv and jsonl records are written as soon as they are found. "
+            "Default: %(default)s",
+        )
+        parser.add_argument(
+            "--output",
+            dest="report_output",
+            default="-",
+            help="File to write the report to, use it to separate tsv/jsonl reports from log "
+            "messages. Default: stdout",
+        )
 
     @classmethod
     def run(
@@ -401,6 +988,10 @@ class SodarCheckRemoteCommand:
             logger.error("Base path {} does not exist", args.base_path)
             res = 1
 
+        if args.tiered and (args.filename_only or args.recheck_checksum):
+            logger.error("--tiered can not be combined with --filename-only or --recheck-checksum")
+            res = 1
+
         return res
 
     def execute(self) -> typing.Optional[int]:
@@ -426,23 +1017,73 @@ class SodarCheckRemoteCommand:
                 for k, vals in remote_files_dict.items()
             }
 
+        # Load state of the previous run
+        state = state_path = None
+        if self.args.incremental:
+            state_path = get_state_path(
+                getattr(self.args, "cache_dir", None) or get_default_cache_dir(),
+                self.args.sodar_server_url,
+                self.args.project_uuid,
+                getattr(self.args, "assay_uuid", None),
+                os.path.abspath(self.args.base_path),
+                hash_scheme,
+                self.args.file_selection_regex,
+                self.args.filename_only,
+                self.args.tiered,
+            )
+            state = CheckRemoteState.load(state_path)
+            if state.saved_at:
+                new, modified, removed = state.diff_remote(remote_identities(remote_files_dict))
+                logger.info(
+                    "Since previous run at {}: {} new, {} modified and {} removed remote files",
+                    datetime.datetime.fromtimestamp(state.saved_at).isoformat(timespec="seconds"),
+                    new,
+                    modified,
+                    removed,
+                )
+            if self.args.recheck_checksum:
+                logger.info("All local checksum files are read again for --recheck-checksum")
+
         # Find all local files with checksum, includes regex filter
-        local_files_dict = FindLocalChecksumFiles(
+        local_finder = FindLocalChecksumFiles(
             base_path=self.args.base_path,
             hash_scheme=hash_scheme,
             recheck_checksum=self.args.recheck_checksum,
             regex_pattern=self.args.file_selection_regex,
-        ).run()
+            threads=self.args.parallel_scan_jobs,
+            previous_directories=state.directories if state else None,
+            include_unchecked=self.args.tiered,
+        )
+        local_files_dict = local_finder.run()
 
         # Run checks
-        FileComparisonChecker(
-            remote_files_dict=remote_files_dict,
-            local_files_dict=local_files_dict,
-            report_categories=self.args.report_categories,
-            filenames_only=self.args.filename_only,
-            irods_basepath=assay_path,
-            report_checksums=self.args.report_checksums,
-        ).run()
+        with open_report_output(self.args.report_output) as report_stream:
+            checker = FileComparisonChecker(
+                remote_files_dict=remote_files_dict,
+                local_files_dict=local_files_dict,
+                report_categories=self.args.report_categories,
+                filenames_only=self.args.filename_only,
+                irods_basepath=assay_path,
+                report_checksums=self.args.report_checksums,
+                report_format=self.args.report_format,
+                report_stream=report_stream,
+                previous_results=state.results if state and state.saved_at else None,
+                tiered=self.args.tiered,
+                hash_scheme=hash_scheme,
+                hash_budget=int(self.args.hash_budget_gib * 1024**3),
+            )
+            checker.run()
+
+        # Save state for the next run
+        if state is not None:
+            # a full scan collects no listings, keep the previous ones for the next incremental run
+            CheckRemoteState(
+                directories=(
+                    local_finder.directories if local_finder.incremental else state.directories
+                ),
+                remote=remote_identities(remote_files_dict),
+                results=checker.results,
+            ).save(state_path)
 
         logger.info("All done.")
         return 0
@@ -1,10 +1,13 @@
 import argparse
-from pathlib import PurePosixPath
+from multiprocessing.pool import ThreadPool
+from pathlib import Path, PurePosixPath
 import os
 
 from loguru import logger
+import tqdm
 
 from cubi_tk.api_models import IrodsDataObject
+from cubi_tk.common import RateLimiter
 from cubi_tk.exceptions import CubiTkException
 from cubi_tk.parsers import print_args
 from cubi_tk.sodar_api import SodarApi
@@ -51,6 +54,26 @@ class SodarDeletionRequestsCommand:
             action="store_true",
             help="Perform a dry run.",
         )
+        parser.add_argument(
+            "--parallel-requests",
+            default=4,
+            type=int,
+            help="Number of deletion requests submitted concurrently (default: %(default)s).",
+        )
+        parser.add_argument(
+            "--max-requests-per-second",
+            default=10.0,
+            type=float,
+            help="Upper limit for the rate of submitted deletion requests, 0 for no limit "
+            "(default: %(default)s).",
+        )
+        parser.add_argument(
+            "--resume-file",
+            default=None,
+            help="File to store paths for which the deletion request failed. If the file exists, "
+            "only the paths listed in it are submitted (instead of matching irods_paths). The file "
+            "is removed once all requests succeeded.",
+        )
 
     @classmethod
     def run(
@@ -62,7 +85,6 @@ class SodarDeletionRequestsCommand:
     def execute(self) -> int:
         """Execute the SodarAPI calls to ."""
 
-        res = 0
         # res = self.check_args(self.args)
         # if res:  # pragma: nocover
         #    return res
@@ -71,26 +93,80 @@ class SodarDeletionRequestsCommand:
         print_args(self.args)
         # Initiate API connection, select assay
         sodar_api = SodarApi(self.args)
-        assay, study = sodar_api.get_assay_from_uuid()
-        # Find all remote files
-        irods_files = sodar_api.get_samplesheet_file_list()
-        irods_files = [f for f in irods_files if f.path.startswith(assay.irods_path)]
-        deletion_request_paths = self.gather_deletion_request_paths(irods_files, assay.irods_path)
-        for path in deletion_request_paths:
-            if self.args.dry_run:
+        resume_file = Path(self.args.resume_file) if self.args.resume_file else None
+        if resume_file and resume_file.exists():
+            with resume_file.open("rt") as inputf:
+                deletion_request_paths = [line.strip() for line in inputf if line.strip()]
+            logger.info(
+                "Resuming {} deletion requests from {}", len(deletion_request_paths), resume_file
+            )
+        else:
+            assay, study = sodar_api.get_assay_from_uuid()
+            # Find all remote files
+            irods_files = sodar_api.get_samplesheet_file_list()
+            irods_files = [f for f in irods_files if f.path.startswith(assay.irods_path)]
+            deletion_request_paths = self.gather_deletion_request_paths(
+                irods_files, assay.irods_path
+            )
+        if self.args.dry_run:
+            for path in deletion_request_paths:
                 logger.info(f"DRY-RUN: Would create irods deletion request: {path}")
-                continue
-            res = sodar_api.post_samplesheet_deletion_request_create(path, self.args.description)
-            # UNSURE: break or continue on error?
-            if res:
-                logger.debug(
-                    f"Project UUID: {sodar_api.project_uuid}; Assay UUID: {sodar_api.assay_uuid}"
-                )
-                raise CubiTkException(f"Could not create irods deletion request: {path}")
+            logger.info("All done.")
+            return 0
+
+        failed_paths = self.submit_deletion_requests(sodar_api, deletion_request_paths)
+        if resume_file and failed_paths:
+            with resume_file.open("wt") as outputf:
+                outputf.write("".join(f"{path}\n" for path in failed_paths))
+        elif resume_file and resume_file.exists():
+            resume_file.unlink()
+        if failed_paths:
+            logger.debug(
+                f"Project UUID: {sodar_api.project_uuid}; Assay UUID: {sodar_api.assay_uuid}"
+            )
+            logger.error(
+                "Could not create {} of {} irods deletion requests:\n{}",
+                len(failed_paths),
+                len(deletion_request_paths),
+                "\n".join(failed_paths),
+            )
+            if resume_file:
+                logger.info("Failed paths written to {}, re-run to retry them.", resume_file)
+            return 1
 
         logger.info("All done.")
         return 0
 
+    def submit_deletion_requests(self, sodar_api: SodarApi, paths: list[str]) -> list[str]:
+        """Submit deletion requests concurrently and rate limited, return the failed paths."""
+        parallel_requests = max(1, self.args.parallel_requests)
+        rate_limiter = RateLimiter(self.args.max_requests_per_second)
+        sodar_api.ensure_http_pool_size(parallel_requests)
+
+        def submit(path: str) -> tuple[str, int]:
+            rate_limiter.wait()
+            try:
+                res = sodar_api.post_samplesheet_deletion_request_create(
+                    path, self.args.description
+                )
+            except Exception as e:  # e.g. connection errors, keep going with the other paths
+                logger.error(f"Could not create irods deletion request for {path}: {e}")
+                res = 1
+            return path, res
+
+        failed_paths = []
+        pool = ThreadPool(processes=parallel_requests)
+        try:
+            with tqdm.tqdm(total=len(paths), unit="request") as progress:
+                for path, res in pool.imap_unordered(submit, paths):
+                    if res:
+                        failed_paths.append(path)
+                    progress.update()
+        finally:
+            pool.close()
+            pool.join()
+        return sorted(failed_paths)
+
     def gather_deletion_request_paths(
         self, irods_files: list[IrodsDataObject] | None, assay_path: str
     ) -> list[str]:
@@ -7,7 +7,7 @@ import typing
 from loguru import logger
 
 from cubi_tk.parsers import print_args
-from cubi_tk.sodar_api import SodarApi
+from cubi_tk.sodar_api import SodarApi, read_project_uuids
 
 from ..common import overwrite_helper
 from ..exceptions import OverwriteRefusedException
@@ -83,7 +83,39 @@ class DownloadSheetCommand:
         if not out_path.exists() and self.args.makedirs:
             out_path.mkdir(parents=True)
 
-        isa_dict = sodar_api.get_samplesheet_export(get_all=True)
+        project_uuids = read_project_uuids(self.args)
+        if len(project_uuids) == 1:
+            isa_dict = sodar_api.get_samplesheet_export(get_all=True)
+            if isa_dict is None:
+                return 1
+            return self._write_sheet(out_path, isa_dict)
+
+        # multi-project mode: download concurrently, then write sequentially (writing may be
+        # interactive) into one sub directory per project
+        results = sodar_api.map_projects(
+            project_uuids,
+            lambda project_api: project_api.get_samplesheet_export(get_all=True),
+            parallel_projects=self.args.parallel_projects,
+        )
+        res = 0
+        for project_result in results:
+            if project_result.result is None:
+                res = 1
+                continue
+            project_out_path = out_path / project_result.project_uuid
+            if not project_out_path.exists() and self.args.makedirs:
+                project_out_path.mkdir(parents=True)
+            res = self._write_sheet(project_out_path, project_result.result) or res
+        failed = [r.project_uuid for r in results if r.result is None]
+        logger.info(
+            "Downloaded sheets of {} of {} projects", len(results) - len(failed), len(results)
+        )
+        if failed:
+            logger.error("Failed projects: {}", ", ".join(failed))
+        return res
+
+    def _write_sheet(self, out_path: Path, isa_dict: dict) -> int:
+        """Write investigation, study and assay files of one project."""
         try:
             self._write_file(
                 out_path, isa_dict["investigation"]["path"], isa_dict["investigation"]["tsv"]
@@ -2,10 +2,13 @@
 
 import argparse
 from pathlib import Path
+import re
 import sys
+import typing
 
 from loguru import logger
 
+from cubi_tk.common import DEFAULT_SCAN_THREADS, compile_path_globs, scandir_walk
 from cubi_tk.irods_common import TransferJob
 from cubi_tk.sodar_common import SodarIngestBase
 
@@ -36,7 +39,14 @@ class SodarIngestCollection(SodarIngestBase):
             nargs="+",
             default="",
             type=str,
-            help="Exclude files by defining one or multiple glob-style patterns.",
+            help="Exclude files by defining one or multiple glob-style patterns. Directories matching "
+            "a pattern are skipped with all their contents.",
+        )
+        parser.add_argument(
+            "--parallel-scan-jobs",
+            default=DEFAULT_SCAN_THREADS,
+            type=int,
+            help="Number of threads for listing the source folders. Default: %(default)s",
         )
         parser.add_argument(
             "--collection",
@@ -108,6 +118,7 @@ class SodarIngestCollection(SodarIngestBase):
 
         source_paths = [Path(src) for src in self.args.sources]
         output_paths = []
+        excludes = compile_path_globs(self.args.exclude or ())
 
         for src in source_paths:
             try:
@@ -119,19 +130,37 @@ class SodarIngestCollection(SodarIngestBase):
                 logger.warning(f"Symlink loop: {src.name}")
                 continue
 
-            excludes = self.args.exclude
             if src.is_dir():
-                paths = abspath.glob("**/*" if self.args.recursive else "*")
-                for p in paths:
-                    if excludes and any(p.match(e) for e in excludes):
-                        continue
-                    if p.is_file() and not p.suffix.lower() == hash_ending:
-                        output_paths.append({"spath": p, "ipath": p.relative_to(abspath)})
-            else:
-                if not any(src.match(e) for e in excludes if e):
-                    output_paths.append({"spath": src, "ipath": Path(src.name)})
+                output_paths += [
+                    {"spath": p, "ipath": p.relative_to(abspath)}
+                    for p in self._walk_source_dir(abspath, excludes, hash_ending)
+                ]
+            elif not (excludes and excludes.match(str(src))):
+                output_paths.append({"spath": src, "ipath": Path(src.name)})
         return output_paths
 
+    def _walk_source_dir(
+        self, abspath: Path, excludes: re.Pattern | None, hash_ending: str
+    ) -> typing.Iterator[Path]:
+        """Files below a source directory, without excluded files and checksum files.
+
+        Excluded directories are not entered.
+        """
+        if not self.args.recursive:
+            prune = lambda _path: True  # noqa: E731
+        elif excludes:
+            prune = excludes.match
+        else:
+            prune = None
+        threads = getattr(self.args, "parallel_scan_jobs", DEFAULT_SCAN_THREADS)
+        for _, entries in scandir_walk(abspath, threads, prune=prune):
+            for entry in entries:
+                if excludes and excludes.match(entry.path):
+                    continue
+                if entry.name.lower().endswith(hash_ending) or not entry.is_file():
+                    continue
+                yield Path(entry.path)
+
     def build_jobs(self, hash_ending: str) -> list[TransferJob]:
         """Build file transfer jobs."""
 
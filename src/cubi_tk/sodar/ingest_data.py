@@ -2,7 +2,7 @@
 
 import argparse
 import datetime
-import glob
+from fnmatch import fnmatchcase
 from multiprocessing import Value
 import os
 import pathlib
@@ -13,7 +13,8 @@ import typing
 from loguru import logger
 import tqdm
 
-from ..exceptions import MissingFileException, ParameterException, UserCanceledException
+from ..common import DEFAULT_SCAN_THREADS, regex_literal_prefix, scandir_walk
+from ..exceptions import ParameterException, UserCanceledException
 from ..irods_common import TransferJob
 from cubi_tk.sodar_common import SodarIngestBase
 
@@ -66,6 +67,11 @@ DEST_PATTERN_PRESETS = {
 #: Default number of parallel transfers.
 DEFAULT_NUM_TRANSFERS = 8
 
+#: Endings of checksum files, these are skipped as they are added automatically.
+# dragen generates .md5sum, this prevents generation of eg .md5sum.sha256 or .md5sum.md5
+# TODO: add list of skippable endings as cmd-line option (default [.md5sum])
+SKIP_ENDINGS = (".md5", ".sha256", ".md5sum")
+
 
 class SodarIngestData(SodarIngestBase):
     """Implementation of sodar ingest-data command."""
@@ -145,6 +151,21 @@ class SodarIngestData(SodarIngestBase):
             "If not set, the last material column will be used. If it matches multiple "
             "columns the last one can be used.",
         )
+        parser.add_argument(
+            "--include-dir",
+            action="append",
+            default=[],
+            metavar="PATTERN",
+            help="Only descend into directories matching this glob pattern, relative to the source "
+            "folders and matched component by component, e.g. 'Data/*/BaseCalls' (directories below "
+            "a matching one are always included). Can be given multiple times.",
+        )
+        parser.add_argument(
+            "--parallel-scan-jobs",
+            default=DEFAULT_SCAN_THREADS,
+            type=int,
+            help="Number of threads for listing the source folders. Default: %(default)s",
+        )
         parser.add_argument(
             "--tmp",
             default="temp/",
@@ -362,7 +383,6 @@ class SodarIngestData(SodarIngestBase):
         else:
             column_match = None
 
-        folders = self.args.sources
         transfer_jobs = []
 
         if self.args.src_regex:
@@ -371,69 +391,104 @@ class SodarIngestData(SodarIngestBase):
             use_regex = re.compile(SRC_REGEX_PRESETS[self.args.preset])
         # logger.debug(f"Using regex: {use_regex}")
 
-        for folder in folders:
-            for path in glob.iglob(f"{folder}/**/*", recursive=True):
-                real_path = os.path.realpath(path)
-                if not os.path.isfile(real_path):
-                    continue  # skip if did not resolve to file
-                # dragen generates .md5sum, this prevents generation of eg .md5sum.sha256 or .md5sum.md5
-                # TODO: add list of skippable endings as cmd-line option (default [.md5sum]) and use that variable here
-                if real_path.endswith((".md5", ".sha256", ".md5sum")):
-                    continue  # skip, will be added automatically
+        for path, real_path, m in self.find_source_files(use_regex):
+            logger.debug("Matched {} with regex {}: {}", path, use_regex, m.groupdict())
+            match_wildcards = dict(
+                item
+                for item in m.groupdict(default="").items()
+                if item[0] in self.dest_pattern_fields
+            )
 
-                if not os.path.exists(real_path):  # pragma: nocover
-                    raise MissingFileException("Missing file %s" % real_path)
-
-                # logger.debug(f"Checking file: {path}")
-                m = re.match(use_regex, path)
-                if m:
-                    logger.debug("Matched {} with regex {}: {}", path, use_regex, m.groupdict())
-                    match_wildcards = dict(
-                        item
-                        for item in m.groupdict(default="").items()
-                        if item[0] in self.dest_pattern_fields
+            # `-m` regex now only applied to extracted sample name
+            sample_name = m.groupdict(default="")["sample"]
+            for m_pat, r_pat in self.args.sample_collection_mapping:
+                sample_name = re.sub(m_pat, r_pat, sample_name)
+            try:
+                collection_name = self.find_collection_name(sample_name, column_match, m)
+                logger.debug(f"sample-name: {sample_name}, collection_name: {collection_name}")
+                remote_file = pathlib.Path(self.lz_irods_path) / self.remote_dir_pattern.format(
+                    # Removed the `+ self.args.add_suffix` here, since adding anything after the file extension is a bad idea
+                    filename=pathlib.Path(path).name,
+                    date=self.args.remote_dir_date,
+                    collection_name=collection_name,
+                    **match_wildcards,
+                )
+                # if onko and germline analysisdata change analysis to germline_analysis
+                # TODO: maybe set as commandline/option in presets
+                if self.args.preset == "onk_analysis" and "DragenGermline" in path:
+                    remote_file.replace("analysis", "germline_analysis")
+            except KeyError:
+                msg = (
+                    f"Could not match extracted sample value '{sample_name}' to any value in the "
+                    f"--match-column {self.args.match_column}. Please review the assay table, src-regex and sample-collection-mapping args."
+                )
+                logger.error(msg)
+                raise ParameterException(msg) from KeyError
+
+            for ext in ("", hash_ending):
+                transfer_jobs.append(
+                    TransferJob(
+                        path_local=real_path + ext,
+                        path_remote=str(remote_file) + ext,
                     )
-
-                    # `-m` regex now only applied to extracted sample name
-                    sample_name = m.groupdict(default="")["sample"]
-                    for m_pat, r_pat in self.args.sample_collection_mapping:
-                        sample_name = re.sub(m_pat, r_pat, sample_name)
-                    try:
-                        collection_name = self.find_collection_name(sample_name, column_match, m)
-                        logger.debug(
-                            f"sample-name: {sample_name}, collection_name: {collection_name}"
-                        )
-                        remote_file = pathlib.Path(
-                            self.lz_irods_path
-                        ) / self.remote_dir_pattern.format(
-                            # Removed the `+ self.args.add_suffix` here, since adding anything after the file extension is a bad idea
-                            filename=pathlib.Path(path).name,
-                            date=self.args.remote_dir_date,
-                            collection_name=collection_name,
-                            **match_wildcards,
-                        )
-                        # if onko and germline analysisdata change analysis to germline_analysis
-                        # TODO: maybe set as commandline/option in presets
-                        if self.args.preset == "onk_analysis" and "DragenGermline" in path:
-                            remote_file.replace("analysis", "germline_analysis")
-                    except KeyError:
-                        msg = (
-                            f"Could not match extracted sample value '{sample_name}' to any value in the "
-                            f"--match-column {self.args.match_column}. Please review the assay table, src-regex and sample-collection-mapping args."
-                        )
-                        logger.error(msg)
-                        raise ParameterException(msg) from KeyError
-
-                    for ext in ("", hash_ending):
-                        transfer_jobs.append(
-                            TransferJob(
-                                path_local=real_path + ext,
-                                path_remote=str(remote_file) + ext,
-                            )
-                        )
+                )
 
         return tuple(sorted(transfer_jobs, key=lambda x: x.path_local))
 
+    def find_source_files(
+        self, use_regex: typing.Pattern
+    ) -> typing.Iterator[tuple[str, str, typing.Match]]:
+        """Find files in the source folders matching ``use_regex``.
+
+        Yields the path (below the source folder, as matched by the regex), the resolved path and
+        the match. Like ``glob.glob("<folder>/**/*")``, hidden files and directories are skipped and
+        symlinks to directories are followed. The source folders are listed concurrently and
+        directories that cannot contain matches are not entered. Only matching files are resolved.
+        """
+        roots = [folder.rstrip("/") or "/" for folder in self.args.sources]
+        prune = self._make_prune(use_regex, roots)
+        for _, entries in scandir_walk(
+            roots, self.args.parallel_scan_jobs, prune=prune, follow_symlinks=True
+        ):
+            for entry in entries:
+                # cheap checks on the name first
+                if entry.name.startswith(".") or entry.name.endswith(SKIP_ENDINGS):
+                    continue
+                m = use_regex.match(entry.path)
+                if not m or not entry.is_file():
+                    continue  # skip if did not match or did not resolve to file
+                real_path = os.path.realpath(entry.path)
+                if real_path.endswith(SKIP_ENDINGS):
+                    continue  # skip, will be added automatically
+                yield entry.path, real_path, m
+
+    def _make_prune(
+        self, use_regex: typing.Pattern, roots: list[str]
+    ) -> typing.Callable[[str], bool]:
+        """Return function telling whether a directory cannot contain files to ingest."""
+        # `re.match` is anchored at the start, so the literal prefix must be part of every match
+        pattern = use_regex.pattern
+        prefix = regex_literal_prefix(pattern if pattern.startswith("^") else "^" + pattern)
+        include_dirs = [pattern.strip("/").split("/") for pattern in self.args.include_dir]
+        # nested sources: the deepest root is the relevant one
+        roots = sorted(roots, key=len, reverse=True)
+
+        def prune(directory: str) -> bool:
+            if os.path.basename(directory).startswith("."):
+                return True
+            dir_path = directory + "/"
+            if prefix and not (dir_path.startswith(prefix) or prefix.startswith(dir_path)):
+                return True
+            if include_dirs:
+                root = next(r for r in roots if dir_path.startswith(r.rstrip("/") + "/"))
+                parts = directory[len(root.rstrip("/")) + 1 :].split("/")
+                return not any(
+                    all(map(fnmatchcase, parts, include_dir)) for include_dir in include_dirs
+                )
+            return False
+
+        return prune
+
     def _no_files_found_warning(self, transfer_jobs):
         if not transfer_jobs:
             if self.args.src_regex:
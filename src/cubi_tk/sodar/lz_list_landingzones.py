@@ -8,7 +8,7 @@ import cattr
 from loguru import logger
 
 from cubi_tk.parsers import print_args
-from cubi_tk.sodar_api import LANDING_ZONE_STATES, SodarApi
+from cubi_tk.sodar_api import LANDING_ZONE_STATES, SodarApi, read_project_uuids
 
 
 class ListLandingZoneCommand:
@@ -62,17 +62,35 @@ class ListLandingZoneCommand:
         sodar_api = SodarApi(self.args, with_dest=True)
         print_args(self.args)
 
-        existing_lzs = sodar_api.get_landingzone_list(filter_for_state=self.args.filter_status)
-        if existing_lzs is None:
-            return 1
-        for lz in existing_lzs:
-            values = cattr.unstructure(lz)
-            if self.args.format_string:
-                print(self.args.format_string.replace(r"\t", "\t") % values)
-            else:
-                print(json.dumps(values, indent=4))
-
-        return 0
+        project_uuids = read_project_uuids(self.args)
+        results = sodar_api.map_projects(
+            project_uuids,
+            lambda project_api: project_api.get_landingzone_list(
+                filter_for_state=self.args.filter_status
+            ),
+            parallel_projects=getattr(self.args, "parallel_projects", 1),
+        )
+        res = 0
+        for project_result in results:
+            existing_lzs = project_result.result
+            if existing_lzs is None:
+                res = 1
+                continue
+            for lz in existing_lzs:
+                values = cattr.unstructure(lz)
+                if self.args.format_string:
+                    print(self.args.format_string.replace(r"\t", "\t") % values)
+                else:
+                    print(json.dumps(values, indent=4))
+
+        if len(results) > 1:
+            logger.info("Landing zones per project:")
+            for project_result in results:
+                if project_result.result is None:
+                    logger.info("  {}: FAILED", project_result.project_uuid)
+                else:
+                    logger.info("  {}: {}", project_result.project_uuid, len(project_result.result))
+        return res
 
 
 def setup_argparse(parser: argparse.ArgumentParser) -> None:
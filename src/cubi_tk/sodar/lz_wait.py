@@ -0,0 +1,106 @@
+"""``cubi-tk sodar landing-zone-wait`` command line program"""
+
+import argparse
+import typing
+
+from loguru import logger
+
+from cubi_tk.parsers import print_args
+from cubi_tk.sodar_api import (
+    LANDING_ZONE_TERMINAL_STATES,
+    POLL_INITIAL_INTERVAL,
+    POLL_MAX_INTERVAL,
+    SodarApi,
+)
+
+#: Final states that count as success.
+SUCCESS_STATES = ("MOVED", "DELETED")
+
+
+class WaitLandingZoneCommand:
+    """Implementation of the ``landing-zone-wait`` command."""
+
+    def __init__(self, args):
+        #: Command line arguments.
+        self.args = args
+
+    @classmethod
+    def setup_argparse(cls, parser: argparse.ArgumentParser) -> None:
+        """Setup argument parser."""
+        parser.add_argument(
+            "--hidden-cmd", dest="sodar_cmd", default=cls.run, help=argparse.SUPPRESS
+        )
+        parser.add_argument(
+            "--until-status",
+            dest="until_status",
+            default=None,
+            action="append",
+            help="Status to wait for, can be given multiple times. Defaults to the terminal states "
+            f"{', '.join(LANDING_ZONE_TERMINAL_STATES)}.",
+        )
+        parser.add_argument(
+            "--timeout",
+            default=None,
+            type=float,
+            help="Stop waiting after this many seconds (default: wait forever).",
+        )
+        parser.add_argument(
+            "--poll-initial-interval",
+            default=POLL_INITIAL_INTERVAL,
+            type=float,
+            help="Seconds between the first polls of a landing zone (default: %(default)s).",
+        )
+        parser.add_argument(
+            "--poll-max-interval",
+            default=POLL_MAX_INTERVAL,
+            type=float,
+            help="Upper bound for the seconds between two polls of a landing zone, the interval "
+            "grows exponentially until then (default: %(default)s).",
+        )
+        parser.add_argument(
+            "landing_zone_uuids", nargs="+", help="UUIDs of the landing zones to wait for."
+        )
+
+    @classmethod
+    def run(
+        cls, args, _parser: argparse.ArgumentParser, _subparser: argparse.ArgumentParser
+    ) -> typing.Optional[int]:
+        """Entry point into the command."""
+        return cls(args).execute()
+
+    def execute(self) -> typing.Optional[int]:
+        """Execute waiting for the landing zones."""
+        sodar_api = SodarApi(self.args)
+        logger.info("Starting cubi-tk sodar landing-zone-wait")
+        print_args(self.args)
+
+        until_states = self.args.until_status or LANDING_ZONE_TERMINAL_STATES
+        results = sodar_api.wait_for_landingzones(
+            self.args.landing_zone_uuids,
+            until_states=until_states,
+            timeout=self.args.timeout,
+            initial_interval=self.args.poll_initial_interval,
+            max_interval=self.args.poll_max_interval,
+        )
+
+        res = 0
+        for lz_uuid, result in results.items():
+            print(
+                "\t".join(
+                    (
+                        lz_uuid,
+                        result.status or "UNKNOWN",
+                        f"{result.duration:.1f}",
+                        "TIMEOUT" if result.timed_out else "",
+                        result.status_info,
+                    )
+                )
+            )
+            if result.timed_out or result.status not in (self.args.until_status or SUCCESS_STATES):
+                res = 1
+        return res
+
+
+def setup_argparse(parser: argparse.ArgumentParser) -> None:
+    """Setup argument parser for ``cubi-tk sodar landing-zone-wait``."""
+    return WaitLandingZoneCommand.setup_argparse(parser)
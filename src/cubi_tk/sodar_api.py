@@ -1,17 +1,30 @@
 import argparse
+import codecs
+import copy
 from functools import reduce
+import heapq
+import json
+from multiprocessing.pool import ThreadPool
+import re
 import sys
 import time
-from typing import List, Literal
+import typing
+from typing import Iterable, Iterator, List, Literal
 import urllib.parse as urlparse
 from uuid import UUID
+import weakref
 
+import attr
 import cattr
 from loguru import logger
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from cubi_tk.common import is_uuid
 from cubi_tk import api_models
+from cubi_tk.sodar_cache import DEFAULT_CACHE_TTL, SodarResponseCache
+from cubi_tk.sodar_trace import HttpTraceRecord, HttpTracer, count_retries, response_size
 
 import toml
 import os
@@ -49,10 +62,186 @@ def multi_assay_study_warning(content: dict, string: str = "Assays") -> None:
     )
 
 
+#: Whitespace allowed between JSON tokens.
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(chunks: Iterable[bytes | str]) -> Iterator[typing.Any]:  # noqa: C901
+    """Incrementally decode a top-level JSON array, yielding its elements one by one.
+
+    Only the current chunk and the element being decoded are held in memory, so arbitrarily large
+    arrays (e.g. the SODAR file list) can be consumed from a streamed HTTP response.
+    """
+    decoder = json.JSONDecoder()
+    utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    # parser state: "start" (expect "["), "value" (expect element or "]"),
+    # "separator" (expect "," or "]") and "end"
+    state = "start"
+    chunks = iter(chunks)
+    final = False
+    while not final:
+        chunk = next(chunks, None)
+        if chunk is None:
+            final = True
+            chunk = utf8_decoder.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = utf8_decoder.decode(chunk)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if state == "start":
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected JSON array, got {buffer[pos : pos + 20]!r}")
+                pos += 1
+                state = "value"
+            elif state == "separator" or (state == "value" and buffer[pos] == "]"):
+                if buffer[pos] == "]":
+                    pos += 1
+                    state = "end"
+                elif buffer[pos] == ",":
+                    pos += 1
+                    state = "value"
+                else:
+                    raise ValueError(f"Expected ',' or ']', got {buffer[pos : pos + 20]!r}")
+            elif state == "value":
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # element incomplete, wait for more data
+                if end == len(buffer) and not final:
+                    break  # a number at the end of the buffer might continue in the next chunk
+                pos = end
+                state = "separator"
+                yield element
+            else:  # state == "end"
+                raise ValueError(f"Unexpected data after JSON array: {buffer[pos : pos + 20]!r}")
+    if state != "end":
+        raise ValueError("Incomplete JSON array")
+
+
+def read_project_uuids(args: argparse.Namespace) -> list[str]:
+    """Collect project UUIDs from the positional argument and the optional ``--projects-file``.
+
+    Empty lines and lines starting with ``#`` in the file are ignored, duplicates are removed.
+    """
+    project_uuids = [args.project_uuid] if getattr(args, "project_uuid", None) else []
+    projects_file = getattr(args, "projects_file", None)
+    if projects_file:
+        with open(projects_file, "rt") as inputf:
+            for line in inputf:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    project_uuids.append(line)
+    invalid = [p for p in project_uuids if not is_uuid(p)]
+    if invalid:
+        raise ParameterException(f"Invalid project UUIDs: {', '.join(invalid)}")
+    return list(dict.fromkeys(project_uuids))
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class ProjectResult:
+    """Result of an operation on one project in multi-project mode."""
+
+    #: UUID of the project.
+    project_uuid: str
+    #: Return value of the operation, ``None`` on error.
+    result: typing.Any = None
+    #: Exception raised by the operation, if any.
+    error: typing.Optional[Exception] = None
+
+
 SODAR_API_VERSION_SAMPLESHEETS = 1.1
 SODAR_API_VERSION_LANDINGZONES = 1.0
 
 LANDING_ZONE_STATES = ["ACTIVE", "FAILED", "VALIDATING"]
+#: Landing zone states that do not change without further user action.
+LANDING_ZONE_TERMINAL_STATES = ["MOVED", "FAILED", "DELETED", "NOT CREATED"]
+
+#: First interval in seconds between two polls of a landing zone.
+POLL_INITIAL_INTERVAL = 1.0
+#: Upper bound for the interval in seconds between two polls of a landing zone.
+POLL_MAX_INTERVAL = 30.0
+#: Factor by which the poll interval grows after each poll.
+POLL_BACKOFF_FACTOR = 1.5
+
+
+def iter_poll_intervals(
+    initial: float = POLL_INITIAL_INTERVAL,
+    maximum: float = POLL_MAX_INTERVAL,
+    factor: float = POLL_BACKOFF_FACTOR,
+) -> Iterator[float]:
+    """Yield exponentially growing poll intervals, capped at ``maximum``."""
+    interval = initial
+    while True:
+        yield min(interval, maximum)
+        interval *= factor
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class LandingZoneWaitResult:
+    """Outcome of waiting for a landing zone."""
+
+    #: UUID of the landing zone.
+    sodar_uuid: str
+    #: Last seen status, ``None`` if the landing zone could not be retrieved.
+    status: typing.Optional[str]
+    #: Seconds from the start of waiting until the final status was seen.
+    duration: float
+    #: Last seen status information.
+    status_info: str = ""
+    #: Whether waiting stopped because of the timeout.
+    timed_out: bool = False
+
+
+#: Read-only endpoints whose (large) responses are kept in the on-disk cache.
+DISK_CACHED_ACTIONS = {
+    ("samplesheets", "export/json"),
+    ("samplesheets", "investigation/retrieve"),
+    ("samplesheets", "remote/get"),
+}
+
+#: Default number of projects processed concurrently in multi-project mode.
+DEFAULT_PARALLEL_PROJECTS = 8
+
+#: Chunk size in bytes for reading streamed responses.
+HTTP_STREAM_CHUNK_SIZE = 1 << 16
+
+#: Number of connections kept alive per host in the HTTP connection pool.
+HTTP_POOL_MAXSIZE = 10
+#: Number of retries for idempotent requests on connection errors or transient server errors.
+HTTP_RETRY_TOTAL = 3
+#: Backoff factor for retries, sleeps are ``backoff_factor * 2 ** (retry - 1)`` seconds.
+HTTP_RETRY_BACKOFF_FACTOR = 0.5
+#: HTTP status codes of the SODAR frontend that warrant a retry.
+HTTP_RETRY_STATUS_FORCELIST = (502, 503, 504)
+
+
+def make_http_session(pool_maxsize: int = HTTP_POOL_MAXSIZE) -> requests.Session:
+    """Create a ``requests.Session`` with keep-alive connection pooling and retries.
+
+    Only idempotent ``GET`` requests are retried, ``POST`` requests (e.g. landing zone creation) are
+    never repeated automatically. After the last retry the final response is returned so the caller
+    can handle the status code.
+    """
+    retry = Retry(
+        total=HTTP_RETRY_TOTAL,
+        backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS_FORCELIST,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 class SodarApi:
@@ -94,8 +283,143 @@ class SodarApi:
                 "Accept": f"application/vnd.bihealth.sodar.landingzones+json; version={SODAR_API_VERSION_LANDINGZONES}",
             },
         }
+        # persistent session, re-uses TCP/TLS connections for all API calls of this instance
+        self.http_pool_maxsize = HTTP_POOL_MAXSIZE
+        self.session = make_http_session(self.http_pool_maxsize)
+        # memoized responses of read-only endpoints, cleared after every POST request
+        self._response_cache: dict[tuple[str, str, str, str], typing.Any] = {}
+        # persistent on-disk cache, only enabled through the command line options of
+        # `get_sodar_parser()` so that programmatic use never touches the user's cache directory
+        self.disk_cache = None
+        self.refresh_cache = getattr(args, "refresh_cache", False)
+        if not getattr(args, "no_cache", True):
+            self.disk_cache = SodarResponseCache(
+                cache_dir=getattr(args, "cache_dir", None),
+                ttl=getattr(args, "cache_ttl", DEFAULT_CACHE_TTL),
+            )
+        # timing of all requests, shared with the instances of `for_project()`; the summary is
+        # logged once this instance is garbage collected or at interpreter exit
+        self.tracer = HttpTracer(getattr(args, "trace_http", None))
+        weakref.finalize(self, self.tracer.close)
 
-    def _api_call(
+    def _memoized_api_call(
+        self,
+        api: Literal["samplesheets", "landingzones"],
+        action: str,
+        params: dict = None,
+        dest_uuid: UUID = None,
+    ):
+        """Return the (cached) JSON response of a read-only GET endpoint.
+
+        Responses are kept for the lifetime of this instance (i.e. one command invocation) and dropped
+        by ``clear_cache()``, which is called after each POST. The cached object is shared between
+        calls, callers must not modify it. Endpoints in ``DISK_CACHED_ACTIONS`` are additionally
+        looked up in the on-disk cache (if enabled).
+        """
+        key = (api, action, str(dest_uuid or self.project_uuid), urlparse.urlencode(params or {}))
+        if key in self._response_cache:
+            logger.debug("Using cached response for {} {}", api, action)
+        elif self.disk_cache is not None and (api, action) in DISK_CACHED_ACTIONS:
+            self._response_cache[key] = self._disk_cached_api_call(api, action, params, dest_uuid)
+        else:
+            self._response_cache[key] = self._api_call(
+                api, action, params=params, dest_uuid=dest_uuid
+            )
+        return self._response_cache[key]
+
+    def _disk_cached_api_call(
+        self,
+        api: Literal["samplesheets", "landingzones"],
+        action: str,
+        params: dict = None,
+        dest_uuid: UUID = None,
+    ):
+        """GET with the on-disk cache, revalidating entries via ``ETag``/``Last-Modified``."""
+        project_uuid = str(dest_uuid or self.project_uuid)
+        endpoint = f"{api}/{action}"
+        if params:
+            endpoint += "?" + urlparse.urlencode(params)
+        entry = None
+        if not self.refresh_cache:
+            entry = self.disk_cache.get(self.sodar_server_url, project_uuid, endpoint)
+        if entry is not None and entry.is_fresh(self.disk_cache.ttl):
+            logger.debug("Using on-disk cached response for {} (within TTL)", endpoint)
+            return entry.body
+
+        headers = entry.conditional_headers() if entry is not None else None
+        response = self._api_request(
+            api, action, params=params, dest_uuid=dest_uuid, headers=headers
+        )
+        if entry is not None and response.status_code == 304:
+            logger.debug("On-disk cached response for {} is still valid", endpoint)
+            self.disk_cache.touch(self.sodar_server_url, project_uuid, endpoint, entry)
+            return entry.body
+
+        body = response.json()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # without validators, an entry can only ever be re-used within the TTL
+        if etag or last_modified or self.disk_cache.ttl > 0:
+            self.disk_cache.put(
+                self.sodar_server_url, project_uuid, endpoint, body, etag, last_modified
+            )
+        return body
+
+    def clear_cache(self):
+        """Drop all memoized API responses."""
+        self._response_cache.clear()
+
+    def ensure_http_pool_size(self, size: int):
+        """Make sure that ``size`` threads can each keep their own connection alive."""
+        if size > self.http_pool_maxsize:
+            self.http_pool_maxsize = size
+            self.session = make_http_session(self.http_pool_maxsize)
+
+    def for_project(self, project_uuid: str) -> "SodarApi":
+        """Return a copy of this instance for another project.
+
+        The copy shares the HTTP session (and thus its connection pool) and the on-disk cache, but
+        has its own memoized responses and no assay or landing zone selected.
+        """
+        project_api = copy.copy(self)
+        project_api.project_uuid = project_uuid
+        project_api.assay_uuid = None
+        project_api.lz_path = None
+        project_api._response_cache = {}
+        return project_api
+
+    def map_projects(
+        self,
+        project_uuids: Iterable[str],
+        func: typing.Callable[["SodarApi"], typing.Any],
+        parallel_projects: int = DEFAULT_PARALLEL_PROJECTS,
+    ) -> list[ProjectResult]:
+        """Call ``func`` with a ``SodarApi`` instance for each project, running up to
+        ``parallel_projects`` calls concurrently over the shared connection pool.
+
+        Exceptions are collected per project instead of aborting the other projects. The results
+        are returned in the order of ``project_uuids``.
+        """
+        project_uuids = list(project_uuids)
+        self.ensure_http_pool_size(parallel_projects)
+
+        def run_for_project(project_uuid: str) -> ProjectResult:
+            try:
+                return ProjectResult(project_uuid, result=func(self.for_project(project_uuid)))
+            except Exception as e:
+                logger.error("Failed to process project {}: {}", project_uuid, e)
+                return ProjectResult(project_uuid, error=e)
+
+        if parallel_projects <= 1 or len(project_uuids) <= 1:
+            return [run_for_project(project_uuid) for project_uuid in project_uuids]
+        pool = ThreadPool(processes=min(parallel_projects, len(project_uuids)))
+        try:
+            return pool.map(run_for_project, project_uuids)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _api_request(
         self,
         api: Literal["samplesheets", "landingzones"],
         action: str,
@@ -104,7 +428,9 @@ class SodarApi:
         data: dict = None,
         files: dict = None,
         dest_uuid: UUID = None,
-    ) -> dict:
+        headers: dict = None,
+        stream: bool = False,
+    ) -> requests.Response:
         # need to add trailing slashes to all parts of the URL for urljoin to work correctly
         # afterward remove the final trailing slash from the joined URL
         if dest_uuid is None:
@@ -120,37 +446,105 @@ class SodarApi:
             # For POST requests, params are sent in the body, not as query parameters
             data = data or {}
             data.update(params)
+        request_headers = self.sodar_headers[api]
+        if headers:
+            request_headers = {**request_headers, **headers}
 
         if method == "get":
-            logger.debug(f"HTTP GET request to {url} with headers {self.sodar_headers[api]}")
-            response = requests.get(url, headers=self.sodar_headers[api])
+            logger.debug(f"HTTP GET request to {url} with headers {request_headers}")
+            kwargs = (
+                {"headers": request_headers, "stream": True}
+                if stream
+                else {"headers": request_headers}
+            )
         elif method == "post":
+            # any POST may change server state, do not trust memoized responses anymore
+            self.clear_cache()
+            if api == "samplesheets" and self.disk_cache is not None:
+                self.disk_cache.invalidate(self.sodar_server_url, str(dest_uuid))
             logger.debug(
-                f"HTTP POST request to {url} with headers {self.sodar_headers[api]}, files {files}, and data {data}"
+                f"HTTP POST request to {url} with headers {request_headers}, files {files}, and data {data}"
             )
-            response = requests.post(url, headers=self.sodar_headers[api], files=files, data=data)
+            kwargs = {"headers": request_headers, "files": files, "data": data}
         else:
             raise ValueError("Unknown HTTP method.")
+        response = self._traced_request(f"{api}/{action}", method, url, **kwargs)
 
-        if response.status_code != 200 and response.status_code != 201:
+        # 304 Not Modified is only returned for conditional requests
+        ok_status_codes = (200, 201, 304) if headers else (200, 201)
+        if response.status_code not in ok_status_codes:
             raise SodarApiException(
                 response.status_code,
                 f"API response: {response.text} and status code: {response.status_code}",
             )
 
+        return response
+
+    def _traced_request(self, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Send request through the session, recording timing, size and retries in ``self.tracer``."""
+        start_time, start = time.time(), time.monotonic()
+        try:
+            response = getattr(self.session, method)(url, **kwargs)
+        except requests.RequestException as e:
+            self.tracer.record(
+                HttpTraceRecord(
+                    start_time,
+                    method.upper(),
+                    endpoint,
+                    url,
+                    None,
+                    time.monotonic() - start,
+                    None,
+                    error=str(e),
+                )
+            )
+            raise
+        self.tracer.record(
+            HttpTraceRecord(
+                start_time,
+                method.upper(),
+                endpoint,
+                url,
+                response.status_code,
+                time.monotonic() - start,
+                response_size(response, stream=kwargs.get("stream", False)),
+                retries=count_retries(response),
+            )
+        )
+        return response
+
+    def _api_call(
+        self,
+        api: Literal["samplesheets", "landingzones"],
+        action: str,
+        method: Literal["get", "post"] = "get",
+        params: dict = None,
+        data: dict = None,
+        files: dict = None,
+        dest_uuid: UUID = None,
+    ) -> dict:
+        response = self._api_request(
+            api,
+            action,
+            method=method,
+            params=params,
+            data=data,
+            files=files,
+            dest_uuid=dest_uuid,
+        )
         return response.json()
 
     # Samplesheet api calls
     def get_samplesheet_export(self, get_all: bool = False) -> dict[str, dict] | None:
         logger.debug("Exporting samplesheet..")
         try:
-            samplesheet = self._api_call("samplesheets", "export/json")
+            samplesheet = self._memoized_api_call("samplesheets", "export/json")
         except SodarApiException as e:
             logger.error(f"Failed to export samplesheet:\n{e}")
             return None
         if get_all:
             logger.debug("Returning all samplesheet infos : {}", samplesheet)
-            return samplesheet
+            return copy.deepcopy(samplesheet)
 
         study_name = list(samplesheet["studies"].keys())[0]
         assay_name = list(samplesheet["assays"].keys())[0]
@@ -170,14 +564,14 @@ class SodarApi:
         logger.debug(
             "Returning all samplesheet with single assay and study : {}", small_samplesheet
         )
-        return small_samplesheet
+        return copy.deepcopy(small_samplesheet)
 
     def get_samplesheet_investigation_retrieve(
         self, log_error=True
     ) -> api_models.Investigation | None:
         logger.debug("Get investigation information.")
         try:
-            investigationJson = self._api_call("samplesheets", "investigation/retrieve")
+            investigationJson = self._memoized_api_call("samplesheets", "investigation/retrieve")
             investigation = cattr.structure(investigationJson, api_models.Investigation)
         except SodarApiException as e:
             if log_error:
@@ -191,24 +585,39 @@ class SodarApi:
         logger.debug("Get remote samplesheet isa information.")
         # valid Uri?
         try:
-            samplesheet = self._api_call("samplesheets", "remote/get", params={"isa": 1})
+            samplesheet = self._memoized_api_call("samplesheets", "remote/get", params={"isa": 1})
         except SodarApiException as e:
             logger.error(f"Failed to retrieve samplesheets information:\n{e}")
             return None
         logger.debug(f"Got samplesheet: {samplesheet}")
-        return samplesheet
+        return copy.deepcopy(samplesheet)
 
     def get_samplesheet_file_list(self) -> list[api_models.IrodsDataObject] | None:
         logger.debug("Getting irods file list")
         try:
-            json_filelist = self._api_call("samplesheets", "file/list")
+            json_filelist = self._memoized_api_call("samplesheets", "file/list")
         except SodarApiException as e:
             logger.error(f"Failed to retrieve Sodar file list:\n{e}")
             return None
-        filelist = [cattr.structure(obj, api_models.IrodsDataObject) for obj in json_filelist]
+        filelist = [api_models.structure_irods_data_object(obj) for obj in json_filelist]
 
         return filelist
 
+    def iter_samplesheet_file_list(self) -> Iterator[api_models.IrodsDataObject]:
+        """Stream the iRODS file list, decoding one data object at a time.
+
+        In contrast to ``get_samplesheet_file_list()`` the response is neither loaded into memory
+        completely nor memoized, so memory use only depends on what the consumer retains. Raises
+        ``SodarApiException`` on the first iteration if the request fails.
+        """
+        logger.debug("Streaming irods file list")
+        response = self._api_request("samplesheets", "file/list", stream=True)
+        try:
+            for obj in iter_json_array(response.iter_content(chunk_size=HTTP_STREAM_CHUNK_SIZE)):
+                yield api_models.structure_irods_data_object(obj)
+        finally:
+            response.close()
+
     def post_samplesheet_import(
         self,
         files_dict: dict[str, tuple[str, str]],
@@ -258,13 +667,13 @@ class SodarApi:
 
     # landingzone Api calls
     def get_landingzone_retrieve(
-        self, lz_uuid: UUID = None, log_error=True
+        self, lz_uuid: UUID = None, log_error=True, use_cache=True
     ) -> api_models.LandingZone | None:
         logger.debug("Retrieving Landing Zone ...")
+        # if lz_uuid is None: assume projectuuid is lz_uuid
+        api_call = self._memoized_api_call if use_cache else self._api_call
         try:
-            landingzone = self._api_call(
-                "landingzones", "retrieve", dest_uuid=lz_uuid
-            )  # if None: assume projectuuid is lz_uuid
+            landingzone = api_call("landingzones", "retrieve", dest_uuid=lz_uuid)
             landingzone = cattr.structure(landingzone, api_models.LandingZone)
             self.project_uuid = landingzone.project
             self.lz_path = landingzone.irods_path
@@ -320,17 +729,20 @@ class SodarApi:
                 logger.info("Landingzone creation triggered successfully.")
             lz = cattr.structure(ret_val, api_models.LandingZone)
             self.lz_path = lz.irods_path
-            logged = False
-            while wait_until_ready:
+            if wait_until_ready:
                 # check that async LZ creation task is done
-                if not logged:
-                    logger.info("Waiting for end of landingzone creation.")
-                    logged = True
-                lzs = self.get_landingzone_list(filter_for_state=["ACTIVE"])
-                if len(lzs) == 1:
-                    wait_until_ready = False
-                logger.debug("Waiting 5 seconds for LZ {} to become usable...", lz.sodar_uuid)
-                time.sleep(5)  # wait and ask API again
+                logger.info("Waiting for end of landingzone creation.")
+                result = self.wait_for_landingzones(
+                    [lz.sodar_uuid], until_states=["ACTIVE", "FAILED", "NOT CREATED"]
+                )[lz.sodar_uuid]
+                if result.status != "ACTIVE":
+                    logger.error(
+                        "Landingzone {} did not become usable: {} {}",
+                        lz.sodar_uuid,
+                        result.status,
+                        result.status_info,
+                    )
+                    return None
             return lz
 
         except SodarApiException as e:
@@ -371,6 +783,65 @@ class SodarApi:
             logger.error(f"Failed to validate Landingzone:\n{e}")
             return None
 
+    def wait_for_landingzones(
+        self,
+        lz_uuids: Iterable[str],
+        until_states: Iterable[str] = LANDING_ZONE_TERMINAL_STATES,
+        timeout: typing.Optional[float] = None,
+        initial_interval: float = POLL_INITIAL_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+    ) -> dict[str, LandingZoneWaitResult]:
+        """Poll landing zones until each one reaches one of ``until_states``.
+
+        Each landing zone is polled with its own exponentially growing interval (see
+        ``iter_poll_intervals()``), all zones are tracked concurrently from a single thread by always
+        polling the zone that is due next. Returns a result per landing zone UUID, in input order.
+        """
+        until_states = set(until_states)
+        start = time.monotonic()
+        intervals = {}
+        last_status = {}
+        queue = []
+        for lz_uuid in dict.fromkeys(lz_uuids):
+            intervals[lz_uuid] = iter_poll_intervals(initial_interval, max_interval)
+            queue.append((start, lz_uuid))
+        heapq.heapify(queue)
+
+        results = {}
+        while queue:
+            due, lz_uuid = heapq.heappop(queue)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                lz = cattr.structure(
+                    self._api_call("landingzones", "retrieve", dest_uuid=lz_uuid),
+                    api_models.LandingZone,
+                )
+            except SodarApiException as e:
+                logger.error(f"Failed to retrieve Landingzone {lz_uuid}:\n{e}")
+                results[lz_uuid] = LandingZoneWaitResult(lz_uuid, None, time.monotonic() - start)
+                continue
+            elapsed = time.monotonic() - start
+            if last_status.get(lz_uuid) != lz.status:
+                logger.info("Landingzone {} is {} ({:.0f}s)", lz_uuid, lz.status, elapsed)
+                last_status[lz_uuid] = lz.status
+            if lz.status in until_states or (timeout is not None and elapsed >= timeout):
+                results[lz_uuid] = LandingZoneWaitResult(
+                    lz_uuid,
+                    lz.status,
+                    elapsed,
+                    status_info=lz.status_info,
+                    timed_out=lz.status not in until_states,
+                )
+            else:
+                next_due = time.monotonic() + next(intervals[lz_uuid])
+                if timeout is not None:
+                    next_due = min(next_due, start + timeout)
+                heapq.heappush(queue, (next_due, lz_uuid))
+        # report in the order the landing zones were given
+        return {lz_uuid: results[lz_uuid] for lz_uuid in intervals}
+
     # helper functions
     def get_assay_from_uuid(self) -> tuple[None, None] | tuple[api_models.Assay, api_models.Study]:
         investigation = self.get_samplesheet_investigation_retrieve()
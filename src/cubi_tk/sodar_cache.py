@@ -0,0 +1,142 @@
+"""Persistent on-disk cache for SODAR API responses.
+
+Used by ``SodarApi`` for large, rarely changing read-only responses such as the ISA-tab export. Entries
+are keyed by server, project and endpoint and stored as JSON files below ``~/.cache/cubi-tk`` (or
+``$XDG_CACHE_HOME/cubi-tk``). Entries with an ``ETag`` or ``Last-Modified`` header are revalidated with
+a conditional request, other entries are only re-used within a configurable time-to-live.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import tempfile
+import time
+import typing
+import urllib.parse as urlparse
+
+import attr
+from loguru import logger
+
+#: Default time-to-live in seconds for entries without ``ETag``/``Last-Modified``. With the default of
+#: 0 such entries are never re-used without contacting the server.
+DEFAULT_CACHE_TTL = 0
+
+
+def get_default_cache_dir() -> Path:
+    """Return the default cache directory, honouring ``$XDG_CACHE_HOME``."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(cache_home) / "cubi-tk"
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class CacheEntry:
+    """A cached API response."""
+
+    #: Decoded JSON body of the response.
+    body: typing.Any
+    #: Value of the ``ETag`` response header, if any.
+    etag: typing.Optional[str] = None
+    #: Value of the ``Last-Modified`` response header, if any.
+    last_modified: typing.Optional[str] = None
+    #: Unix timestamp of the last time the entry was fetched or revalidated (the modification time
+    #: of the entry file, which is updated on revalidation).
+    stored_at: float = 0.0
+
+    def is_fresh(self, ttl: int) -> bool:
+        """Whether the entry may be used without asking the server."""
+        return ttl > 0 and time.time() - self.stored_at < ttl
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Request headers for revalidating the entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class SodarResponseCache:
+    """Store SODAR API responses below ``cache_dir/<server>/<project>/``."""
+
+    def __init__(self, cache_dir: typing.Optional[Path] = None, ttl: int = DEFAULT_CACHE_TTL):
+        #: Base directory of the cache.
+        self.cache_dir = Path(cache_dir) if cache_dir else get_default_cache_dir()
+        #: Time-to-live in seconds for entries that cannot be revalidated.
+        self.ttl = ttl
+
+    def _project_dir(self, server_url: str, project_uuid: str) -> Path:
+        netloc = urlparse.urlparse(server_url).netloc or server_url
+        server_dir = re.sub(r"[^A-Za-z0-9._-]", "_", netloc)
+        return self.cache_dir / server_dir / str(project_uuid)
+
+    def _entry_path(self, server_url: str, project_uuid: str, endpoint: str) -> Path:
+        # endpoints contain slashes and query strings, hash them for a flat and safe file name
+        digest = hashlib.sha256(endpoint.encode("utf-8")).hexdigest()[:16]
+        name = re.sub(r"[^A-Za-z0-9]+", "_", endpoint.split("?")[0]).strip("_")
+        return self._project_dir(server_url, project_uuid) / f"{name}.{digest}.json"
+
+    def get(self, server_url: str, project_uuid: str, endpoint: str) -> typing.Optional[CacheEntry]:
+        """Load entry, returns ``None`` if it does not exist or cannot be read."""
+        path = self._entry_path(server_url, project_uuid, endpoint)
+        try:
+            with path.open("rt") as inputf:
+                data = json.load(inputf)
+                # revalidation only updates the modification time, see `touch()`
+                data["stored_at"] = max(
+                    data.get("stored_at", 0.0), os.fstat(inputf.fileno()).st_mtime
+                )
+                return CacheEntry(**data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug("Ignoring unreadable cache entry {}: {}", path, e)
+            return None
+
+    def put(
+        self,
+        server_url: str,
+        project_uuid: str,
+        endpoint: str,
+        body: typing.Any,
+        etag: typing.Optional[str] = None,
+        last_modified: typing.Optional[str] = None,
+    ) -> None:
+        """Store entry, errors are logged and otherwise ignored."""
+        entry = CacheEntry(body=body, etag=etag, last_modified=last_modified, stored_at=time.time())
+        path = self._entry_path(server_url, project_uuid, endpoint)
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # write to temporary file and rename so concurrent readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wt") as outputf:
+                json.dump(attr.asdict(entry), outputf)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cache entry {}: {}", path, e)
+
+    def touch(self, server_url: str, project_uuid: str, endpoint: str, entry: CacheEntry) -> None:
+        """Mark entry as revalidated by updating the modification time of its file, the (possibly
+        large) body is not written again."""
+        path = self._entry_path(server_url, project_uuid, endpoint)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.put(
+                server_url, project_uuid, endpoint, entry.body, entry.etag, entry.last_modified
+            )
+        except OSError as e:
+            logger.warning("Could not update cache entry {}: {}", path, e)
+
+    def invalidate(self, server_url: str, project_uuid: str) -> None:
+        """Remove all entries of a project."""
+        project_dir = self._project_dir(server_url, project_uuid)
+        if not project_dir.exists():
+            return
+        for path in project_dir.glob("*.json"):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:  # pragma: nocover
+                logger.warning("Could not remove cache entry {}: {}", path, e)
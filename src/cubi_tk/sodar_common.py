@@ -1,5 +1,8 @@
 import os
+from pathlib import Path
+import sqlite3
 import sys
+from typing import Iterator
 
 from argparse import Namespace
 from collections import defaultdict
@@ -7,13 +10,25 @@ from collections import defaultdict
 from loguru import logger
 
 from cubi_tk.api_models import IrodsDataObject
-from cubi_tk.common import execute_checksum_files_fix
-from cubi_tk.exceptions import CubiTkException, ParameterException, UserCanceledException
+from cubi_tk.common import execute_checksum_files_fix, sizeof_fmt
+from cubi_tk.exceptions import (
+    CubiTkException,
+    ParameterException,
+    SodarApiException,
+    UserCanceledException,
+)
 from cubi_tk.irods_common import TransferJob, iRODSTransfer, iRODSCommon
 from cubi_tk.sodar_api import SodarApi
+from cubi_tk.sodar_cache import get_default_cache_dir
+from cubi_tk.sodar_inventory import DEFAULT_INVENTORY_MAX_AGE, INVENTORY_FILE_NAME, SodarInventory
+from cubi_tk.transfer_pipeline import TransferPipeline
 from cubi_tk.parsers import print_args
 
 
+#: Plan categories of transfer jobs: not in the landing zone (or project), different size, same size.
+PLAN_CATEGORIES = ("new", "changed", "identical")
+
+
 # API based drop-in replacement for what used to build on the `iRODSRetrieveCollection` class (to be deprecated)
 class RetrieveSodarCollection(SodarApi):
     def __init__(self, argparse: Namespace, **kwargs):
@@ -24,16 +39,49 @@ class RetrieveSodarCollection(SodarApi):
             read_timeout=getattr(argparse, "read_timeout", 600),
         ).irods_hash_scheme()
         self.hash_ending = "." + self.irods_hash_scheme.lower()
+        # like the response cache, the inventory is only enabled through `get_sodar_parser()`, and
+        # only worth keeping if listings may be answered from it
+        self.inventory = None
+        self.inventory_max_age = getattr(argparse, "inventory_max_age", DEFAULT_INVENTORY_MAX_AGE)
+        if not getattr(argparse, "no_cache", True) and self.inventory_max_age > 0:
+            cache_dir = getattr(argparse, "cache_dir", None) or get_default_cache_dir()
+            try:
+                self.inventory = SodarInventory(Path(cache_dir) / INVENTORY_FILE_NAME)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Could not open inventory in {}: {}", cache_dir, e)
 
-    def perform(self, include_hash_files=False) -> dict[str, list[IrodsDataObject]]:
-        filelist = self.get_samplesheet_file_list()
+    def iter_file_list(self) -> Iterator[IrodsDataObject]:
+        """Data objects of the project, from the inventory if the last listing is recent enough."""
+        if self.inventory is None:
+            return self.iter_samplesheet_file_list()
+        age = (
+            None
+            if self.refresh_cache
+            else self.inventory.listing_age(self.sodar_server_url, str(self.project_uuid))
+        )
+        if age is not None and age <= self.inventory_max_age:
+            logger.info("Using inventory of project listed {:.0f}s ago", age)
+            return self.inventory.iter_objects(self.sodar_server_url, str(self.project_uuid))
+        return self.inventory.sync(
+            self.sodar_server_url, str(self.project_uuid), self.iter_samplesheet_file_list()
+        )
 
+    def perform(self, include_hash_files=False) -> dict[str, list[IrodsDataObject]]:
         output_dict = defaultdict(list)
 
-        for obj in filelist:
-            if obj.type == "obj" and obj.name.endswith(self.hash_ending) and not include_hash_files:
-                continue
-            output_dict[obj.name].append(obj)
+        # stream the file list directly into the index instead of materializing it first
+        try:
+            for obj in self.iter_file_list():
+                if (
+                    obj.type == "obj"
+                    and obj.name.endswith(self.hash_ending)
+                    and not include_hash_files
+                ):
+                    continue
+                output_dict[obj.name].append(obj)
+        except SodarApiException as e:
+            logger.error(f"Failed to retrieve Sodar file list:\n{e}")
+            raise
 
         return output_dict
 
@@ -149,6 +197,10 @@ class SodarIngestBase:
         Create a new landing zone (asking for user confirmation unless --yes is given) and check that is usable.
         :return: lz_uuid, lz_irods_path
         """
+        if getattr(self.args, "plan_only", False):
+            # a plan is a read-only view, it must not change anything in SODAR
+            msg = "No active landing zone to plan against, --plan-only does not create one."
+            raise ParameterException(msg)
         if self.sodar_api.yes or (
             input("Can the process create a new landing zone? [yN] ").lower().startswith("y")
         ):
@@ -239,6 +291,104 @@ class SodarIngestBase:
         else:
             return 0
 
+    def get_remote_sizes(self) -> dict[str, int]:
+        """Sizes of data objects already in the landing zone and, with ``--plan-against-project``,
+        in the assay collection of the project, keyed by path relative to the landing zone."""
+        sizes = {}
+        if getattr(self.args, "plan_against_project", False):
+            assay, _ = self.sodar_api.get_assay_from_uuid()
+            prefix = assay.irods_path.rstrip("/") + "/"
+            for obj in self.sodar_api.iter_samplesheet_file_list():
+                if obj.type == "obj" and obj.path.startswith(prefix):
+                    sizes[obj.path[len(prefix) :]] = obj.size
+        prefix = self.lz_irods_path.rstrip("/") + "/"
+        for path, size in self.itransfer.remote_sizes(self.lz_irods_path).items():
+            sizes[path[len(prefix) :]] = size
+        return sizes
+
+    def plan_jobs(
+        self, transfer_jobs: list[TransferJob], hash_ending: str
+    ) -> dict[str, list[TransferJob]]:
+        """Classify transfer jobs into the ``PLAN_CATEGORIES`` by comparing local and remote sizes.
+
+        The remote inventory is fetched once up front. Checksum files, which may not exist locally
+        yet, follow their data file unless it is identical; then they are new if not uploaded yet.
+        """
+        remote_sizes = self.get_remote_sizes()
+        prefix = self.lz_irods_path.rstrip("/") + "/"
+        plan: dict[str, list[TransferJob]] = {category: [] for category in PLAN_CATEGORIES}
+        categories = {}
+        # data files first, so checksum files can look up the category of their data file
+        for job in sorted(transfer_jobs, key=lambda job: job.path_local.endswith(hash_ending)):
+            remote_size = remote_sizes.get(job.path_remote.removeprefix(prefix))
+            data_category = categories.get(job.path_local.removesuffix(hash_ending))
+            if job.path_local.endswith(hash_ending) and data_category in ("new", "changed"):
+                category = data_category
+            elif remote_size is None:
+                category = "new"
+            elif remote_size != job.bytes and not job.path_local.endswith(hash_ending):
+                category = "changed"
+            else:
+                category = "identical"
+            categories[job.path_local] = category
+            plan[category].append(job)
+        return plan
+
+    def log_plan(self, plan: dict[str, list[TransferJob]], verbose: bool = False):
+        """Log the number of files and bytes per plan category, with ``verbose`` also every file."""
+        for category, jobs in plan.items():
+            if verbose:
+                for job in jobs:
+                    logger.info("{}: {} -> {}", category, job.path_local, job.path_remote)
+            logger.info(
+                "{} {} files ({})",
+                len(jobs),
+                category,
+                sizeof_fmt(sum(max(job.bytes, 0) for job in jobs)),
+            )
+
+    def select_planned_jobs(self, transfer_jobs: list[TransferJob], hash_ending: str):
+        """Plan the transfer, returns the jobs to checksum and upload or ``None`` with
+        ``--plan-only``.
+
+        Identical files are skipped unless ``--overwrite`` is ``always`` or ``ask``, in the latter
+        case the user is asked about them when uploading."""
+        plan_only = getattr(self.args, "plan_only", False)
+        overwrite = getattr(self.args, "overwrite", "sync")
+        if overwrite == "always" and not plan_only:
+            return transfer_jobs
+        try:
+            plan = self.plan_jobs(transfer_jobs, hash_ending)
+        except Exception as e:
+            if plan_only:
+                raise
+            logger.warning(
+                "Could not fetch remote files for planning, uploading all files: {}",
+                iRODSCommon.get_irods_error(e),
+            )
+            return transfer_jobs
+        self.log_plan(plan, verbose=plan_only)
+        if plan_only:
+            return None
+        selected = list(plan["new"])
+        if overwrite != "never":
+            selected += plan["changed"]
+        if overwrite in ("always", "ask"):
+            selected += plan["identical"]
+        return sorted(selected, key=lambda x: x.path_local)
+
+    def use_pipeline(self) -> bool:
+        """Whether checksums and uploads overlap (``TransferPipeline``) or run one after the other.
+
+        Dry runs, asking before each overwrite and sequential checksumming use the sequential
+        phases.
+        """
+        return (
+            not self.args.dry_run
+            and self.args.parallel_checksum_jobs > 0
+            and not (self.itransfer.ask and self.args.overwrite == "ask")
+        )
+
     def execute(self) -> int | None:
         """Execute the transfer."""
         # Get iRODS hash scheme, build list of transfer
@@ -248,21 +398,46 @@ class SodarIngestBase:
         transfer_jobs = sorted(transfer_jobs, key=lambda x: x.path_local)
         # Exit early if no files were found/matched
         self._no_files_found_warning(transfer_jobs)
-        # Check for md5 files and add jobs if needed
-        transfer_jobs = execute_checksum_files_fix(
-            transfer_jobs,
-            irods_hash_scheme,
-            self.args.parallel_checksum_jobs,
-            self.args.recompute_checksums,
-        )
-        # Final go from user & transfer
-        self.itransfer.jobs = transfer_jobs
-        self.itransfer.put(recursive=True, overwrite=self.args.overwrite)
-
-        # Compute server-side checksums
-        if self.args.remote_checksums:  # pragma: no cover
-            logger.info("Computing server-side checksums.")
-            self.itransfer.chksum()
+        # Only checksum and upload files that are not in the landing zone (or project) yet
+        transfer_jobs = self.select_planned_jobs(transfer_jobs, irods_hash_ending)
+        if transfer_jobs is None:
+            return 0
+        if transfer_jobs and self.use_pipeline():
+            # Hash and upload at the same time
+            self.itransfer.jobs = transfer_jobs
+            if self.itransfer.confirm():
+                failed = TransferPipeline(
+                    self.itransfer,
+                    irods_hash_scheme,
+                    checksum_jobs=self.args.parallel_checksum_jobs,
+                    upload_jobs=getattr(self.args, "parallel_upload_jobs", 1),
+                    recompute_checksums=self.args.recompute_checksums,
+                    overwrite=self.args.overwrite,
+                    remote_checksums=self.args.remote_checksums,
+                ).run(transfer_jobs)
+                if failed:
+                    logger.error(
+                        "{} files could not be transferred, the landing zone is not moved.", failed
+                    )
+                    return 1
+        elif transfer_jobs:
+            # Check for md5 files and add jobs if needed
+            transfer_jobs = execute_checksum_files_fix(
+                transfer_jobs,
+                irods_hash_scheme,
+                self.args.parallel_checksum_jobs,
+                self.args.recompute_checksums,
+            )
+            # Final go from user & transfer
+            self.itransfer.jobs = transfer_jobs
+            self.itransfer.put(recursive=True, overwrite=self.args.overwrite)
+
+            # Compute server-side checksums
+            if self.args.remote_checksums:  # pragma: no cover
+                logger.info("Computing server-side checksums.")
+                self.itransfer.chksum()
+        else:
+            logger.info("All files are already present, nothing to upload.")
 
         # Validate and move transferred files
         # Behaviour: If flag is True and lz uuid is not None*,
@@ -0,0 +1,165 @@
+"""Persistent inventory of the iRODS data objects of SODAR projects.
+
+``RetrieveSodarCollection`` stores the file list of each project in a sqlite database next to the
+response cache (see ``sodar_cache``). Re-listing a project only writes objects whose modification
+time, size or checksum changed and drops objects that disappeared. The inventory is only used with
+a positive ``--inventory-max-age``: commands then answer from it without listing the project again
+as long as the last listing is recent enough.
+"""
+
+import os
+from pathlib import Path
+import sqlite3
+import time
+import typing
+
+from loguru import logger
+
+from cubi_tk.api_models import IrodsDataObject, parse_datetime
+
+#: File name of the inventory database inside the cache directory.
+INVENTORY_FILE_NAME = "inventory.sqlite3"
+
+#: Default maximal age in seconds of a listing to be used without asking SODAR. With the default of 0
+#: the project is always listed again and the inventory is not used at all.
+DEFAULT_INVENTORY_MAX_AGE = 0.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_objects (
+    server TEXT NOT NULL,
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    modify_time TEXT NOT NULL,
+    checksum TEXT,
+    PRIMARY KEY (server, project, path)
+);
+CREATE INDEX IF NOT EXISTS data_objects_collection ON data_objects (server, project, collection);
+DROP INDEX IF EXISTS data_objects_name;
+DROP INDEX IF EXISTS data_objects_checksum;
+DROP INDEX IF EXISTS data_objects_size;
+CREATE INDEX IF NOT EXISTS data_objects_project_name ON data_objects (server, project, name);
+CREATE INDEX IF NOT EXISTS data_objects_project_checksum
+    ON data_objects (server, project, checksum);
+CREATE INDEX IF NOT EXISTS data_objects_project_size ON data_objects (server, project, size);
+CREATE TABLE IF NOT EXISTS listings (
+    server TEXT NOT NULL,
+    project TEXT NOT NULL,
+    listed_at REAL NOT NULL,
+    PRIMARY KEY (server, project)
+);
+"""
+
+_COLUMNS = "path, name, type, size, modify_time, checksum"
+
+
+class SodarInventory:
+    """sqlite backed store of the data objects of SODAR projects, keyed by server and project."""
+
+    def __init__(self, path: typing.Union[str, Path]):
+        #: Path of the sqlite database.
+        self.path = Path(path)
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(os.fspath(self.path))
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def listing_age(self, server: str, project: str) -> typing.Optional[float]:
+        """Seconds since the last complete listing of the project, ``None`` if never listed."""
+        row = self._conn.execute(
+            "SELECT listed_at FROM listings WHERE server = ? AND project = ?", (server, project)
+        ).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def iter_objects(
+        self, server: str, project: str, collection: typing.Optional[str] = None
+    ) -> typing.Iterator[IrodsDataObject]:
+        """Data objects of the project (below ``collection``, if given) ordered by path."""
+        query = f"SELECT {_COLUMNS} FROM data_objects WHERE server = ? AND project = ?"
+        params: tuple = (server, project)
+        if collection is not None:
+            collection = collection.rstrip("/")
+            query += " AND (collection = ? OR collection LIKE ? ESCAPE '\\')"
+            escaped = collection.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params += (collection, escaped + "/%")
+        for path, name, type_, size, modify_time, checksum in self._conn.execute(
+            query + " ORDER BY path", params
+        ):
+            yield IrodsDataObject(
+                name=name,
+                type=type_,
+                path=path,
+                size=size,
+                modify_time=parse_datetime(modify_time),
+                checksum=checksum,
+            )
+
+    def sync(
+        self, server: str, project: str, objects: typing.Iterable[IrodsDataObject]
+    ) -> typing.Iterator[IrodsDataObject]:
+        """Pass through a complete listing of the project, updating the inventory on the way.
+
+        Changed objects are collected while ``objects`` is consumed and written, together with the
+        removal of objects that are not listed anymore, in one transaction once it is exhausted. No
+        write lock is held during the listing, and an interrupted listing leaves the inventory
+        untouched.
+        """
+        known = {
+            path: (modify_time, size, checksum)
+            for path, modify_time, size, checksum in self._conn.execute(
+                "SELECT path, modify_time, size, checksum FROM data_objects "
+                "WHERE server = ? AND project = ?",
+                (server, project),
+            )
+        }
+        changed = []
+        for obj in objects:
+            modify_time = obj.modify_time.isoformat()
+            if known.pop(obj.path, None) != (modify_time, obj.size, obj.checksum):
+                changed.append(
+                    (
+                        server,
+                        project,
+                        obj.path,
+                        obj.path.rsplit("/", 1)[0],
+                        obj.name,
+                        obj.type,
+                        obj.size,
+                        modify_time,
+                        obj.checksum,
+                    )
+                )
+            yield obj
+        try:
+            with self._conn:
+                self._upsert(changed)
+                self._conn.executemany(
+                    "DELETE FROM data_objects WHERE server = ? AND project = ? AND path = ?",
+                    ((server, project, path) for path in known),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO listings (server, project, listed_at) VALUES (?, ?, ?)",
+                    (server, project, time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Could not update inventory {}: {}", self.path, e)
+            return
+        logger.debug(
+            "Updated inventory of project {}: {} changed, {} removed",
+            project,
+            len(changed),
+            len(known),
+        )
+
+    def _upsert(self, rows: list[tuple]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO data_objects "
+            "(server, project, path, collection, name, type, size, modify_time, checksum) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
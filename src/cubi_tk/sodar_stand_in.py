@@ -0,0 +1,440 @@
+"""Local stand-in for the SODAR REST API, for offline benchmarks and load tests.
+
+Serves the ``samplesheets`` and ``landingzones`` endpoints used by ``SodarApi`` from synthetic
+projects. Every project UUID is valid, its content is generated deterministically from the UUID and
+the configured sizes, so repeated runs see identical data. Start it with::
+
+    python -m cubi_tk.sodar_stand_in --port 8000 --num-files 500000 --num-rows 5000 --latency 0.05
+
+and point cubi-tk at it with ``--sodar-server-url http://localhost:8000/``. Any API token is
+accepted. Landing zones only exist in memory and change their state after ``--state-delay``
+seconds, mimicking the asynchronous tasks of SODAR.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import re
+import socketserver
+import threading
+import time
+import typing
+import urllib.parse as urlparse
+import uuid
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import attr
+from loguru import logger
+
+#: Number of file list entries serialized per chunk of the streamed response.
+FILE_LIST_BATCH_SIZE = 1000
+
+#: Fixed modification time of all synthetic data objects.
+SYNTHETIC_MODIFY_TIME = "2024-01-01T12:00:00Z"
+
+#: Landing zone state transitions, (state after the request, state after ``state_delay``).
+LANDING_ZONE_TRANSITIONS = {
+    "create": ("CREATING", "ACTIVE"),
+    "submit/move": ("MOVING", "MOVED"),
+    "submit/validate": ("VALIDATING", "ACTIVE"),
+}
+
+#: Matches ``/<api>/api/<action>/<uuid>``, the action may contain slashes.
+_URL_PATH = re.compile(r"^/(?P<api>samplesheets|landingzones)/api/(?P<action>.+)/(?P<uuid>[^/]+)$")
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class StandInConfig:
+    """Size of the synthetic projects and simulated server behaviour."""
+
+    #: Number of entries in the iRODS file list of each project (including ``.md5`` files).
+    num_files: int = 1000
+    #: Number of rows of the study and assay tables.
+    num_rows: int = 100
+    #: Delay in seconds added to each request.
+    latency: float = 0.0
+    #: Delay in seconds before a landing zone leaves a transitional state.
+    state_delay: float = 0.0
+
+
+def _sub_uuid(project_uuid: str, name: str) -> str:
+    """Deterministic UUID of an object within a project."""
+    return str(uuid.uuid5(uuid.UUID(project_uuid), name))
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class SyntheticProject:
+    """Content of a synthetic project, generated from its UUID."""
+
+    def __init__(self, project_uuid: str, config: StandInConfig):
+        self.project_uuid = project_uuid
+        self.config = config
+        self.study_uuid = _sub_uuid(project_uuid, "study")
+        self.assay_uuid = _sub_uuid(project_uuid, "assay")
+        self.irods_path = f"/sodarZone/projects/{project_uuid[:2]}/{project_uuid}"
+        self.study_path = f"{self.irods_path}/sample_data/study_{self.study_uuid}"
+        self.assay_path = f"{self.study_path}/assay_{self.assay_uuid}"
+        #: Incremented by each sample sheet import, changes the ``ETag`` of the export.
+        self.version = 0
+
+    @property
+    def etag(self) -> str:
+        key = f"{self.project_uuid}:{self.config.num_rows}:{self.version}"
+        return '"{}"'.format(hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def sample_name(self, i: int) -> str:
+        return f"sample{i:06d}-N1-DNA1-WGS1"
+
+    def investigation(self) -> dict:
+        return {
+            "sodar_uuid": _sub_uuid(self.project_uuid, "investigation"),
+            "archive_name": "",
+            "comments": {},
+            "description": "",
+            "file_name": "i_Investigation.txt",
+            "identifier": "",
+            "irods_status": True,
+            "parser_version": "0.2.9",
+            "project": self.project_uuid,
+            "studies": {
+                self.study_uuid: {
+                    "sodar_uuid": self.study_uuid,
+                    "identifier": "synthetic",
+                    "file_name": "s_Study_0.txt",
+                    "irods_path": self.study_path,
+                    "title": "Synthetic study",
+                    "description": "",
+                    "comments": {},
+                    "assays": {
+                        self.assay_uuid: {
+                            "sodar_uuid": self.assay_uuid,
+                            "file_name": "a_Study_0_Assay_0.txt",
+                            "irods_path": self.assay_path,
+                            "technology_platform": "Illumina",
+                            "technology_type": {"name": "nucleotide sequencing"},
+                            "measurement_type": {"name": "genome sequencing"},
+                            "comments": {},
+                        }
+                    },
+                }
+            },
+            "title": f"Synthetic project {self.project_uuid}",
+        }
+
+    def isa_tab(self) -> dict:
+        """ISA-tab as returned by ``export/json``."""
+        num_rows = self.config.num_rows
+        study_rows = ["Source Name\tCharacteristics[Organism]\tProtocol REF\tSample Name"]
+        study_rows += [
+            f"sample{i:06d}\tHomo sapiens\tSample collection\tsample{i:06d}-N1"
+            for i in range(num_rows)
+        ]
+        assay_rows = [
+            "Sample Name\tProtocol REF\tExtract Name\tProtocol REF\tLibrary Name\t"
+            "Protocol REF\tRaw Data File"
+        ]
+        assay_rows += [
+            f"sample{i:06d}-N1\tNucleic acid extraction WGS\tsample{i:06d}-N1-DNA1\t"
+            f"Library construction WGS\t{self.sample_name(i)}\tNucleic acid sequencing WGS\t"
+            f"{self.sample_name(i)}.fastq.gz"
+            for i in range(num_rows)
+        ]
+        investigation_tsv = "\n".join(
+            [
+                "INVESTIGATION",
+                f"Investigation Title\tSynthetic project {self.project_uuid}",
+                "STUDY",
+                "Study File Name\ts_Study_0.txt",
+                "STUDY ASSAYS",
+                "Study Assay File Name\ta_Study_0_Assay_0.txt",
+            ]
+        )
+        return {
+            "investigation": {"path": "i_Investigation.txt", "tsv": investigation_tsv + "\n"},
+            "studies": {"s_Study_0.txt": {"tsv": "\n".join(study_rows) + "\n"}},
+            "assays": {"a_Study_0_Assay_0.txt": {"tsv": "\n".join(assay_rows) + "\n"}},
+            "date_modified": SYNTHETIC_MODIFY_TIME,
+        }
+
+    def iter_file_list(self) -> typing.Iterator[dict]:
+        """Data objects of the project, each file is followed by its ``.md5`` file."""
+        num_rows = max(self.config.num_rows, 1)
+        for i in range(self.config.num_files):
+            file_no, is_md5 = divmod(i, 2)
+            sample = self.sample_name(file_no % num_rows)
+            name = f"{sample}_{file_no // num_rows:06d}.fastq.gz"
+            path = f"{self.assay_path}/{sample}/2024-01-01/{name}"
+            checksum = hashlib.md5(path.encode("utf-8")).hexdigest()
+            size = 1000 + (file_no * 7919) % 10_000_000
+            if is_md5:
+                # content of the .md5 file is "<checksum>  <name>\n"
+                content = f"{checksum}  {name}\n".encode("utf-8")
+                name, path = f"{name}.md5", f"{path}.md5"
+                checksum, size = hashlib.md5(content).hexdigest(), len(content)
+            yield {
+                "name": name,
+                "type": "obj",
+                "path": path,
+                "size": size,
+                "modify_time": SYNTHETIC_MODIFY_TIME,
+                "checksum": checksum,
+            }
+
+    def iter_file_list_json(self) -> typing.Iterator[bytes]:
+        """Streamed JSON serialization of ``iter_file_list()``."""
+        yield b"["
+        batch = []
+        for i, obj in enumerate(self.iter_file_list()):
+            batch.append(("," if i else "") + json.dumps(obj))
+            if len(batch) == FILE_LIST_BATCH_SIZE:
+                yield "".join(batch).encode("utf-8")
+                batch = []
+        yield ("".join(batch) + "]").encode("utf-8")
+
+
+class StandInError(Exception):
+    """Raised by endpoint handlers, rendered as JSON error response."""
+
+    def __init__(self, status: str, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class SodarStandIn:
+    """WSGI application serving the subset of the SODAR API used by cubi-tk."""
+
+    def __init__(self, config: typing.Optional[StandInConfig] = None):
+        self.config = config or StandInConfig()
+        self._projects: dict[str, SyntheticProject] = {}
+        #: Landing zones by UUID, with the time of their last state change.
+        self._landing_zones: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        #: Number of requests served, by ``(method, api, action)``.
+        self.request_counts: dict[tuple[str, str, str], int] = {}
+
+    def project(self, project_uuid: str) -> SyntheticProject:
+        try:
+            uuid.UUID(project_uuid)
+        except ValueError:
+            raise StandInError("404 Not Found", f"Invalid UUID: {project_uuid}") from None
+        with self._lock:
+            if project_uuid not in self._projects:
+                self._projects[project_uuid] = SyntheticProject(project_uuid, self.config)
+            return self._projects[project_uuid]
+
+    def __call__(self, environ, start_response):
+        if self.config.latency > 0:
+            time.sleep(self.config.latency)
+        method = environ["REQUEST_METHOD"]
+        match = _URL_PATH.match(environ.get("PATH_INFO", ""))
+        try:
+            if not environ.get("HTTP_AUTHORIZATION", "").startswith("token "):
+                raise StandInError(
+                    "401 Unauthorized", "Authentication credentials were not provided."
+                )
+            if not match:
+                raise StandInError("404 Not Found", "Not found.")
+            api, action, dest_uuid = match.group("api", "action", "uuid")
+            with self._lock:
+                key = (method, api, action)
+                self.request_counts[key] = self.request_counts.get(key, 0) + 1
+            handler = getattr(self, f"_{method.lower()}_{api}", None)
+            if handler is None:
+                raise StandInError("405 Method Not Allowed", f"Method {method} not allowed.")
+            status, headers, body = handler(action, dest_uuid, environ)
+        except StandInError as e:
+            status, headers, body = e.status, [], json.dumps({"detail": e.detail}).encode("utf-8")
+        if isinstance(body, bytes):
+            headers.append(("Content-Length", str(len(body))))
+            body = [body]
+        start_response(status, [("Content-Type", "application/json"), *headers])
+        return body
+
+    def _json(self, data, status: str = "200 OK", headers: list = None):
+        return status, list(headers or []), json.dumps(data).encode("utf-8")
+
+    def _get_samplesheets(self, action: str, dest_uuid: str, environ):
+        project = self.project(dest_uuid)
+        if action == "investigation/retrieve":
+            return self._json(project.investigation())
+        elif action in ("export/json", "remote/get"):
+            headers = [("ETag", project.etag)]
+            if environ.get("HTTP_IF_NONE_MATCH") == project.etag:
+                return "304 Not Modified", headers, b""
+            return self._json(project.isa_tab(), headers=headers)
+        elif action == "file/list":
+            return "200 OK", [], project.iter_file_list_json()
+        raise StandInError("404 Not Found", f"Unknown action: {action}")
+
+    def _post_samplesheets(self, action: str, dest_uuid: str, environ):
+        project = self.project(dest_uuid)
+        _read_body(environ)
+        if action == "import":
+            with self._lock:
+                project.version += 1
+            return self._json({"detail": "Sample sheets imported"})
+        elif action == "irods/request/create":
+            return self._json(
+                {
+                    "sodar_uuid": str(uuid.uuid4()),
+                    "status": "ACTIVE",
+                    "project": project.project_uuid,
+                }
+            )
+        raise StandInError("404 Not Found", f"Unknown action: {action}")
+
+    def _landing_zone(self, lz_uuid: str) -> dict:
+        """Return landing zone, applying pending state transitions."""
+        with self._lock:
+            if lz_uuid not in self._landing_zones:
+                raise StandInError("404 Not Found", f"Landing zone not found: {lz_uuid}")
+            entry = self._landing_zones[lz_uuid]
+            if entry["pending"] and time.monotonic() - entry["changed"] >= self.config.state_delay:
+                entry["lz"].update(
+                    status=entry["pending"],
+                    status_locked=False,
+                    status_info=f"Landing zone is {entry['pending']}",
+                    date_modified=_now(),
+                )
+                entry["pending"] = None
+            return dict(entry["lz"])
+
+    def _transition(self, lz_uuid: str, action: str):
+        current, pending = LANDING_ZONE_TRANSITIONS[action]
+        with self._lock:
+            entry = self._landing_zones[lz_uuid]
+            entry["lz"].update(
+                status=current, status_locked=True, status_info="", date_modified=_now()
+            )
+            entry["pending"] = pending
+            entry["changed"] = time.monotonic()
+
+    def _get_landingzones(self, action: str, dest_uuid: str, environ):
+        if action == "retrieve":
+            return self._json(self._landing_zone(dest_uuid))
+        elif action == "list":
+            self.project(dest_uuid)
+            with self._lock:
+                lz_uuids = [
+                    lz_uuid
+                    for lz_uuid, entry in self._landing_zones.items()
+                    if entry["lz"]["project"] == dest_uuid
+                ]
+            return self._json([self._landing_zone(lz_uuid) for lz_uuid in lz_uuids])
+        raise StandInError("404 Not Found", f"Unknown action: {action}")
+
+    def _post_landingzones(self, action: str, dest_uuid: str, environ):
+        form = urlparse.parse_qs(_read_body(environ).decode("utf-8"))
+        if action == "create":
+            project = self.project(dest_uuid)
+            lz_uuid = str(uuid.uuid4())
+            title = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            lz = {
+                "sodar_uuid": lz_uuid,
+                "date_modified": _now(),
+                "status": "CREATING",
+                "status_locked": True,
+                "project": project.project_uuid,
+                "title": title,
+                "description": "",
+                "user": "stand-in",
+                "assay": form.get("assay", [project.assay_uuid])[0],
+                "status_info": "",
+                "configuration": None,
+                "config_data": {},
+                "irods_path": f"{project.irods_path}/landing_zones/stand-in/"
+                f"study_{project.study_uuid}/assay_{project.assay_uuid}/{title}",
+            }
+            with self._lock:
+                self._landing_zones[lz_uuid] = {"lz": lz, "pending": None, "changed": 0.0}
+            self._transition(lz_uuid, action)
+            return self._json(self._landing_zone(lz_uuid), status="201 Created")
+        elif action in LANDING_ZONE_TRANSITIONS:
+            self._landing_zone(dest_uuid)
+            self._transition(dest_uuid, action)
+            return self._json({"detail": "ok", "sodar_uuid": dest_uuid})
+        raise StandInError("404 Not Found", f"Unknown action: {action}")
+
+
+def _read_body(environ) -> bytes:
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    return environ["wsgi.input"].read(length) if length else b""
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """WSGI server handling each request in its own thread, needed for concurrent clients."""
+
+    daemon_threads = True
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("{} - {}", self.address_string(), format % args)
+
+
+def make_stand_in_server(
+    host: str = "127.0.0.1", port: int = 0, config: typing.Optional[StandInConfig] = None
+) -> WSGIServer:
+    """Create server, use ``port=0`` to pick a free port (see ``server.server_port``)."""
+    return make_server(
+        host,
+        port,
+        SodarStandIn(config),
+        server_class=ThreadingWSGIServer,
+        handler_class=_QuietRequestHandler,
+    )
+
+
+def main(argv: typing.Optional[list[str]] = None) -> int:  # pragma: nocover
+    parser = argparse.ArgumentParser(
+        prog="python -m cubi_tk.sodar_stand_in", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    parser.add_argument(
+        "--num-files",
+        type=int,
+        default=StandInConfig().num_files,
+        help="Number of file list entries per project. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--num-rows",
+        type=int,
+        default=StandInConfig().num_rows,
+        help="Number of study and assay table rows per project. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Delay in seconds added to each request. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--state-delay",
+        type=float,
+        default=0.0,
+        help="Seconds until landing zones leave a transitional state. Default: %(default)s",
+    )
+    args = parser.parse_args(argv)
+    config = StandInConfig(
+        num_files=args.num_files,
+        num_rows=args.num_rows,
+        latency=args.latency,
+        state_delay=args.state_delay,
+    )
+    with make_stand_in_server(args.host, args.port, config) as server:
+        logger.info("Serving SODAR API stand-in on http://{}:{}/", args.host, server.server_port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":  # pragma: nocover
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Timing of SODAR API requests.
+
+``SodarApi`` records latency, response size, status and retries of every HTTP request in an
+``HttpTracer``. The records are optionally written as JSON lines to the file given with
+``--trace-http`` and summarized per endpoint at DEBUG level when the ``SodarApi`` instance goes away.
+"""
+
+import json
+import threading
+import typing
+
+import attr
+from loguru import logger
+
+
+@attr.s(frozen=True, auto_attribs=True, slots=True)
+class HttpTraceRecord:
+    """One HTTP request to the SODAR API."""
+
+    #: Unix timestamp of the start of the request.
+    timestamp: float
+    #: HTTP method, e.g. ``GET``.
+    method: str
+    #: Endpoint without the object UUID, e.g. ``samplesheets/file/list``.
+    endpoint: str
+    #: Full URL of the request.
+    url: str
+    #: HTTP status code, ``None`` if no response was received.
+    status: typing.Optional[int]
+    #: Wall clock time in seconds until the response headers were received, including retries.
+    latency: float
+    #: Size of the response body in bytes, ``None`` if unknown (e.g. streamed responses).
+    size: typing.Optional[int]
+    #: Number of retries of the request.
+    retries: int = 0
+    #: Error message if the request failed without response.
+    error: typing.Optional[str] = None
+
+
+def count_retries(response) -> int:
+    """Number of retries urllib3 needed for ``response``."""
+    retry = getattr(getattr(response, "raw", None), "retries", None)
+    return len(getattr(retry, "history", None) or ())
+
+
+def response_size(response, stream: bool = False) -> typing.Optional[int]:
+    """Size of the response body, the ``Content-Length`` header is used for streamed responses."""
+    if not stream:
+        try:
+            return len(response.content)
+        except TypeError:
+            return None
+    content_length = response.headers.get("Content-Length")
+    return int(content_length) if content_length and content_length.isdigit() else None
+
+
+class HttpTracer:
+    """Collect ``HttpTraceRecord``s, optionally appending them to a JSON lines file."""
+
+    def __init__(self, path: typing.Optional[str] = None):
+        #: Path of the JSON lines file, if any.
+        self.path = path
+        #: All records, in order of completion.
+        self.records: list[HttpTraceRecord] = []
+        self._lock = threading.Lock()
+        self._file = open(path, "at") if path else None
+
+    def record(self, record: HttpTraceRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self._file is not None:
+                self._file.write(json.dumps(attr.asdict(record)) + "\n")
+                self._file.flush()
+
+    def summary(self) -> list[dict[str, typing.Any]]:
+        """Per-endpoint statistics, slowest endpoints (by total time) first."""
+        by_endpoint: dict[tuple[str, str], list[HttpTraceRecord]] = {}
+        with self._lock:
+            for record in self.records:
+                by_endpoint.setdefault((record.method, record.endpoint), []).append(record)
+        rows = []
+        for (method, endpoint), records in by_endpoint.items():
+            latencies = sorted(record.latency for record in records)
+            rows.append(
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": len(records),
+                    "errors": sum(
+                        1 for record in records if record.status is None or record.status >= 400
+                    ),
+                    "retries": sum(record.retries for record in records),
+                    "total": sum(latencies),
+                    "mean": sum(latencies) / len(latencies),
+                    "max": latencies[-1],
+                    "bytes": sum(record.size or 0 for record in records),
+                }
+            )
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def log_summary(self) -> None:
+        """Log the per-endpoint statistics as table at DEBUG level."""
+        rows = self.summary()
+        if not rows:
+            return
+        lines = [
+            f"{'method':<6} {'endpoint':<40} {'count':>6} {'errors':>6} {'retries':>7} "
+            f"{'total_s':>9} {'mean_s':>8} {'max_s':>8} {'bytes':>12}"
+        ]
+        for row in rows:
+            lines.append(
+                f"{row['method']:<6} {row['endpoint']:<40} {row['count']:>6} {row['errors']:>6} "
+                f"{row['retries']:>7} {row['total']:>9.3f} {row['mean']:>8.3f} {row['max']:>8.3f} "
+                f"{row['bytes']:>12}"
+            )
+        logger.debug("SODAR API request summary:\n{}", "\n".join(lines))
+
+    def close(self) -> None:
+        """Log the summary and close the trace file."""
+        self.log_summary()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,259 @@
+"""Overlapped checksum computation and upload of transfer jobs.
+
+Without the pipeline, all missing checksum files are computed before the first file is uploaded.
+``TransferPipeline`` runs both stages at the same time: checksum workers create missing checksum
+files and pass each data file together with its checksum file to the upload workers, so disk reads,
+hashing and network transfer overlap. Stages are connected by bounded queues. When the uploads fall
+behind, the queue fills up and hashing pauses until there is room again (backpressure). Finished
+files are reported in the order of the input, whatever order the workers finish them in.
+"""
+
+import os
+import queue
+import threading
+import typing
+
+import attr
+from loguru import logger
+from tqdm import tqdm
+
+from .common import compute_checksum
+from .irods_common import TransferJob, iRODSSessionPool, iRODSTransfer
+
+#: Default number of files that may wait in each queue between two stages.
+DEFAULT_QUEUE_SIZE = 16
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class TransferUnit:
+    """A data file and its checksum file, which are hashed and uploaded together."""
+
+    #: Position in the input, used for ordered reporting.
+    index: int
+    #: Transfer job of the data file, ``None`` for checksum files without data file.
+    data_job: typing.Optional[TransferJob]
+    #: Transfer job of the checksum file, if any.
+    checksum_job: typing.Optional[TransferJob]
+
+    @property
+    def jobs(self) -> tuple[TransferJob, ...]:
+        return tuple(job for job in (self.data_job, self.checksum_job) if job is not None)
+
+    @property
+    def bytes(self) -> int:
+        return sum(max(job.bytes, 0) for job in self.jobs)
+
+
+def group_transfer_units(
+    transfer_jobs: typing.Iterable[TransferJob], hash_ending: str
+) -> list[TransferUnit]:
+    """Pair each data file with its checksum file, ordered by the local path of the data file."""
+    data_jobs = {}
+    checksum_jobs = {}
+    for job in transfer_jobs:
+        if job.path_local.endswith(hash_ending):
+            checksum_jobs[job.path_local[: -len(hash_ending)]] = job
+        else:
+            data_jobs[job.path_local] = job
+    paths = sorted(data_jobs.keys() | checksum_jobs.keys())
+    return [
+        TransferUnit(index, data_jobs.get(path), checksum_jobs.get(path))
+        for index, path in enumerate(paths)
+    ]
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class UnitResult:
+    """Outcome of a ``TransferUnit``."""
+
+    unit: TransferUnit
+    #: Error message, ``None`` on success.
+    error: typing.Optional[str] = None
+
+
+_DONE = object()
+
+
+class TransferPipeline:
+    """Compute missing checksum files and upload transfer jobs in overlapping stages.
+
+    :param itransfer: Transfer object, used for iRODS sessions and overwrite decisions.
+    :param hash_scheme: Hash scheme of the checksum files, e.g. ``MD5``.
+    :param checksum_jobs: Number of threads computing checksums.
+    :param upload_jobs: Number of threads uploading, each with its own iRODS session.
+    :param recompute_checksums: Recompute checksum files that already exist.
+    :param overwrite: Overwrite behaviour for existing remote files, except ``ask``.
+    :param recursive: Create missing remote collections.
+    :param remote_checksums: Trigger checksum computation on the iRODS side after each upload.
+    :param queue_size: Maximal number of files waiting in front of each stage.
+    """
+
+    def __init__(
+        self,
+        itransfer: iRODSTransfer,
+        hash_scheme: str,
+        checksum_jobs: int = 8,
+        upload_jobs: int = 1,
+        recompute_checksums: bool = False,
+        overwrite: str = "sync",
+        recursive: bool = True,
+        remote_checksums: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.itransfer = itransfer
+        self.hash_scheme = hash_scheme
+        self.hash_ending = "." + hash_scheme.lower()
+        self.checksum_jobs = max(1, checksum_jobs)
+        self.upload_jobs = max(1, upload_jobs)
+        self.recompute_checksums = recompute_checksums
+        self.overwrite = overwrite
+        self.recursive = recursive
+        self.remote_checksums = remote_checksums
+        self.queue_size = queue_size
+        self._created_collections: set[str] = set()
+        self._lock = threading.Lock()
+        self._hashers_lock = threading.Lock()
+        self._checksum_queue: queue.Queue = queue.Queue()
+        self._upload_queue: queue.Queue = queue.Queue()
+        self._done_queue: queue.Queue = queue.Queue()
+        self._remaining_hashers = 0
+
+    def run(self, transfer_jobs: typing.Iterable[TransferJob]) -> int:
+        """Run the pipeline, returns the number of files that could not be transferred."""
+        units = group_transfer_units(transfer_jobs, self.hash_ending)
+        self._checksum_queue = queue.Queue(maxsize=self.queue_size)
+        self._upload_queue = queue.Queue(maxsize=self.queue_size)
+        self._done_queue = queue.Queue()
+        self._remaining_hashers = self.checksum_jobs
+        logger.info(
+            "Computing checksums with {} and uploading with {} threads",
+            self.checksum_jobs,
+            self.upload_jobs,
+        )
+        with (
+            iRODSSessionPool(self.itransfer) as session_pool,
+            tqdm(
+                total=sum(unit.bytes for unit in units),
+                unit="B",
+                unit_scale=True,
+                unit_divisor=1024,
+                desc="uploaded",
+                position=0,
+            ) as t_uploaded,
+            tqdm(
+                unit="B", unit_scale=True, unit_divisor=1024, desc="hashed", position=1
+            ) as t_hashed,
+        ):
+            threads = [threading.Thread(target=self._feed, args=(units,), daemon=True)]
+            threads += [
+                threading.Thread(target=self._hash_worker, args=(t_hashed,), daemon=True)
+                for _ in range(self.checksum_jobs)
+            ]
+            threads += [
+                threading.Thread(target=self._upload_worker, args=(session_pool,), daemon=True)
+                for _ in range(self.upload_jobs)
+            ]
+            for thread in threads:
+                thread.start()
+            failed = self._report(units, t_uploaded)
+            for thread in threads:
+                thread.join()
+        logger.info("File transfer complete.")
+        return failed
+
+    def _feed(self, units: list[TransferUnit]):
+        # blocks while the checksum workers are busy
+        for unit in units:
+            self._checksum_queue.put(unit)
+        for _ in range(self.checksum_jobs):
+            self._checksum_queue.put(_DONE)
+
+    def _hash_worker(self, t_hashed: tqdm):
+        while (unit := self._checksum_queue.get()) is not _DONE:
+            unit, error = self._ensure_checksum_file(unit, t_hashed)
+            if error:
+                self._done_queue.put(UnitResult(unit, error))
+            else:
+                # blocks while the upload workers are busy
+                self._upload_queue.put(unit)
+        # the last checksum worker stops the upload workers
+        with self._hashers_lock:
+            self._remaining_hashers -= 1
+            last = not self._remaining_hashers
+        if last:
+            for _ in range(self.upload_jobs):
+                self._upload_queue.put(_DONE)
+
+    def _upload_worker(self, session_pool: iRODSSessionPool):
+        while (unit := self._upload_queue.get()) is not _DONE:
+            self._done_queue.put(UnitResult(unit, self._upload(session_pool, unit)))
+
+    def _report(self, units: list[TransferUnit], t: tqdm) -> int:
+        """Report finished units in input order, returns the number of failed units."""
+        finished: dict[int, UnitResult] = {}
+        next_index = 0
+        failed = 0
+        for _ in units:
+            result = self._done_queue.get()
+            finished[result.unit.index] = result
+            while next_index in finished:
+                result = finished.pop(next_index)
+                next_index += 1
+                if result.error:
+                    failed += 1
+                    logger.error(result.error)
+                else:
+                    for job in result.unit.jobs:
+                        logger.debug("Transferred {} to {}", job.path_local, job.path_remote)
+                # sizes as in the total, created checksum files were not counted there
+                t.update(units[result.unit.index].bytes)
+        return failed
+
+    def _ensure_checksum_file(
+        self, unit: TransferUnit, t: tqdm
+    ) -> tuple[TransferUnit, typing.Optional[str]]:
+        """Create the checksum file of the unit if missing.
+
+        Returns the unit, with a new checksum job carrying the size of a created file (overwrite
+        decisions depend on it), and an error message on failure.
+        """
+        job = unit.checksum_job
+        if job is None or unit.data_job is None:
+            return unit, None
+        if os.path.exists(job.path_local) and not self.recompute_checksums:
+            return unit, None
+        try:
+            checksum = compute_checksum(unit.data_job.path_local, self.hash_scheme, verbose=False)
+            with open(job.path_local, "wt") as checksumfile:
+                checksumfile.write(f"{checksum}  {os.path.basename(unit.data_job.path_local)}\n")
+        except Exception as e:
+            return unit, f"Problem computing checksum of {unit.data_job.path_local}: {e}"
+        with self._lock:
+            t.update(max(unit.data_job.bytes, 0))
+        # like `execute_checksum_files_fix()`, re-create the job to determine the file size
+        return attr.evolve(unit, checksum_job=TransferJob(job.path_local, job.path_remote)), None
+
+    def _upload(self, session_pool: iRODSSessionPool, unit: TransferUnit) -> typing.Optional[str]:
+        """Upload the data file and its checksum file, returns an error message on failure."""
+        for job in unit.jobs:
+            try:
+                session = session_pool.get()
+                if self.recursive:
+                    self._create_collection(session, os.path.dirname(job.path_remote))
+                kw_options = self.itransfer.upload_options(session, job, self.overwrite)
+                if kw_options is not None:
+                    session.data_objects.put(job.path_local, job.path_remote, **kw_options)
+                if self.remote_checksums and job is unit.data_job:
+                    data_object = session.data_objects.get(job.path_remote)
+                    if not data_object.checksum:
+                        data_object.chksum()
+            except Exception as e:
+                return f"Problem during transfer of {job.path_local}: {self.itransfer.get_irods_error(e)}"
+        return None
+
+    def _create_collection(self, session, collection: str):
+        # creating an existing collection is harmless, concurrent workers may both do it
+        if collection not in self._created_collections:
+            session.collections.create(collection)
+            with self._lock:
+                self._created_collections.add(collection)
@@ -0,0 +1,55 @@
+"""Tests for ``cubi_tk.check_report``."""
+
+import io
+import json
+
+import pytest
+
+from cubi_tk.check_report import ExternalSorter, ReportRecord, ReportWriter, group_by_directory
+
+
+def test_external_sorter_spills():
+    records = [ReportRecord("both", f"dir{i % 7}", f"file{i:03d}") for i in reversed(range(50))]
+    sorter = ExternalSorter(buffer_size=8)
+    for record in records:
+        sorter.add(record)
+    assert len(sorter) == 50
+    assert len(sorter._runs) == 6
+    actual = list(sorter)
+    assert actual == sorted(records, key=lambda r: (r.directory, r.name))
+    assert sorter._runs == []
+
+    groups = list(group_by_directory(actual))
+    assert [directory for directory, _ in groups] == [f"dir{i}" for i in range(7)]
+    assert sum(len(group) for _, group in groups) == 50
+
+
+def test_report_writer():
+    stream = io.StringIO()
+    writer = ReportWriter("jsonl", stream)
+    writer.write(ReportRecord("both", "a", "x.txt", "abc"))
+    writer.write(ReportRecord("remote-only", "b", "y.txt", detail="z"))
+    writer.write_summary()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[0] == {
+        "category": "both",
+        "directory": "a",
+        "name": "x.txt",
+        "checksum": "abc",
+        "step": None,
+        "detail": None,
+    }
+    assert lines[-1] == {"summary": {"both": 1, "remote-only": 1}}
+
+    stream = io.StringIO()
+    writer = ReportWriter("tsv", stream)
+    writer.write(ReportRecord("both", "a", "x.txt", "abc"))
+    writer.write_summary()
+    assert stream.getvalue().splitlines() == [
+        "category\tdirectory\tname\tchecksum\tstep\tdetail",
+        "both\ta\tx.txt\tabc\t\t",
+        "# summary: both=1",
+    ]
+
+    with pytest.raises(ValueError):
+        ReportWriter("text")
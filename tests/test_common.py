@@ -1,8 +1,11 @@
 """Tests for common code."""
 
+import os
+import pathlib
 import subprocess
 
 from pyfakefs import fake_filesystem
+import pytest
 
 from cubi_tk import common
 
@@ -46,3 +49,77 @@ def test_execute_shell_commands():
     except subprocess.CalledProcessError:
         raise_error = True
     assert raise_error
+
+
+def test_rate_limiter(mocker):
+    mock_sleep = mocker.patch("cubi_tk.common.time.sleep")
+    limiter = common.RateLimiter(0)
+    for _ in range(3):
+        limiter.wait()
+    mock_sleep.assert_not_called()
+
+    limiter = common.RateLimiter(2)
+    for _ in range(3):
+        limiter.wait()
+    # first call passes immediately, later calls are spaced by half a second
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 2
+    assert delays[0] == pytest.approx(0.5, abs=0.1)
+    assert delays[1] == pytest.approx(1.0, abs=0.1)
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_scandir_walk(tmp_path, threads):
+    for path in ("a/x.txt", "a/b/y.txt", "c/z.txt", "top.txt"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    (tmp_path / "link").symlink_to(tmp_path / "a")
+
+    listing = {
+        os.path.relpath(directory, tmp_path): sorted(entry.name for entry in entries)
+        for directory, entries in common.scandir_walk(tmp_path, threads=threads)
+    }
+    # symlinked directories are listed but not followed
+    assert listing == {
+        ".": ["link", "top.txt"],
+        "a": ["x.txt"],
+        "a/b": ["y.txt"],
+        "c": ["z.txt"],
+    }
+
+    pruned = common.scandir_walk(tmp_path, threads=threads, prune=lambda d: d.endswith("/a"))
+    assert sorted(os.path.relpath(directory, tmp_path) for directory, _ in pruned) == [".", "c"]
+
+
+def test_regex_literal_prefix():
+    assert common.regex_literal_prefix("fastq.gz$") is None
+    assert common.regex_literal_prefix("^/data/a|^/data/b") is None
+    assert common.regex_literal_prefix("^/data/proj/sample1/.*") == "/data/proj/sample1/"
+    assert common.regex_literal_prefix(r"^/data/proj\.1/x") == "/data/proj.1/x"
+    assert common.regex_literal_prefix("^/data/ab?c") == "/data/a"
+    assert common.regex_literal_prefix("^/data/[ab]") == "/data/"
+    assert common.regex_literal_prefix(r"^/data\d") == "/data"
+
+
+def test_compile_path_globs():
+    patterns = ["*.log", ".snakemake", "sub/cache", "/abs/*.txt", "file[0-9]", "x?z", ""]
+    paths = [
+        "/run/a.log",
+        "/run/a.log.gz",
+        "/run/.snakemake",
+        "/run/.snakemake/x",
+        "/run/sub/cache",
+        "/run/other/cache",
+        "/abs/a.txt",
+        "/abs/sub/a.txt",
+        "/run/abs/a.txt",
+        "/run/file1",
+        "/run/file12",
+        "/run/xyz",
+        "/run/x/z",
+    ]
+    regex = common.compile_path_globs(patterns)
+    for path in paths:
+        expected = any(pathlib.PurePosixPath(path).match(p) for p in patterns if p)
+        assert bool(regex.match(path)) == expected, path
+    assert common.compile_path_globs(["", "/"]) is None
@@ -0,0 +1,128 @@
+"""Tests for ``cubi_tk.irods.check``."""
+
+import argparse
+import io
+from unittest.mock import MagicMock, patch
+
+from irods.models import Collection as CollectionModel
+from irods.models import DataObject as DataObjectModel
+
+from cubi_tk.irods.check import IrodsCheckCommand
+from cubi_tk.irods_common import iRODSQueryRow
+
+MD5_A = "a" * 32
+MD5_B = "b" * 32
+
+
+def make_row(coll, name, replica_number, checksum, resource_name, size=10):
+    return {
+        CollectionModel.name: coll,
+        DataObjectModel.name: name,
+        DataObjectModel.size: str(size),
+        DataObjectModel.checksum: checksum,
+        DataObjectModel.replica_number: str(replica_number),
+        DataObjectModel.resource_name: resource_name,
+    }
+
+
+def replica(path, replica_number, checksum, resource_name):
+    return iRODSQueryRow(path, 10, checksum, replica_number, resource_name)
+
+
+def make_command(**kwargs):
+    args = {
+        "irods_path": "/zone/coll",
+        "req_num_reps": 2,
+        "num_parallel_tests": 2,
+        "num_display_files": 20,
+        "hash_scheme": "MD5",
+        "query_page_size": 2,
+    }
+    args.update(kwargs)
+    return IrodsCheckCommand(argparse.Namespace(**args))
+
+
+def test_iter_data_objs():
+    session = MagicMock()
+    query = session.query.return_value.filter.return_value.order_by.return_value.order_by
+    # pages of the catalog query, ordered by collection and name
+    query.return_value.limit.return_value.get_batches.return_value = [
+        [
+            make_row("/zone/coll", "a.txt", 0, MD5_A, "resc1"),
+            make_row("/zone/coll", "a.txt", 1, MD5_A, "resc2"),
+        ],
+        [
+            make_row("/zone/coll", "a.txt.md5", 0, MD5_A, "resc1"),
+            make_row("/zone/coll/sub", "b.txt", 0, MD5_B, "resc1"),
+        ],
+        [
+            make_row("/zone/coll/sub", "b.txt.sha256", 0, "", "resc1"),
+            make_row("/zone/coll2", "c.txt", 0, MD5_A, "resc1"),
+        ],
+    ]
+
+    data_objs = list(make_command().iter_data_objs(session, "/zone/coll"))
+
+    assert session.query.call_count == 1
+    query.return_value.limit.assert_called_once_with(2)
+    assert data_objs == [
+        (
+            "/zone/coll/a.txt",
+            [
+                replica("/zone/coll/a.txt", 0, MD5_A, "resc1"),
+                replica("/zone/coll/a.txt", 1, MD5_A, "resc2"),
+            ],
+            "/zone/coll/a.txt.md5",
+        ),
+        ("/zone/coll/sub/b.txt", [replica("/zone/coll/sub/b.txt", 0, MD5_B, "resc1")], None),
+    ]
+
+
+@patch("cubi_tk.irods.check.logger")
+@patch("cubi_tk.irods_common.iRODSCommon._init_irods")
+def test_run_checks(mocksession, mocklogger):
+    sessions = []
+
+    def new_session():
+        session = MagicMock()
+        session.data_objects.open.side_effect = lambda path, mode: io.BytesIO(
+            f"{MD5_A}  {path}\n".encode()
+        )
+        sessions.append(session)
+        return session
+
+    mocksession.side_effect = new_session
+    data_objs = [
+        (
+            "/zone/coll/a.txt",
+            [
+                replica("/zone/coll/a.txt", 0, MD5_A, "resc1"),
+                replica("/zone/coll/a.txt", 1, MD5_A, "resc2"),
+            ],
+            "/zone/coll/a.txt.md5",
+        ),
+        (
+            "/zone/coll/b.txt",
+            [
+                replica("/zone/coll/b.txt", 0, MD5_A, "resc1"),
+                replica("/zone/coll/b.txt", 1, MD5_B, "resc2"),
+            ],
+            "/zone/coll/b.txt.md5",
+        ),
+        ("/zone/coll/c.txt", [replica("/zone/coll/c.txt", 0, MD5_A, "resc1")], None),
+    ]
+
+    make_command().run_checks(data_objs)
+
+    opened = sorted(
+        c.args[0] for session in sessions for c in session.data_objects.open.call_args_list
+    )
+    assert opened == ["/zone/coll/a.txt.md5", "/zone/coll/b.txt.md5"]
+    # one session per worker thread, all cleaned up
+    assert 1 <= len(sessions) <= 2
+    assert all(session.cleanup.called for session in sessions)
+    errors = [c.args for c in mocklogger.error.call_args_list]
+    assert len(errors) == 3
+    assert errors[0][1:] == ("/zone/coll/b.txt", "MD5", MD5_A, MD5_B, "resc2")
+    assert errors[1] == ("No checksum file for: /zone/coll/c.txt",)
+    assert errors[2] == ("Not enough replicas (1 < 2) for file: /zone/coll/c.txt",)
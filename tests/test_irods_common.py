@@ -3,11 +3,14 @@ from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
 import irods.exception
+from irods.models import Collection as CollectionModel
+from irods.models import DataObject as DataObjectModel
 import pytest
 
 from cubi_tk.irods_common import (
     TransferJob,
     iRODSCommon,
+    iRODSQueryRow,
     iRODSRetrieveCollection,
     iRODSTransfer,
 )
@@ -58,6 +61,18 @@ def test_init_irods(mocksession, fs, irods_env_file):
     mocksession.assert_called()
 
 
+@patch("cubi_tk.irods_common.iRODSSession")
+def test_irods_hash_scheme_does_not_connect(mocksession, fs, irods_env_file):
+    icommon = iRODSCommon()
+    assert icommon.irods_hash_scheme() == "MD5"
+    mocksession.assert_not_called()
+    assert not icommon.irodsA_file_found
+    assert not (Path(irods_env_file).parent / ".irodsA_backup").exists()
+
+    # missing environment file falls back to the default
+    assert iRODSCommon(irods_env_path="missing.json").irods_hash_scheme() == "MD5"
+
+
 @patch("getpass.getpass")
 @patch("cubi_tk.irods_common.write_pam_irodsA_file")
 def test_check_and_gen_irods_files_creates_irodsA(mock_write_pam, mockpass, fs, irods_env_file):
@@ -223,38 +238,57 @@ def test_irods_transfer_get(mocksession, jobs):
 
 
 # This tests `retrieve_irods_data_objects` and by extension `parse_irods_collection`
-# A test for _irods_query would require mocking `session.query` results in a
-# way that allows creation of IrodsDataObject instances from those results
 @patch("cubi_tk.irods_common.iRODSCommon._init_irods")
 @patch("cubi_tk.irods_common.iRODSRetrieveCollection._irods_query")
 def test_irods_retrieve_data_objects(mockquery, mocksession):
-    # Possible alternative to MagicMocks here:
-    # create a fake IrodsDataObject class with a path attribute
-    mockobj1 = MagicMock()
-    mockobj1.path = "/root/coll1/file1.vcf.gz"
-    mockobj1.name = "file1.vcf.gz"
-    mockobj2 = MagicMock()
-    mockobj2.path = "/root/coll2/file2.vcf.gz"
-    mockobj2.name = "file2.vcf.gz"
-    mockobj3 = MagicMock()
-    mockobj3.path = "/root/coll1/subcol/file1.vcf.gz"
-    mockobj3.name = "file1.vcf.gz"
-
-    mockcksum = MagicMock()
-
-    mockquery.return_value = {
-        "files": [mockobj1, mockobj2, mockobj3],
-        "checksums": {
-            "/root/coll1/file1.vcf.gz": mockcksum,
-            "/root/coll2/file2.vcf.gz": mockcksum,
-            "/root/coll1/subcol/file1.vcf.gz": mockcksum,
-        },
-    }
+    row1 = iRODSQueryRow("/root/coll1/file1.vcf.gz", 10, "abc", 0, "resc")
+    row2 = iRODSQueryRow("/root/coll2/file2.vcf.gz", 10, "abc", 0, "resc")
+    row3 = iRODSQueryRow("/root/coll1/subcol/file1.vcf.gz", 10, "abc", 0, "resc")
+    row3_replica = iRODSQueryRow("/root/coll1/subcol/file1.vcf.gz", 10, "abc", 1, "resc2")
+    chksum_row = iRODSQueryRow("/root/coll1/file1.vcf.gz.md5", 10, "def", 0, "resc")
 
-    mocksession.collections.get.return_value = "path"
+    mockquery.return_value = iter([row1, chksum_row, row2, row3, row3_replica])
 
     data_objs = iRODSRetrieveCollection().retrieve_irods_data_objects("/fake/path")
 
-    expected_data_objs = {"file1.vcf.gz": [mockobj1, mockobj3], "file2.vcf.gz": [mockobj2]}
+    expected_data_objs = {
+        "file1.vcf.gz": [row1, row3, row3_replica],
+        "file2.vcf.gz": [row2],
+    }
 
     assert data_objs == expected_data_objs
+
+
+def test_irods_query_pages():
+    session = MagicMock()
+    query = session.query.return_value.filter.return_value.order_by.return_value.order_by
+    query.return_value.limit.return_value.get_batches.return_value = iter(
+        [
+            [
+                {
+                    CollectionModel.name: "/root/coll",
+                    DataObjectModel.name: "file.txt",
+                    DataObjectModel.size: "12",
+                    DataObjectModel.checksum: "",
+                    DataObjectModel.replica_number: "0",
+                    DataObjectModel.resource_name: "resc",
+                }
+            ],
+            [
+                {
+                    CollectionModel.name: "/root/collection",
+                    DataObjectModel.name: "other.txt",
+                    DataObjectModel.size: "12",
+                    DataObjectModel.checksum: "abc",
+                    DataObjectModel.replica_number: "0",
+                    DataObjectModel.resource_name: "resc",
+                }
+            ],
+        ]
+    )
+
+    rows = iRODSRetrieveCollection(query_page_size=1)._irods_query(session, "/root/coll/")
+
+    assert not session.query.called
+    assert list(rows) == [iRODSQueryRow("/root/coll/file.txt", 12, None, 0, "resc")]
+    query.return_value.limit.assert_called_once_with(1)
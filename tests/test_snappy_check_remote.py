@@ -1,10 +1,21 @@
 """Tests for ``cubi_tk.snappy.check_remote``."""
 
+import datetime
+import io
 import pathlib
 
+import attr
 import pytest
 
-from cubi_tk.snappy.check_remote import Checker, FindLocalFiles, FindLocalRawdataFiles
+from cubi_tk.api_models import IrodsDataObject
+
+from cubi_tk.check_report import ReportWriter
+from cubi_tk.snappy.check_remote import (
+    Checker,
+    FindFilesCommon,
+    FindLocalFiles,
+    FindLocalRawdataFiles,
+)
 
 from .helpers import createIrodsDataObject
 
@@ -50,6 +61,51 @@ def test_findlocal_run(germline_trio_sheet_object):
         FindLocalFiles(sheet=germline_trio_sheet_object, base_path=str(test_dir_path), step_list=[])
 
 
+def test_iter_library_dirs(tmp_path):
+    """Tests FindFilesCommon.iter_library_dirs() over several roots with symlinks"""
+    for step in ("ngs_mapping", "variant_calling"):
+        for lib in ("P001-N1-DNA1-WES1", "P001-N1-DNA1-WES10"):
+            out_dir = tmp_path / step / "output" / f"bwa.{lib}" / "out"
+            out_dir.mkdir(parents=True)
+            (out_dir / f"bwa.{lib}.bam").write_text("")
+    (tmp_path / "ngs_mapping" / "output" / "other").mkdir()
+    (tmp_path / "ngs_mapping" / "output" / "other" / "file.txt").write_text("")
+    # symlinked directories are reported (resolved) but not entered
+    (tmp_path / "ngs_mapping" / "output" / "link").symlink_to(
+        tmp_path / "variant_calling" / "output" / "bwa.P001-N1-DNA1-WES10"
+    )
+    roots = [str(tmp_path / step / "output") for step in ("ngs_mapping", "variant_calling")]
+
+    actual = sorted(
+        (root, lib, str(pathlib.Path(path).relative_to(tmp_path)), sorted(files))
+        for root, lib, path, files in FindFilesCommon.iter_library_dirs(
+            roots, ["P001-N1-DNA1-WES1", "P001-N1-DNA1-WES10"], threads=2
+        )
+    )
+
+    expected = []
+    for root, step in zip(roots, ("ngs_mapping", "variant_calling"), strict=True):
+        for lib in ("P001-N1-DNA1-WES1", "P001-N1-DNA1-WES10"):
+            expected.append((root, "P001-N1-DNA1-WES1", f"{step}/output/bwa.{lib}", []))
+            expected.append(
+                (root, "P001-N1-DNA1-WES1", f"{step}/output/bwa.{lib}/out", [f"bwa.{lib}.bam"])
+            )
+    expected.append((roots[0], "P001-N1-DNA1-WES1", "ngs_mapping/output/link", []))
+    assert actual == sorted(expected)
+
+    # the first matching library name wins
+    actual = {
+        path: lib
+        for _, lib, path, _ in FindFilesCommon.iter_library_dirs(
+            roots[:1], ["P001-N1-DNA1-WES10", "P001-N1-DNA1-WES1"]
+        )
+    }
+    assert actual[roots[0] + "/bwa.P001-N1-DNA1-WES10/out"] == "P001-N1-DNA1-WES10"
+    assert actual[roots[0] + "/bwa.P001-N1-DNA1-WES1/out"] == "P001-N1-DNA1-WES1"
+    assert actual[roots[0] + "/link"] == "P001-N1-DNA1-WES10"
+    assert roots[0] + "/other" not in actual
+
+
 # Tests FindLocalRawdataFiles ==========================================================================================
 
 
@@ -205,3 +261,107 @@ def test_compare_local_and_remote_files():
     assert actual_both == set(expected_both)
     assert actual_remote == set(expected_only_remote)
     assert actual_local == set(expected_only_local)
+
+
+def test_checker_write_records():
+    """Tests Checker.write_records()"""
+    stream = io.StringIO()
+    writer = ReportWriter("tsv", stream)
+    Checker.write_records(
+        writer,
+        "ngs_mapping",
+        both_locations={"/local/out/b.bam", "/local/out/a.bam"},
+        only_remote={"/sodar_path/c.bam"},
+        only_local=set(),
+    )
+    writer.write_summary()
+    assert stream.getvalue().splitlines() == [
+        "category\tdirectory\tname\tchecksum\tstep\tdetail",
+        "both\t/local/out\ta.bam\t\tngs_mapping\t",
+        "both\t/local/out\tb.bam\t\tngs_mapping\t",
+        "remote-only\t/sodar_path\tc.bam\t\tngs_mapping\t",
+        "# summary: both=2 remote-only=1",
+    ]
+
+
+def test_checker_report_findings():
+    """Tests Checker.report_findings() and Checker.report_findings_checksum()"""
+    stream = io.StringIO()
+    Checker.report_findings(
+        both_locations={"/local/out/b.bam", "/local/out/a.bam", "/local/in/c.bam"},
+        only_remote=set(),
+        only_local={"/local/out/d.bam"},
+        stream=stream,
+    )
+    Checker.report_findings_checksum(
+        {"/local/out/a.bam"}, [("/local/out/b.bam", "/sodar_path/b.bam")], stream
+    )
+    assert stream.getvalue().splitlines() == [
+        "Files found BOTH locally and remotely:",
+        "/local/in:",
+        "    c.bam",
+        "/local/out:",
+        "    a.bam",
+        "    b.bam",
+        "No file found only remotely.",
+        "Files found ONLY LOCALLY:",
+        "/local/out:",
+        "    d.bam",
+        "-------------------------",
+        "Files with SAME MD5 locally and remotely:",
+        "/local/out:",
+        "    a.bam",
+        "Files with DIFFERENT MD5 locally and remotely:",
+        "/local/out:",
+        "    b.bam  [i:/sodar_path/b.bam]",
+    ]
+
+
+def test_compare_checksum_files(tmp_path):
+    """Tests Checker.compare_checksum_files() with the same file name in two libraries"""
+    checksums = {"P001-N1-DNA1-WES1": "a" * 32, "P002-N1-DNA1-WES1": "b" * 32}
+    in_both_set = set()
+    local_libraries = {}
+    remote_dict = {"R1.fastq.gz": []}
+    for library_name, checksum in checksums.items():
+        local_dir = tmp_path / "ngs_mapping" / "work" / "input_links" / library_name
+        local_dir.mkdir(parents=True)
+        (local_dir / "R1.fastq.gz.md5").write_text(f"{checksum}  R1.fastq.gz\n")
+        in_both_set.add(str(local_dir / "R1.fastq.gz"))
+        local_libraries[str(local_dir)] = library_name
+        remote_dict["R1.fastq.gz"].append(
+            IrodsDataObject(
+                name="R1.fastq.gz",
+                type="obj",
+                path=f"/assay/{library_name}/raw_data/2024-01-01/R1.fastq.gz",
+                size=0,
+                modify_time=datetime.datetime(2024, 1, 1),
+                checksum=checksum,
+            )
+        )
+    # second upload of the first library with a different checksum
+    remote_dict["R1.fastq.gz"].append(
+        attr.evolve(
+            remote_dict["R1.fastq.gz"][0],
+            path="/assay/P001-N1-DNA1-WES1/raw_data/2024-02-01/R1.fastq.gz",
+            checksum="c" * 32,
+        )
+    )
+
+    same, different = Checker.compare_checksum_files(
+        remote_dict, in_both_set, "raw_data", local_libraries, irods_basepath="/assay", threads=2
+    )
+    assert sorted(same) == sorted(in_both_set)
+    assert different == [
+        (
+            str(tmp_path / "ngs_mapping/work/input_links/P001-N1-DNA1-WES1/R1.fastq.gz"),
+            "/assay/P001-N1-DNA1-WES1/raw_data/2024-02-01/R1.fastq.gz",
+        )
+    ]
+
+    # missing local checksum files are skipped
+    (tmp_path / "ngs_mapping/work/input_links/P002-N1-DNA1-WES1/R1.fastq.gz.md5").unlink()
+    same, different = Checker.compare_checksum_files(
+        remote_dict, in_both_set, "raw_data", local_libraries, irods_basepath="/assay"
+    )
+    assert same == [str(tmp_path / "ngs_mapping/work/input_links/P001-N1-DNA1-WES1/R1.fastq.gz")]
@@ -20,7 +20,7 @@ def load_isa_dict(dictName):
         return json.load(file)
 
 
-@patch("cubi_tk.sodar_api.requests.get")
+@patch("cubi_tk.sodar_api.make_http_session")
 def test_build_sheet_germline(mocker):
     """Tests ``build_sheet()`` - for germline ISA tab"""
     args = Namespace(
@@ -43,13 +43,15 @@ def test_build_sheet_germline(mocker):
     path = pathlib.Path(__file__).resolve().parent / "data" / "pull_sheets" / "sheet_germline.tsv"
     with open(path, "r") as file:
         expected = "".join(file.readlines())
-    mocker.return_value.status_code = 200
-    mocker.return_value.json = MagicMock(return_value=load_isa_dict("isa_dict_germline.txt"))
+    mocker.return_value.get.return_value.status_code = 200
+    mocker.return_value.get.return_value.json = MagicMock(
+        return_value=load_isa_dict("isa_dict_germline.txt")
+    )
     actual = build_sheet(args=args, project_uuid="", sodar_api=SodarApi(args, set_default=True))
     assert actual == expected
 
 
-@patch("cubi_tk.sodar_api.requests.get")
+@patch("cubi_tk.sodar_api.make_http_session")
 def test_build_sheet_cancer(mocker):
     """Tests ``build_sheet()`` - for cancer ISA tab"""
     args = Namespace(
@@ -72,8 +74,10 @@ def test_build_sheet_cancer(mocker):
     path = pathlib.Path(__file__).resolve().parent / "data" / "pull_sheets" / "sheet_cancer.tsv"
     with open(path, "r") as file:
         expected = "".join(file.readlines())
-    mocker.return_value.status_code = 200
-    mocker.return_value.json = MagicMock(return_value=load_isa_dict("isa_dict_cancer.txt"))
+    mocker.return_value.get.return_value.status_code = 200
+    mocker.return_value.get.return_value.json = MagicMock(
+        return_value=load_isa_dict("isa_dict_cancer.txt")
+    )
     actual = build_sheet(args=args, project_uuid="", sodar_api=SodarApi(args, set_default=True))
     assert actual == expected
 
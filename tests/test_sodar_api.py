@@ -1,4 +1,6 @@
 from argparse import Namespace
+from datetime import datetime, timezone
+import json
 import os
 
 import cattr
@@ -6,9 +8,15 @@ import cattr
 import pytest
 from unittest.mock import patch, MagicMock
 
-from cubi_tk.api_models import IrodsDataObject
-from cubi_tk.sodar_api import GLOBAL_CONFIG_PATH, SodarApi
-from cubi_tk.exceptions import SodarApiException
+from cubi_tk.api_models import IrodsDataObject, structure_irods_data_object
+from cubi_tk.sodar_api import (
+    GLOBAL_CONFIG_PATH,
+    SodarApi,
+    iter_json_array,
+    make_http_session,
+    read_project_uuids,
+)
+from cubi_tk.exceptions import ParameterException, SodarApiException
 from tests.factories import InvestigationFactory
 
 
@@ -60,8 +68,18 @@ def test_sodar_api_check_args(sodar_api_args, mock_toml_config, fs):
     )
 
 
-@patch("cubi_tk.sodar_api.requests.get")
-@patch("cubi_tk.sodar_api.requests.post")
+def test_make_http_session():
+    session = make_http_session(pool_maxsize=4)
+    adapter = session.get_adapter("https://sodar-staging.bihealth.org/")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+    # POST requests must never be retried automatically
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+@patch("cubi_tk.sodar_api.requests.Session.get")
+@patch("cubi_tk.sodar_api.requests.Session.post")
 def test_sodar_api_api_call(mock_post, mock_get, sodar_api_instance):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json = MagicMock(return_value={"test": "test"})
@@ -186,7 +204,7 @@ def test_sodar_api_get_samplesheet_file_list(requests_mock, sodar_api_instance):
             type="file",
             path="collection/File Name",
             size=10,
-            modify_time="2025-01-01 00:00:00",
+            modify_time=datetime(2025, 1, 1),
             checksum="1234567890",
         ),
         IrodsDataObject(
@@ -194,9 +212,200 @@ def test_sodar_api_get_samplesheet_file_list(requests_mock, sodar_api_instance):
             type="obj",
             path="collection",
             size=1,
-            modify_time="2025-01-01 00:00:00",
+            modify_time=datetime(2025, 1, 1),
             checksum="000000",
         ),
     ]
 
     assert expected == sodar_api_instance.get_samplesheet_file_list()
+    assert expected == list(sodar_api_instance.iter_samplesheet_file_list())
+
+
+def test_iter_json_array():
+    data = [{"name": "äöü", "size": 123456, "nested": [1, 2, {"a": "]"}]}, 7890, "x,y", None, []]
+    text = json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8")
+    # split at every possible position, including inside multi-byte characters and numbers
+    for split in range(len(text) + 1):
+        assert list(iter_json_array([text[:split], text[split:]])) == data
+    assert list(iter_json_array([b" [ ] "])) == []
+    assert list(iter_json_array(iter([b"[1", b"2", b"3]"]))) == [123]
+
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[1, 2"]))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[1] 2"]))
+
+
+def test_sodar_api_memoize_read_only_calls(requests_mock, sodar_api_instance):
+    url_prefix = "https://sodar-staging.bihealth.org/samplesheets/api"
+    project_uuid = "123e4567-e89b-12d3-a456-426655440000"
+    investigation_mock = requests_mock.register_uri(
+        "GET",
+        f"{url_prefix}/investigation/retrieve/{project_uuid}",
+        json=cattr.unstructure(InvestigationFactory()),
+        status_code=200,
+    )
+    post_mock = requests_mock.register_uri(
+        "POST",
+        f"{url_prefix}/irods/request/create/{project_uuid}",
+        json={},
+        status_code=200,
+    )
+
+    first = sodar_api_instance.get_samplesheet_investigation_retrieve()
+    second = sodar_api_instance.get_samplesheet_investigation_retrieve()
+    assert first == second
+    assert investigation_mock.call_count == 1
+
+    # POST requests invalidate the cache
+    sodar_api_instance.post_samplesheet_deletion_request_create("/some/path")
+    assert post_mock.call_count == 1
+    sodar_api_instance.get_samplesheet_investigation_retrieve()
+    assert investigation_mock.call_count == 2
+
+
+def test_sodar_api_disk_cache(requests_mock, sodar_api_args, tmp_path):
+    url = "https://sodar-staging.bihealth.org/samplesheets/api/export/json/123e4567-e89b-12d3-a456-426655440000"
+    ret_json = {
+        "investigation": {"path": "i_Investigation.txt", "tsv": ""},
+        "studies": {"s_Study_0.txt": {"tsv": ""}},
+        "assays": {"a_name_0": {"tsv": ""}},
+    }
+    args = Namespace(**sodar_api_args, no_cache=False, refresh_cache=False, cache_ttl=0)
+    args.cache_dir = str(tmp_path)
+
+    # first call fetches and stores the response together with its ETag
+    export_mock = requests_mock.register_uri(
+        "GET", url, json=ret_json, headers={"ETag": '"v1"'}, status_code=200
+    )
+    assert SodarApi(args).get_samplesheet_export(get_all=True) == ret_json
+    assert "If-None-Match" not in export_mock.last_request.headers
+
+    # second invocation revalidates the entry and re-uses the body on 304
+    (entry_path,) = tmp_path.glob("*/*/*.json")
+    content = entry_path.read_bytes()
+    os.utime(entry_path, (0, 0))
+    export_mock = requests_mock.register_uri("GET", url, status_code=304)
+    assert SodarApi(args).get_samplesheet_export(get_all=True) == ret_json
+    assert export_mock.last_request.headers["If-None-Match"] == '"v1"'
+    # only the modification time of the entry is updated
+    assert entry_path.read_bytes() == content
+    assert entry_path.stat().st_mtime > 0
+
+    # --refresh ignores the cached entry
+    args.refresh_cache = True
+    export_mock = requests_mock.register_uri("GET", url, json={**ret_json, "new": 1})
+    assert SodarApi(args).get_samplesheet_export(get_all=True)["new"] == 1
+    assert "If-None-Match" not in export_mock.last_request.headers
+
+    # --no-cache does not write anything
+    args.refresh_cache = False
+    args.no_cache = True
+    args.cache_dir = str(tmp_path / "unused")
+    SodarApi(args).get_samplesheet_export(get_all=True)
+    assert not (tmp_path / "unused").exists()
+
+
+def test_sodar_api_disk_cache_ttl(requests_mock, sodar_api_args, tmp_path):
+    url = "https://sodar-staging.bihealth.org/samplesheets/api/export/json/123e4567-e89b-12d3-a456-426655440000"
+    args = Namespace(
+        **sodar_api_args, no_cache=False, refresh_cache=False, cache_ttl=3600, cache_dir=tmp_path
+    )
+    export_mock = requests_mock.register_uri("GET", url, json={"assays": {}}, status_code=200)
+    SodarApi(args).get_samplesheet_export(get_all=True)
+    SodarApi(args).get_samplesheet_export(get_all=True)
+    # entry without validators is re-used within the TTL
+    assert export_mock.call_count == 1
+
+
+def test_structure_irods_data_object():
+    obj = {
+        "name": "file.txt",
+        "type": "obj",
+        "path": "/sodarZone/collection/file.txt",
+        "size": "10",
+        "modify_time": "2025-01-01T12:30:00Z",
+        "checksum": "1234567890",
+    }
+    irods_obj = structure_irods_data_object(obj)
+    assert irods_obj.size == 10
+    assert irods_obj.modify_time == datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc)
+    # generic structuring uses the specialized hook
+    assert cattr.structure(obj, IrodsDataObject) == irods_obj
+
+
+def test_sodar_api_map_projects(requests_mock, sodar_api_instance):
+    project_uuids = [f"123e4567-e89b-12d3-a456-42665544000{i}" for i in range(5)]
+    for project_uuid in project_uuids[:-1]:
+        requests_mock.register_uri(
+            "GET",
+            f"https://sodar-staging.bihealth.org/samplesheets/api/export/json/{project_uuid}",
+            json={"project": project_uuid},
+            status_code=200,
+        )
+    requests_mock.register_uri(
+        "GET",
+        f"https://sodar-staging.bihealth.org/samplesheets/api/export/json/{project_uuids[-1]}",
+        status_code=404,
+    )
+
+    results = sodar_api_instance.map_projects(
+        project_uuids,
+        lambda api: api._api_call("samplesheets", "export/json")["project"],
+        parallel_projects=3,
+    )
+    assert [r.project_uuid for r in results] == project_uuids
+    assert [r.result for r in results[:-1]] == project_uuids[:-1]
+    assert results[-1].result is None
+    assert isinstance(results[-1].error, SodarApiException)
+    # the instance itself is not modified
+    assert sodar_api_instance.project_uuid == "123e4567-e89b-12d3-a456-426655440000"
+
+
+def test_read_project_uuids(tmp_path):
+    projects_file = tmp_path / "projects.txt"
+    projects_file.write_text(
+        "# comment\n123e4567-e89b-12d3-a456-426655440001\n\n123e4567-e89b-12d3-a456-426655440000\n"
+    )
+    args = Namespace(
+        project_uuid="123e4567-e89b-12d3-a456-426655440000", projects_file=str(projects_file)
+    )
+    assert read_project_uuids(args) == [
+        "123e4567-e89b-12d3-a456-426655440000",
+        "123e4567-e89b-12d3-a456-426655440001",
+    ]
+    projects_file.write_text("not-a-uuid\n")
+    with pytest.raises(ParameterException):
+        read_project_uuids(args)
+
+
+def test_sodar_api_trace_http(requests_mock, sodar_api_args, tmp_path):
+    url_prefix = "https://sodar-staging.bihealth.org/samplesheets/api"
+    project_uuid = "123e4567-e89b-12d3-a456-426655440000"
+    requests_mock.register_uri(
+        "GET", f"{url_prefix}/remote/get/{project_uuid}?isa=1", json={"studies": {}}
+    )
+    requests_mock.register_uri(
+        "GET", f"{url_prefix}/file/list/{project_uuid}", text="nope", status_code=500
+    )
+    trace_path = tmp_path / "trace.jsonl"
+    sodar_api = SodarApi(Namespace(**sodar_api_args, trace_http=str(trace_path)))
+
+    sodar_api.get_samplesheet_remote()
+    sodar_api.get_samplesheet_file_list()
+    sodar_api.tracer.close()
+
+    records = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [(r["method"], r["endpoint"], r["status"]) for r in records] == [
+        ("GET", "samplesheets/remote/get", 200),
+        ("GET", "samplesheets/file/list", 500),
+    ]
+    assert records[0]["size"] == len('{"studies": {}}')
+    assert records[0]["retries"] == 0
+    assert records[0]["latency"] >= 0
+
+    summary = {row["endpoint"]: row for row in sodar_api.tracer.summary()}
+    assert summary["samplesheets/file/list"]["errors"] == 1
+    assert summary["samplesheets/remote/get"]["count"] == 1
@@ -1,7 +1,11 @@
 """Tests for ``cubi_tk.snappy.check_remote``."""
 
+import hashlib
+import json
+import os
 import pathlib
 import re
+import shutil
 
 import pytest
 from unittest.mock import MagicMock, patch
@@ -111,6 +115,40 @@ def test_findlocalmd5_run(local_file_objects):
     assert all(expected_all[dirname] == filelist for dirname, filelist in actual.items())
 
 
+def test_findlocalmd5_prune_regex(local_file_objects):
+    test_dir_path = pathlib.Path(__file__).resolve().parent / "data" / "sodar_check_remote"
+    expected_2 = {k: v for k, v in local_file_objects.items() if str(k).endswith("2")}
+
+    finder = FindLocalChecksumFiles(
+        test_dir_path,
+        hash_scheme="MD5",
+        regex_pattern=f"^{re.escape(str(test_dir_path))}/test2/.*txt$",
+    )
+    assert finder.regex_prefix == f"{test_dir_path}/test2/"
+    assert finder._prune(str(test_dir_path / "test1"))
+    assert not finder._prune(str(test_dir_path / "test2"))
+    assert finder.run() == expected_2
+
+    # unanchored patterns can not be used for pruning
+    finder = FindLocalChecksumFiles(test_dir_path, hash_scheme="MD5", regex_pattern="test2.txt$")
+    assert not finder._prune(str(test_dir_path / "test1"))
+    assert finder.run() == expected_2
+
+
+def test_findlocalmd5_prune_regex_relative_base_path(tmp_path, monkeypatch):
+    for path in ("sub/x/a.txt", "sub/y/b.txt"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+        (tmp_path / f"{path}.md5").write_text("d41d8cd98f00b204e9800998ecf8427e  x\n")
+    monkeypatch.chdir(tmp_path)
+
+    finder = FindLocalChecksumFiles(".", hash_scheme="MD5", regex_pattern="^sub/x")
+    assert not finder._prune("./sub")
+    assert not finder._prune("./sub/x")
+    assert finder._prune("./sub/y")
+    assert [str(p) for p in finder.find_checksum_files()] == ["sub/x/a.txt.md5"]
+
+
 def test_filecomparisoncheck_compare_local_and_remote_files(irods_file_objects, local_file_objects):
     """Tests FileComparisonChecker.compare_local_and_remote_files()"""
     test_dir_path = pathlib.Path(__file__).resolve().parent / "data" / "sodar_check_remote"
@@ -147,6 +185,37 @@ def test_filecomparisoncheck_compare_local_and_remote_files(irods_file_objects,
     assert expected_remote == actual_remote
 
 
+def test_filecomparisoncheck_compare_same_name_files():
+    """Tests matching of files with the same name in multiple (local and remote) directories"""
+    checksum = "fa029a7f2a3ca5a03fe682d3b77c7f0d"
+    irods_files = {
+        "a.txt": [
+            IrodsDataObject("a.txt", "/assay/s1/a.txt", checksum, 3 * [checksum]),
+            IrodsDataObject("a.txt", "/assay/s2/a.txt", checksum, 3 * [checksum]),
+            IrodsDataObject("a.txt", "/assay/s3/a.txt", "other", 3 * ["other"]),
+            IrodsDataObject("a.txt", "/elsewhere/a.txt", checksum, 3 * [checksum]),
+        ]
+    }
+    local_files = {
+        "l1": [FileDataObject("a.txt", "l1/a.txt", checksum)],
+        "l2": [FileDataObject("a.txt", "l2/a.txt", checksum)],
+        "l3": [FileDataObject("a.txt", "l3/a.txt", "unknown")],
+    }
+    actual_both, actual_local, actual_remote = FileComparisonChecker.compare_local_and_remote_files(
+        local_files, irods_files, irods_basepath="/assay"
+    )
+    assert actual_both == {"l1": local_files["l1"], "l2": local_files["l2"]}
+    assert actual_local == {"l3": local_files["l3"]}
+    assert actual_remote == {"s3": [FileDataObject("a.txt", "s3", "other")]}
+
+    actual_both, actual_local, actual_remote = FileComparisonChecker.compare_local_and_remote_files(
+        local_files, irods_files, filenames_only=True, irods_basepath="/assay"
+    )
+    assert actual_both == local_files
+    assert actual_local == {}
+    assert actual_remote == {}
+
+
 # Smoketest, including regex and out
 @patch("cubi_tk.sodar.check_remote.RetrieveSodarCollection")
 def test_sodar_check_remote(mock_rsc, irods_file_objects, capsys):  # noqa: C901
@@ -260,3 +329,197 @@ def test_sodar_check_remote(mock_rsc, irods_file_objects, capsys):  # noqa: C901
     ]
     assert output == get_expected((1, 2), (3,), (3, 5), incl_checksums=True)
     # FIXME: add test with mismatching local checksum between md5 file & actual md5
+
+
+@patch("cubi_tk.sodar.check_remote.RetrieveSodarCollection")
+def test_sodar_check_remote_structured_output(mock_rsc, irods_file_objects, tmp_path):
+    mock_rsc.return_value = MagicMock(
+        irods_hash_scheme="MD5",
+        perform=MagicMock(return_value=irods_file_objects),
+        get_assay_irods_path=MagicMock(return_value="/"),
+    )
+    test_dir_path = pathlib.Path(__file__).resolve().parent / "data" / "sodar_check_remote"
+    argv = ["sodar", "check-remote", "-p", str(test_dir_path), "DUMMY-UUID"]
+
+    main(argv + ["--format", "jsonl", "--output", str(tmp_path / "report.jsonl")])
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").read_text().splitlines()]
+    assert lines[-1] == {"summary": {"both": 2, "local-only": 1, "remote-only": 2}}
+    assert sorted((r["category"], r["name"]) for r in lines[:-1]) == [
+        ("both", "test1.txt"),
+        ("both", "test2.txt"),
+        ("local-only", "test3.txt"),
+        ("remote-only", "test3.txt"),
+        ("remote-only", "test5.txt"),
+    ]
+    assert set(lines[0]) == {"category", "directory", "name", "checksum", "step", "detail"}
+
+    main(
+        argv
+        + ["--format", "tsv", "--report-categories", "local-only"]
+        + ["--output", str(tmp_path / "report.tsv")]
+    )
+    assert (tmp_path / "report.tsv").read_text().splitlines() == [
+        "category\tdirectory\tname\tchecksum\tstep\tdetail",
+        f"local-only\t{test_dir_path / 'test3'}\ttest3.txt\td6618babc17b25b73eb0d0a68947babd\t\t",
+        "# summary: local-only=1",
+    ]
+
+
+@patch("cubi_tk.sodar.check_remote.RetrieveSodarCollection")
+def test_sodar_check_remote_incremental(mock_rsc, irods_file_objects, tmp_path, mocker):
+    mock_rsc.return_value = MagicMock(
+        irods_hash_scheme="MD5",
+        perform=MagicMock(return_value=irods_file_objects),
+        get_assay_irods_path=MagicMock(return_value="/"),
+    )
+    local_path = tmp_path / "local"
+    shutil.copytree(
+        pathlib.Path(__file__).resolve().parent / "data" / "sodar_check_remote", local_path
+    )
+    argv = [
+        "sodar",
+        "check-remote",
+        "-p",
+        str(local_path),
+        "--incremental",
+        "--cache-dir",
+        str(tmp_path / "cache"),
+        "--format",
+        "jsonl",
+        "--output",
+        str(tmp_path / "report.jsonl"),
+        "DUMMY-UUID",
+    ]
+    read_spy = mocker.spy(FindLocalChecksumFiles, "read_recorded_checksum")
+
+    main(argv)
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").read_text().splitlines()]
+    assert lines[-1] == {"summary": {"both": 2, "local-only": 1, "remote-only": 2}}
+    assert read_spy.call_count == 3
+    assert len(list((tmp_path / "cache" / "check-remote").glob("*.json"))) == 1
+
+    # only the new directory (and its parent) are listed again
+    (local_path / "test4").mkdir()
+    (local_path / "test4" / "test4.txt").write_text("test4\n")
+    (local_path / "test4" / "test4.txt.md5").write_text(
+        "b5163cf270a3fbac34827c4a2713eef4  test4.txt\n"
+    )
+    read_spy.reset_mock()
+    main(argv)
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").read_text().splitlines()]
+    assert lines[-1] == {"summary": {"both": 2, "local-only": 2, "remote-only": 2, "changed": 1}}
+    assert read_spy.call_count == 1
+    assert lines[-2] == {
+        "category": "changed",
+        "directory": str(local_path / "test4"),
+        "name": "test4.txt",
+        "checksum": None,
+        "step": None,
+        "detail": "absent -> local-only",
+    }
+
+    # rewriting a checksum file in place does not change its directory, it is read again anyway
+    test4_mtime = (local_path / "test4").stat().st_mtime_ns
+    (local_path / "test4" / "test4.txt.md5").write_text(
+        "00000000000000000000000000000000  test4.txt\n"
+    )
+    os.utime(local_path / "test4", ns=(test4_mtime, test4_mtime))
+    read_spy.reset_mock()
+    main(argv)
+    lines = [json.loads(line) for line in (tmp_path / "report.jsonl").read_text().splitlines()]
+    assert read_spy.call_count == 1
+    assert [line for line in lines if line.get("name") == "test4.txt"] == [
+        {
+            "category": "local-only",
+            "directory": str(local_path / "test4"),
+            "name": "test4.txt",
+            "checksum": "00000000000000000000000000000000",
+            "step": None,
+            "detail": None,
+        }
+    ]
+    (local_path / "test4" / "test4.txt.md5").write_text(
+        "b5163cf270a3fbac34827c4a2713eef4  test4.txt\n"
+    )
+    main(argv)
+
+    # tiered runs use their own state
+    main(argv + ["--tiered"])
+    assert len(list((tmp_path / "cache" / "check-remote").glob("*.json"))) == 2
+
+    # a full scan keeps the stored listings for the next incremental run
+    main(argv + ["--recheck-checksum"])
+    read_spy.reset_mock()
+    main(argv)
+    assert read_spy.call_count == 0
+
+
+def test_filecomparisoncheck_tiered(tmp_path):
+    """Tests FileComparisonChecker.iter_tiered_compare_local_and_remote_files()"""
+    md5 = {
+        name: hashlib.md5(name.encode()).hexdigest() for name in ("a.txt", "b.txt", "c.txt", "d")
+    }
+    (tmp_path / "a.txt").write_text("a.txt")
+    (tmp_path / "a.txt.md5").write_text(f"{md5['a.txt']}  a.txt\n")
+    (tmp_path / "b.txt").write_text("b.txt")
+    (tmp_path / "c.txt").write_text("c.txt")
+    (tmp_path / "c.txt.md5").write_text(f"{md5['a.txt']}  c.txt\n")  # outdated
+    (tmp_path / "d.txt").write_text("d")
+
+    def remote(name, checksum, size):
+        obj = IrodsDataObject(name, f"/assay/{name}", checksum, [checksum])
+        obj.size = size
+        return obj
+
+    irods_files = {
+        "a.txt": [remote("a.txt", md5["a.txt"], 5)],
+        "b.txt": [remote("b.txt", md5["b.txt"], 5)],
+        "c.txt": [remote("c.txt", md5["c.txt"], 5)],
+        "d.txt": [remote("d.txt", md5["d"], 2)],
+        "e.txt": [remote("e.txt", md5["d"], 1)],
+    }
+    local_files = FindLocalChecksumFiles(tmp_path, hash_scheme="MD5", include_unchecked=True).run()
+    assert [(f.file_name, f.file_size) for f in local_files[tmp_path]] == [
+        ("a.txt", 5),
+        ("b.txt", 5),
+        ("c.txt", 5),
+        ("d.txt", 1),
+    ]
+    assert local_files[tmp_path][1].file_checksum is None
+
+    def compare(hash_budget):
+        return sorted(
+            (category, file.file_name, tier)
+            for category, _, file, tier in (
+                FileComparisonChecker.iter_tiered_compare_local_and_remote_files(
+                    local_files, irods_files, "/assay", hash_budget=hash_budget
+                )
+            )
+        )
+
+    assert compare(0) == [
+        ("both", "a.txt", "checksum"),
+        ("both", "b.txt", "size"),
+        ("local-only", "c.txt", "checksum"),
+        ("local-only", "d.txt", "size"),
+        ("remote-only", "c.txt", None),
+        ("remote-only", "d.txt", None),
+        ("remote-only", "e.txt", None),
+    ]
+    # c.txt fits into the budget, the sizes of the hashed files are accounted for
+    assert compare(10) == [
+        ("both", "a.txt", "checksum"),
+        ("both", "b.txt", "hashed"),
+        ("both", "c.txt", "hashed"),
+        ("local-only", "d.txt", "size"),
+        ("remote-only", "d.txt", None),
+        ("remote-only", "e.txt", None),
+    ]
+    assert compare(5)[1:3] == [("both", "b.txt", "hashed"), ("local-only", "c.txt", "checksum")]
+
+    # missing checksums on both sides are no checksum match
+    (tmp_path / "f.txt").write_text("f")
+    local_files = {tmp_path: [FileDataObject("f.txt", str(tmp_path / "f.txt"), None, 1)]}
+    irods_files = {"f.txt": [remote("f.txt", None, 1)]}
+    assert compare(0) == [("both", "f.txt", "size")]
+    assert compare(10) == [("local-only", "f.txt", "hashed"), ("remote-only", "f.txt", None)]
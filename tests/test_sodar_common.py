@@ -0,0 +1,138 @@
+"""Tests for ``cubi_tk.sodar_common``."""
+
+import argparse
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cubi_tk.exceptions import ParameterException
+from cubi_tk.irods_common import TransferJob
+from cubi_tk.sodar_common import SodarIngestBase
+
+LZ_PATH = "/zone/projects/ab/1234/landing_zones/user/study/assay/lz"
+ASSAY_PATH = "/zone/projects/ab/1234/sample_data/study/assay"
+
+
+def make_ingest(**kwargs):
+    ingest = SodarIngestBase.__new__(SodarIngestBase)
+    args = {"overwrite": "sync", "plan_only": False, "plan_against_project": False}
+    args.update(kwargs)
+    ingest.args = argparse.Namespace(**args)
+    ingest.lz_irods_path = LZ_PATH
+    ingest.itransfer = MagicMock()
+    ingest.sodar_api = MagicMock()
+    return ingest
+
+
+def make_jobs(*names):
+    return [
+        TransferJob(f"/local/{name}{ext}", f"{LZ_PATH}/{name}{ext}", bytes=10 if not ext else 40)
+        for name in names
+        for ext in ("", ".md5")
+    ]
+
+
+def test_get_remote_sizes():
+    ingest = make_ingest(plan_against_project=True)
+    ingest.itransfer.remote_sizes.return_value = {f"{LZ_PATH}/a.txt": 10}
+    assay = MagicMock(irods_path=ASSAY_PATH)
+    ingest.sodar_api.get_assay_from_uuid.return_value = (assay, None)
+    ingest.sodar_api.iter_samplesheet_file_list.return_value = [
+        MagicMock(type="obj", path=f"{ASSAY_PATH}/a.txt", size=5),
+        MagicMock(type="obj", path=f"{ASSAY_PATH}/b.txt", size=10),
+        MagicMock(type="coll", path=f"{ASSAY_PATH}/c", size=0),
+        MagicMock(type="obj", path="/zone/projects/ab/1234/sample_data/other/b.txt", size=1),
+    ]
+
+    # the landing zone takes precedence over the project
+    assert ingest.get_remote_sizes() == {"a.txt": 10, "b.txt": 10}
+    ingest.itransfer.remote_sizes.assert_called_once_with(LZ_PATH)
+
+
+def test_plan_jobs():
+    ingest = make_ingest()
+    ingest.get_remote_sizes = MagicMock(
+        return_value={
+            "same.txt": 10,
+            "same.txt.md5": 40,
+            "same_nomd5.txt": 10,
+            "changed.txt": 9,
+            "changed.txt.md5": 40,
+        }
+    )
+    jobs = make_jobs("new.txt", "same.txt", "same_nomd5.txt", "changed.txt")
+
+    plan = ingest.plan_jobs(jobs, ".md5")
+
+    assert {category: sorted(j.path_local for j in js) for category, js in plan.items()} == {
+        "new": [
+            "/local/new.txt",
+            "/local/new.txt.md5",
+            "/local/same_nomd5.txt.md5",
+        ],
+        "changed": ["/local/changed.txt", "/local/changed.txt.md5"],
+        "identical": ["/local/same.txt", "/local/same.txt.md5", "/local/same_nomd5.txt"],
+    }
+
+
+def test_select_planned_jobs():
+    jobs = make_jobs("new.txt", "same.txt", "changed.txt")
+    remote_sizes = {"same.txt": 10, "same.txt.md5": 40, "changed.txt": 9, "changed.txt.md5": 40}
+
+    def selected(**kwargs):
+        ingest = make_ingest(**kwargs)
+        ingest.get_remote_sizes = MagicMock(return_value=remote_sizes)
+        result = ingest.select_planned_jobs(jobs, ".md5")
+        return result if result is None else [j.path_local for j in result]
+
+    assert selected() == [
+        "/local/changed.txt",
+        "/local/changed.txt.md5",
+        "/local/new.txt",
+        "/local/new.txt.md5",
+    ]
+    assert selected(overwrite="never") == ["/local/new.txt", "/local/new.txt.md5"]
+    assert selected(overwrite="always") == [j.path_local for j in jobs]
+    # identical files are asked about
+    assert selected(overwrite="ask") == sorted(j.path_local for j in jobs)
+    assert selected(plan_only=True) is None
+
+    # fall back to uploading everything if the landing zone cannot be listed
+    ingest = make_ingest()
+    ingest.get_remote_sizes = MagicMock(side_effect=ConnectionError("no connection"))
+    assert ingest.select_planned_jobs(jobs, ".md5") == jobs
+
+
+def test_plan_only_does_not_create_landing_zone():
+    ingest = make_ingest(plan_only=True)
+    ingest.sodar_api.yes = True
+    with pytest.raises(ParameterException):
+        ingest._create_lz()
+    ingest.sodar_api.post_landingzone_create.assert_not_called()
+
+
+@patch("cubi_tk.sodar_common.TransferPipeline")
+def test_execute_failed_transfer(mock_pipeline):
+    ingest = make_ingest(
+        dry_run=False,
+        parallel_checksum_jobs=2,
+        parallel_upload_jobs=1,
+        recompute_checksums=False,
+        remote_checksums=False,
+        validate_and_move=True,
+    )
+    ingest.lz_uuid = "lz-uuid"
+    ingest.itransfer.irods_hash_scheme.return_value = "MD5"
+    ingest.itransfer.ask = False
+    ingest.itransfer.confirm.return_value = True
+    ingest.build_jobs = MagicMock(return_value=make_jobs("new.txt"))
+    ingest.get_remote_sizes = MagicMock(return_value={})
+    mock_pipeline.return_value.run.return_value = 1
+
+    # the landing zone is not moved if files are missing
+    assert ingest.execute() == 1
+    ingest.sodar_api.post_landingzone_submit_move.assert_not_called()
+
+    mock_pipeline.return_value.run.return_value = 0
+    assert ingest.execute() is None
+    ingest.sodar_api.post_landingzone_submit_move.assert_called_once_with("lz-uuid")
@@ -159,3 +159,50 @@ def test_sodar_deletion_requests_smoke_test(mockapi, fake_irods_objs):
     ]
 
     assert 0 == main(argv)
+
+
+@patch("cubi_tk.sodar.deletion_requests_create.SodarApi")
+def test_sodar_deletion_requests_resume_file(mockapi, fake_irods_objs, tmp_path):
+    failing_paths = {"/irods/project-assay/basecol1/subcol"}
+    mockapi_obj = MagicMock()
+    mockapi_obj.get_assay_from_uuid = MagicMock(
+        return_value=(MagicMock(irods_path="/irods/project-assay"), "study")
+    )
+    mockapi_obj.get_samplesheet_file_list = MagicMock(return_value=fake_irods_objs)
+    mockapi_obj.post_samplesheet_deletion_request_create = MagicMock(
+        side_effect=lambda path, _description: int(path in failing_paths)
+    )
+    mockapi.return_value = mockapi_obj
+    resume_file = tmp_path / "resume.txt"
+
+    argv = [
+        "sodar",
+        "deletion-requests",
+        "--sodar-server-url",
+        "sodar_server_url",
+        "--sodar-api-token",
+        "token",
+        "--parallel-requests",
+        "2",
+        "--max-requests-per-second",
+        "0",
+        "--resume-file",
+        str(resume_file),
+        "--",
+        "project-uuid",
+        "*/subcol",
+    ]
+
+    # all requests are submitted, the failed one is recorded for resuming
+    assert 1 == main(argv)
+    assert mockapi_obj.post_samplesheet_deletion_request_create.call_count == 2
+    assert resume_file.read_text() == "/irods/project-assay/basecol1/subcol\n"
+
+    # resuming only submits the failed path and removes the file on success
+    failing_paths.clear()
+    mockapi_obj.post_samplesheet_deletion_request_create.reset_mock()
+    assert 0 == main(argv)
+    mockapi_obj.post_samplesheet_deletion_request_create.assert_called_once_with(
+        "/irods/project-assay/basecol1/subcol", None
+    )
+    assert not resume_file.exists()
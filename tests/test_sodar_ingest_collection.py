@@ -1,6 +1,8 @@
 """Tests for ``cubi_tk.sodar.ingest``."""
 
+import argparse
 from argparse import ArgumentParser
+import functools
 from pathlib import Path
 from unittest.mock import MagicMock, PropertyMock, call, patch
 
@@ -85,9 +87,12 @@ def test_sodar_ingest_collection_build_file_list(fs, caplog):
     args.sources = ["broken_link", "not_here", "loop_src", "testdir", "testdir", "file5", "file6"]
     args.recursive = True
     args.exclude = ["file4", "file5"]
+    # thread pools do not work with pyfakefs
+    args.parallel_scan_jobs = 1
     dummy = MagicMock()
     args_mock = PropertyMock(return_value=args)
     type(dummy).args = args_mock
+    dummy._walk_source_dir = functools.partial(SodarIngestCollection._walk_source_dir, dummy)
 
     fs.create_dir("/testdir/subdir")
     fs.create_file("/testdir/file1")
@@ -136,6 +141,38 @@ def test_sodar_ingest_collection_build_file_list(fs, caplog):
     assert {"spath": Path("file6"), "ipath": Path("file6")} in paths
 
 
+def test_sodar_ingest_collection_build_file_list_excludes(tmp_path):
+    for path in (
+        "run/file1.txt",
+        "run/file1.txt.md5",
+        "run/file2.tar.gz",
+        "run/file2.tar.gz.MD5",
+        "run/file3.log",
+        "run/.snakemake/log/x.txt",
+        "run/sub/.snakemake/y.txt",
+        "run/sub/file4.txt",
+        "run/sub/cache/file5.txt",
+    ):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    args = argparse.Namespace(
+        sources=[str(tmp_path / "run")],
+        recursive=True,
+        exclude=["*.log", ".snakemake", "sub/cache"],
+        parallel_scan_jobs=2,
+    )
+    dummy = MagicMock(args=args)
+    dummy._walk_source_dir = functools.partial(SodarIngestCollection._walk_source_dir, dummy)
+
+    paths = SodarIngestCollection.build_file_list(dummy, ".md5")
+
+    assert sorted(str(p["ipath"]) for p in paths) == [
+        "file1.txt",
+        "file2.tar.gz",
+        "sub/file4.txt",
+    ]
+
+
 @patch("cubi_tk.sodar.ingest_collection.SodarIngestCollection.build_target_coll")
 @patch("cubi_tk.sodar.ingest_collection.SodarIngestCollection.build_file_list")
 def test_sodar_ingest_collection_build_jobs(mock_list, mock_target, target_coll_path, ingest, fs):
@@ -172,7 +209,7 @@ def test_sodar_ingest_collection_build_jobs(mock_list, mock_target, target_coll_
 # @patch("cubi_tk.sodar.ingest_collection.iRODSTransfer")
 @patch("cubi_tk.common.check_call")
 @patch("cubi_tk.sodar_common.iRODSTransfer")
-@patch("cubi_tk.sodar_api.requests.get")
+@patch("cubi_tk.sodar_api.requests.Session.get")
 @patch("cubi_tk.sodar.ingest_collection.SodarIngestCollection._no_files_found_warning")
 @patch("cubi_tk.sodar.ingest_collection.SodarIngestCollection._get_lz_info")
 @patch("cubi_tk.common.Value", MagicMock())
@@ -202,6 +239,8 @@ def test_sodar_ingest_collection_smoketest(
         "token",
         "--parallel-checksum-jobs",
         "0",
+        "--parallel-scan-jobs",
+        "1",
         "--collection",
         "coll",
         "--yes",
@@ -3,6 +3,7 @@
 We only run some smoke tests here.
 """
 
+import argparse
 import datetime
 import json
 import os
@@ -129,6 +130,63 @@ def test_run_sodar_ingest_data_ont_preset_regex():
             assert groups["subfolder"] is None
 
 
+def test_sodar_ingest_data_find_source_files(tmp_path):
+    base = tmp_path / "run"
+    for rel in (
+        "Data/Intensities/BaseCalls/S1_R1.fastq.gz",
+        "Data/Intensities/BaseCalls/S1_R1.fastq.gz.md5",
+        "Data/Intensities/BaseCalls/.hidden.fastq.gz",
+        "Data/Intensities/Thumbnails/S2_R1.fastq.gz",
+        "InterOp/S3_R1.fastq.gz",
+        ".cache/S4_R1.fastq.gz",
+    ):
+        (base / rel).parent.mkdir(parents=True, exist_ok=True)
+        (base / rel).write_text("x")
+    (tmp_path / "linked").mkdir()
+    (tmp_path / "linked" / "S5_R1.fastq.gz").write_text("x")
+    (base / "Data" / "Intensities" / "BaseCalls" / "linked").symlink_to(tmp_path / "linked")
+    (base / "Data" / "Intensities" / "BaseCalls" / "loop").symlink_to(base / "Data")
+
+    ingestdata = SodarIngestData.__new__(SodarIngestData)
+    ingestdata.args = argparse.Namespace(
+        sources=[str(base) + "/"], include_dir=[], parallel_scan_jobs=2
+    )
+    use_regex = re.compile(SRC_REGEX_PRESETS["fastq"])
+
+    def found(regex):
+        return sorted(
+            (os.path.relpath(path, base), os.path.relpath(real_path, tmp_path))
+            for path, real_path, _ in ingestdata.find_source_files(regex)
+        )
+
+    # like glob: hidden files skipped, symlinked directories followed
+    assert found(use_regex) == [
+        (
+            "Data/Intensities/BaseCalls/S1_R1.fastq.gz",
+            "run/Data/Intensities/BaseCalls/S1_R1.fastq.gz",
+        ),
+        ("Data/Intensities/BaseCalls/linked/S5_R1.fastq.gz", "linked/S5_R1.fastq.gz"),
+        (
+            "Data/Intensities/Thumbnails/S2_R1.fastq.gz",
+            "run/Data/Intensities/Thumbnails/S2_R1.fastq.gz",
+        ),
+        ("InterOp/S3_R1.fastq.gz", "run/InterOp/S3_R1.fastq.gz"),
+    ]
+
+    ingestdata.args.include_dir = ["Data/*/BaseCalls"]
+    assert [path for path, _ in found(use_regex)] == [
+        "Data/Intensities/BaseCalls/S1_R1.fastq.gz",
+        "Data/Intensities/BaseCalls/linked/S5_R1.fastq.gz",
+    ]
+
+    # directories outside the literal prefix of the regex are not entered
+    ingestdata.args.include_dir = []
+    with patch("cubi_tk.common.os.scandir", wraps=os.scandir) as mock_scandir:
+        regex = re.compile(re.escape(f"{base}/InterOp/") + r"(?P<sample>.+)_R1\.fastq\.gz")
+        assert [path for path, _ in found(regex)] == ["InterOp/S3_R1.fastq.gz"]
+    assert sorted(c.args[0] for c in mock_scandir.call_args_list) == [str(base), f"{base}/InterOp"]
+
+
 @patch("cubi_tk.sodar.ingest_data.SodarIngestData._get_lz_info", my_get_lz_info)
 def test_run_sodar_ingest_data_get_match_to_collection_mapping(requests_mock, fs):
     # Patched sodar API call
@@ -151,6 +209,9 @@ def test_run_sodar_ingest_data_get_match_to_collection_mapping(requests_mock, fs
         "ingest-data",
         "--parallel-checksum-jobs",
         "0",
+        # thread pools do not work with pyfakefs
+        "--parallel-scan-jobs",
+        "1",
         "--sodar-server-url",
         "https://sodar-staging.bihealth.org/",
         "--sodar-api-token",
@@ -218,6 +279,9 @@ def test_run_sodar_ingest_data_smoke_test(mocker, requests_mock, fs):
         "ingest-data",
         "--parallel-checksum-jobs",
         "0",
+        # thread pools do not work with pyfakefs
+        "--parallel-scan-jobs",
+        "1",
         "--sodar-server-url",
         "https://sodar-staging.bihealth.org/",
         "--sodar-api-token",
@@ -363,6 +427,9 @@ def test_run_sodar_ingest_data_smoke_test_ont_preset(mocker, requests_mock, fs):
         "ingest-data",
         "--parallel-checksum-jobs",
         "0",
+        # thread pools do not work with pyfakefs
+        "--parallel-scan-jobs",
+        "1",
         "--sodar-server-url",
         "https://sodar-staging.bihealth.org/",
         "--sodar-api-token",
@@ -0,0 +1,116 @@
+"""Tests for ``cubi_tk.sodar_inventory`` and its use in ``RetrieveSodarCollection``"""
+
+from argparse import Namespace
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from cubi_tk.api_models import IrodsDataObject
+from cubi_tk.sodar_common import RetrieveSodarCollection
+from cubi_tk.sodar_inventory import SodarInventory
+
+SERVER = "https://sodar-staging.bihealth.org/"
+PROJECT = "123e4567-e89b-12d3-a456-426655440000"
+
+
+def make_obj(path, size=1, checksum="abc", day=1):
+    return IrodsDataObject(
+        name=path.rsplit("/", 1)[1],
+        type="obj",
+        path=path,
+        size=size,
+        modify_time=datetime(2024, 1, day, tzinfo=timezone.utc),
+        checksum=checksum,
+    )
+
+
+def test_inventory_sync(tmp_path):
+    inventory = SodarInventory(tmp_path / "inventory.sqlite3")
+    assert inventory.listing_age(SERVER, PROJECT) is None
+
+    listing = [make_obj("/zone/a/x.txt"), make_obj("/zone/a/y.txt"), make_obj("/zone/b/z.txt")]
+    assert list(inventory.sync(SERVER, PROJECT, listing)) == listing
+    assert list(inventory.iter_objects(SERVER, PROJECT)) == listing
+    assert inventory.listing_age(SERVER, PROJECT) < 60
+    assert list(inventory.iter_objects(SERVER, PROJECT, collection="/zone/b")) == listing[2:]
+
+    # changed and removed objects are updated
+    listing = [make_obj("/zone/a/x.txt", size=2, day=2), make_obj("/zone/b/z.txt")]
+    with patch.object(inventory, "_upsert", wraps=inventory._upsert) as upsert:
+        list(inventory.sync(SERVER, PROJECT, listing))
+    upsert.assert_called_once_with(
+        [
+            (
+                SERVER,
+                PROJECT,
+                "/zone/a/x.txt",
+                "/zone/a",
+                "x.txt",
+                "obj",
+                2,
+                "2024-01-02T00:00:00+00:00",
+                "abc",
+            )
+        ]
+    )
+    assert list(inventory.iter_objects(SERVER, PROJECT)) == listing
+
+    # no write lock is held while the listing is consumed
+    stream = inventory.sync(SERVER, PROJECT, [make_obj("/zone/b/z.txt", day=3)])
+    next(stream)
+    other = SodarInventory(tmp_path / "inventory.sqlite3")
+    other._conn.execute("PRAGMA busy_timeout = 0")
+    list(other.sync(SERVER, "other-project", [make_obj("/zone/d/w.txt")]))
+    assert list(stream) == []
+    assert list(inventory.iter_objects(SERVER, PROJECT)) == [make_obj("/zone/b/z.txt", day=3)]
+    listing = [make_obj("/zone/a/x.txt", size=2, day=2), make_obj("/zone/b/z.txt")]
+    list(inventory.sync(SERVER, PROJECT, listing))
+
+    # an interrupted listing does not change anything
+    stream = inventory.sync(SERVER, PROJECT, [make_obj("/zone/c/new.txt")])
+    next(stream)
+    stream.close()
+    assert list(inventory.iter_objects(SERVER, PROJECT)) == listing
+
+
+@patch("cubi_tk.sodar_common.iRODSCommon")
+def test_retrieve_sodar_collection_inventory(mock_irods_common, tmp_path):
+    mock_irods_common.return_value.irods_hash_scheme.return_value = "MD5"
+    args = Namespace(
+        config=None,
+        config_profile="global",
+        sodar_server_url=SERVER,
+        sodar_api_token="token",
+        project_uuid=PROJECT,
+        no_cache=False,
+        refresh_cache=False,
+        cache_dir=str(tmp_path),
+        inventory_max_age=3600,
+    )
+    listing = [make_obj("/zone/a/x.txt"), make_obj("/zone/a/x.txt.md5")]
+    with patch.object(
+        RetrieveSodarCollection, "iter_samplesheet_file_list", return_value=iter(listing)
+    ) as mock_list:
+        first = RetrieveSodarCollection(args).perform()
+        second = RetrieveSodarCollection(args).perform()
+        assert first == second == {"x.txt": [listing[0]]}
+        # answered from the inventory
+        assert mock_list.call_count == 1
+
+        args.refresh_cache = True
+        mock_list.return_value = iter(listing[:1])
+        RetrieveSodarCollection(args).perform()
+        assert mock_list.call_count == 2
+
+    # without a maximal age, the inventory is not used
+    args.inventory_max_age = 0
+    assert RetrieveSodarCollection(args).inventory is None
+
+
+def test_inventory_indexes(tmp_path):
+    inventory = SodarInventory(tmp_path / "inventory.sqlite3")
+    plan = inventory._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT path FROM data_objects "
+        "WHERE server = ? AND project = ? AND checksum = ?",
+        (SERVER, PROJECT, "abc"),
+    ).fetchall()
+    assert "data_objects_project_checksum" in str(plan)
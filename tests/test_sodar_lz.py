@@ -3,12 +3,14 @@
 from argparse import ArgumentParser
 from unittest.mock import MagicMock, patch
 
+from cubi_tk.__main__ import main
 from cubi_tk.parsers import get_sodar_parser
 from cubi_tk.sodar.lz_validate import ValidateLandingZoneCommand
+from cubi_tk.sodar_api import iter_poll_intervals
 
 
-@patch("cubi_tk.sodar_api.requests.get")
-@patch("cubi_tk.sodar_api.requests.post")
+@patch("cubi_tk.sodar_api.requests.Session.get")
+@patch("cubi_tk.sodar_api.requests.Session.post")
 def test_validate(mockapi_post, mockapi_get, caplog, capsys):
     fake_lz_info = {
         "sodar_uuid": "466ab946-ce6a-4c78-9981-19b79e7bbe86",
@@ -85,3 +87,72 @@ def test_validate(mockapi_post, mockapi_get, caplog, capsys):
     stdout_lines = capsys.readouterr().out.split("\n")
     assert len(stdout_lines) == 2
     assert stdout_lines[0] == fake_lz_info["sodar_uuid"]
+
+
+def _lz_json(lz_uuid, status):
+    return {
+        "sodar_uuid": lz_uuid,
+        "date_modified": "2025-09-03T10:41:58.304670+02:00",
+        "status": status,
+        "status_locked": False,
+        "project": "",
+        "title": "",
+        "description": "",
+        "user": "",
+        "assay": "",
+        "status_info": f"Status {status}",
+        "configuration": None,
+        "config_data": {},
+        "irods_path": "/sodarZone/lz",
+    }
+
+
+@patch("cubi_tk.sodar_api.time.sleep")
+def test_landing_zone_wait(mock_sleep, requests_mock, capsys):
+    lz_moved = "466ab946-ce6a-4c78-9981-19b79e7bbe86"
+    lz_failed = "466ab946-ce6a-4c78-9981-19b79e7bbe87"
+    url = "https://sodar-staging.bihealth.org/landingzones/api/retrieve/{}"
+    moved_mock = requests_mock.register_uri(
+        "GET",
+        url.format(lz_moved),
+        [
+            {"json": _lz_json(lz_moved, "PREPARING")},
+            {"json": _lz_json(lz_moved, "MOVING")},
+            {"json": _lz_json(lz_moved, "MOVING")},
+            {"json": _lz_json(lz_moved, "MOVED")},
+        ],
+    )
+    failed_mock = requests_mock.register_uri(
+        "GET", url.format(lz_failed), json=_lz_json(lz_failed, "FAILED")
+    )
+    argv = [
+        "sodar",
+        "landing-zone-wait",
+        "--sodar-server-url",
+        "https://sodar-staging.bihealth.org/",
+        "--sodar-api-token",
+        "token",
+        "--poll-initial-interval",
+        "1",
+        lz_moved,
+        lz_failed,
+    ]
+    # one of the zones failed
+    assert main(argv) == 1
+    assert moved_mock.call_count == 4
+    assert failed_mock.call_count == 1
+    # poll intervals grow between the polls of the moving zone
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 3
+    assert delays[0] < delays[-1]
+    # report lines are tab-separated, logging goes to stdout as well
+    stdout_lines = [line for line in capsys.readouterr().out.split("\n") if "\t" in line]
+    assert [line.split("\t")[:2] for line in stdout_lines] == [
+        [lz_moved, "MOVED"],
+        [lz_failed, "FAILED"],
+    ]
+
+
+def test_iter_poll_intervals():
+    intervals = iter_poll_intervals(initial=1, maximum=4, factor=2)
+    assert [next(intervals) for _ in range(5)] == [1, 2, 4, 4, 4]
@@ -0,0 +1,79 @@
+"""Tests for ``cubi_tk.sodar_stand_in``, driving ``SodarApi`` against the stand-in server."""
+
+from argparse import Namespace
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from cubi_tk.sodar_api import SodarApi
+from cubi_tk.sodar_cache import SodarResponseCache
+from cubi_tk.sodar_stand_in import StandInConfig, make_stand_in_server
+
+PROJECT_UUID = "123e4567-e89b-12d3-a456-426655440000"
+
+
+@pytest.fixture
+def stand_in_server():
+    server = make_stand_in_server(config=StandInConfig(num_files=2500, num_rows=10))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stand_in_api(stand_in_server):
+    args = Namespace(
+        config=None,
+        sodar_server_url=f"http://127.0.0.1:{stand_in_server.server_port}/",
+        sodar_api_token="token123",
+        project_uuid=PROJECT_UUID,
+    )
+    return SodarApi(args)
+
+
+def test_stand_in_samplesheets(stand_in_api):
+    investigation = stand_in_api.get_samplesheet_investigation_retrieve()
+    assert investigation.project == PROJECT_UUID
+    assay, study = stand_in_api.get_assay_from_uuid()
+    assert assay.irods_path.startswith(study.irods_path)
+
+    isa = stand_in_api.get_samplesheet_export()
+    assert len(isa["assays"]["a_Study_0_Assay_0.txt"]["tsv"].splitlines()) == 11
+
+    file_list = list(stand_in_api.iter_samplesheet_file_list())
+    assert len(file_list) == 2500
+    assert file_list[1].path == file_list[0].path + ".md5"
+    assert all(obj.path.startswith(assay.irods_path) for obj in file_list)
+    # deterministic content
+    assert stand_in_api.get_samplesheet_file_list() == file_list
+
+
+def test_stand_in_export_etag(stand_in_server, stand_in_api, tmp_path):
+    stand_in_api.disk_cache = SodarResponseCache(cache_dir=tmp_path)
+    first = stand_in_api.get_samplesheet_export(get_all=True)
+    stand_in_api.clear_cache()
+    with patch.object(SodarResponseCache, "touch", wraps=stand_in_api.disk_cache.touch) as touch:
+        assert stand_in_api.get_samplesheet_export(get_all=True) == first
+    # revalidated through "304 Not Modified"
+    touch.assert_called_once()
+    app = stand_in_server.get_app()
+    assert app.request_counts[("GET", "samplesheets", "export/json")] == 2
+
+
+def test_stand_in_landingzones(stand_in_api):
+    lz = stand_in_api.post_landingzone_create(wait_until_ready=True)
+    assert lz is not None
+    assert stand_in_api.post_landingzone_submit_move(lz.sodar_uuid) == lz.sodar_uuid
+    result = stand_in_api.wait_for_landingzones([lz.sodar_uuid], initial_interval=0.01)
+    assert result[lz.sodar_uuid].status == "MOVED"
+    landingzones = stand_in_api.get_landingzone_list(filter_for_state=["MOVED"])
+    assert [zone.sodar_uuid for zone in landingzones] == [lz.sodar_uuid]
+
+
+def test_stand_in_errors(stand_in_api):
+    assert stand_in_api.get_landingzone_retrieve("00000000-0000-0000-0000-000000000000") is None
+    stand_in_api.sodar_headers["samplesheets"] = {}
+    assert stand_in_api.get_samplesheet_remote() is None
@@ -0,0 +1,115 @@
+"""Tests for ``cubi_tk.transfer_pipeline``."""
+
+import hashlib
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from cubi_tk.irods_common import TransferJob
+from cubi_tk.transfer_pipeline import TransferPipeline, group_transfer_units
+
+
+def make_jobs(tmp_path, names, with_md5=()):
+    jobs = []
+    for name in names:
+        path = tmp_path / name
+        path.write_text(name)
+        if name in with_md5:
+            (tmp_path / f"{name}.md5").write_text("0" * 32 + f"  {name}\n")
+        for ext in ("", ".md5"):
+            jobs.append(TransferJob(str(path) + ext, f"/zone/lz/coll/{name}{ext}"))
+    return jobs
+
+
+def test_group_transfer_units():
+    jobs = [
+        TransferJob("/b.txt", "/lz/b.txt", bytes=1),
+        TransferJob("/a.txt.md5", "/lz/a.txt.md5", bytes=-1),
+        TransferJob("/a.txt", "/lz/a.txt", bytes=2),
+        TransferJob("/c.txt.md5", "/lz/c.txt.md5", bytes=3),
+    ]
+    units = group_transfer_units(jobs, ".md5")
+    assert [(u.index, u.data_job, u.checksum_job) for u in units] == [
+        (0, jobs[2], jobs[1]),
+        (1, jobs[0], None),
+        (2, None, jobs[3]),
+    ]
+    assert [u.bytes for u in units] == [2, 1, 3]
+
+
+@patch("cubi_tk.transfer_pipeline.logger")
+def test_transfer_pipeline(mocklogger, tmp_path):
+    names = [f"file{i:02d}.txt" for i in range(20)]
+    jobs = make_jobs(tmp_path, names, with_md5=("file00.txt",))
+    itransfer = MagicMock()
+    itransfer.upload_options.return_value = {}
+    hashed = []
+    uploaded = []
+    lock = threading.Lock()
+    session = itransfer.session
+
+    def slow_put(local, remote, **kwargs):
+        time.sleep(0.005)
+        with lock:
+            uploaded.append(local)
+
+    session.data_objects.put.side_effect = slow_put
+
+    from cubi_tk import transfer_pipeline
+
+    orig_compute = transfer_pipeline.compute_checksum
+
+    def tracking_compute(filename, *args, **kwargs):
+        with lock:
+            hashed.append(filename)
+            # backpressure: hashing never runs far ahead of the uploads
+            assert len(hashed) - len(uploaded) // 2 <= 2 * 2 + 2 + 1
+        return orig_compute(filename, *args, **kwargs)
+
+    with patch("cubi_tk.transfer_pipeline.compute_checksum", side_effect=tracking_compute):
+        failed = TransferPipeline(
+            itransfer, "MD5", checksum_jobs=2, upload_jobs=2, queue_size=2
+        ).run(reversed(jobs))
+
+    assert failed == 0
+    # existing checksum files are kept, missing ones created
+    assert (tmp_path / "file00.txt.md5").read_text().startswith("0" * 32)
+    assert (tmp_path / "file01.txt.md5").read_text() == (
+        hashlib.md5(b"file01.txt").hexdigest() + "  file01.txt\n"
+    )
+    assert sorted(hashed) == [str(tmp_path / name) for name in names[1:]]
+    assert sorted(uploaded) == sorted(job.path_local for job in jobs)
+    session.collections.create.assert_called_with("/zone/lz/coll")
+    # created checksum files are uploaded with their size, so "sync" can compare it
+    assert all(c.args[1].bytes > 0 for c in itransfer.upload_options.call_args_list)
+    # reported in input order
+    reported = [c.args[1] for c in mocklogger.debug.call_args_list]
+    assert reported == sorted(job.path_local for job in jobs)
+
+
+@patch("cubi_tk.transfer_pipeline.logger")
+def test_transfer_pipeline_errors(mocklogger, tmp_path):
+    jobs = make_jobs(tmp_path, ["a.txt", "b.txt", "c.txt"])
+    (tmp_path / "a.txt").unlink()
+    itransfer = MagicMock()
+    itransfer.upload_options.side_effect = lambda session, job, overwrite: (
+        None if job.path_local.endswith("c.txt") else {}
+    )
+    itransfer.get_irods_error.return_value = "upload failed"
+    put = itransfer.session.data_objects.put
+    put.side_effect = lambda local, remote, **kw: (
+        (_ for _ in ()).throw(IOError("x")) if local.endswith("b.txt.md5") else None
+    )
+
+    failed = TransferPipeline(itransfer, "MD5", checksum_jobs=1, upload_jobs=1).run(jobs)
+
+    assert failed == 2
+    errors = [c.args[0] for c in mocklogger.error.call_args_list]
+    assert errors[0].startswith(f"Problem computing checksum of {tmp_path}/a.txt")
+    assert errors[1] == f"Problem during transfer of {tmp_path}/b.txt.md5: upload failed"
+    # c.txt is kept remotely, its checksum file is uploaded
+    assert sorted(c.args[0] for c in put.call_args_list) == [
+        f"{tmp_path}/b.txt",
+        f"{tmp_path}/b.txt.md5",
+        f"{tmp_path}/c.txt.md5",
+    ]